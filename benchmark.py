@@ -0,0 +1,63 @@
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+
+from benchmarks.benchmark_report import compare_reports, load_report, make_report, save_report
+from benchmarks.pipeline_benchmark import PipelineBenchmark
+from benchmarks.synthetic_market_data import generate_candle_tree
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark of backtesting pipeline on synthetic minute candles")
+    parser.add_argument("--days", type=int, default=60, help="count of calendar days of candles for every figi")
+    parser.add_argument("--figies", default="BENCH1", help="comma separated figies")
+    parser.add_argument("--seed", type=int, default=0, help="seed of synthetic prices")
+    parser.add_argument("--repeat", type=int, default=3, help="every stage is repeated, the best time is taken")
+    parser.add_argument("--data-path", default="",
+                        help="folder for synthetic candles. It's kept and reused by next runs. "
+                             "Temporary folder is used by default")
+    parser.add_argument("--output", default="benchmarks/results/benchmark.json", help="JSON file with results")
+    parser.add_argument("--compare", default="", help="JSON file of previous run to compare with")
+    parser.add_argument("--log-level", default="WARNING", help="level of logs (printed to console)")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+
+    figies = [x.strip() for x in args.figies.split(",") if x.strip()]
+    data_path = args.data_path or tempfile.mkdtemp(prefix="benchmark_")
+
+    try:
+        if args.data_path and any(os.path.exists(os.path.join(data_path, x)) for x in figies):
+            print(f"Synthetic candles are reused: {data_path}")
+        else:
+            candles_count = generate_candle_tree(data_path, figies, args.days, args.seed)
+            print(f"Synthetic candles have been generated: {candles_count}")
+
+        stages = PipelineBenchmark(data_path, figies, repeat=args.repeat).run()
+
+    finally:
+        if not args.data_path:
+            shutil.rmtree(data_path, ignore_errors=True)
+
+    for stage in stages:
+        print(f"{stage.name}: {stage.seconds:.4f} sec, {stage.candles_per_sec:.0f} candles/sec, "
+              f"peak RSS: {stage.peak_rss_mb} MB")
+
+    report = make_report(
+        stages,
+        {"days": args.days, "figies": figies, "seed": args.seed, "repeat": args.repeat}
+    )
+    save_report(args.output, report)
+    print(f"Results have been saved: {args.output}")
+
+    if args.compare:
+        for line in compare_reports(load_report(args.compare), report):
+            print(line)
@@ -0,0 +1,63 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+from benchmarks.pipeline_benchmark import StageResult, peak_rss_mb
+
+__all__ = ("make_report", "save_report", "load_report", "compare_reports")
+
+
+def make_report(stages: list[StageResult], settings: dict) -> dict:
+    """Results of benchmark with environment (commit, python, platform) to compare runs"""
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": [x.to_json() for x in stages]
+    }
+
+
+def save_report(file_name: str, report: dict) -> None:
+    if os.path.dirname(file_name):
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+    with open(file_name, "w", encoding="UTF8") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(file_name: str) -> dict:
+    with open(file_name, encoding="UTF8") as file:
+        return json.load(file)
+
+
+def compare_reports(base: dict, current: dict) -> list[str]:
+    """Lines with candles/sec of every stage of both reports and speedup of the current one"""
+    base_stages = {x["name"]: x for x in base["stages"]}
+    lines = [f"Base commit: {base.get('commit')}, current commit: {current.get('commit')}"]
+
+    for stage in current["stages"]:
+        base_stage = base_stages.get(stage["name"])
+        if not base_stage or not base_stage["candles_per_sec"]:
+            lines.append(f"{stage['name']}: {stage['candles_per_sec']:.0f} candles/sec (new)")
+            continue
+
+        speedup = stage["candles_per_sec"] / base_stage["candles_per_sec"]
+        lines.append(f"{stage['name']}: {base_stage['candles_per_sec']:.0f} -> {stage['candles_per_sec']:.0f} "
+                     f"candles/sec (x{speedup:.2f})")
+
+    return lines
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
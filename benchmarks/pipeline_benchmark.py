@@ -0,0 +1,204 @@
+import logging
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+import matplotlib
+from matplotlib import pyplot as plt
+
+from configuration.settings import CommissionSettings, StrategySettings
+from data_provider.candle_columns import CandleColumns
+from data_provider.tinkoff_downloaded.csv_data_storage import CSVDataStorageReader
+from history_tests.metrics.trade_metrics import TradeMetricsEngine
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.trading_emulator_factory import TradingEmulatorFactory
+from result_viewer.base_viewer import IResultViewer
+from result_viewer.result_to_logs import ResultViewerToLogs
+from result_viewer.result_to_plot import ResultViewerToPlot
+from trade_system.commissions.commissions import CommissionEveryOrderCalculator
+from trade_system.strategies.strategy_factory import StrategyFactory
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+__all__ = ("StageResult", "PipelineBenchmark", "BENCHMARK_STRATEGIES", "peak_rss_mb")
+
+logger = logging.getLogger(__name__)
+
+# strategies with settings from examples of settings.ini
+BENCHMARK_STRATEGIES = {
+    "RsiStrategy": {
+        "LENGTH": "14", "SOURCE": "close", "INTERVAL_MIN": "10", "LONG_RSI_LEVEL": "25", "SHORT_RSI_LEVEL": "75",
+        "LONG_TAKE": "1.02", "LONG_STOP": "0.99", "SHORT_TAKE": "0.98", "SHORT_STOP": "1.01"
+    },
+    "ChangeAndVolumeStrategy": {
+        "SIGNAL_VOLUME": "300", "SIGNAL_MIN_CANDLES": "2", "SIGNAL_MIN_TAIL": "0.15",
+        "LONG_TAKE": "1.01", "LONG_STOP": "0.985", "SHORT_TAKE": "0.99", "SHORT_STOP": "1.015"
+    }
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process in megabytes (None if it isn't available on the platform)"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # bytes on macOS, kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+@dataclass(eq=False, repr=True)
+class StageResult:
+    name: str
+    # the best time of repeats, summed by all figies
+    seconds: float = 0.0
+    candles: int = 0
+    # peak RSS of the process after the stage
+    peak_rss_mb: Optional[float] = None
+
+    @property
+    def candles_per_sec(self) -> float:
+        return self.candles / self.seconds if self.seconds > 0 else 0.0
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "candles": self.candles,
+            "candles_per_sec": self.candles_per_sec,
+            "peak_rss_mb": self.peak_rss_mb
+        }
+
+
+class PipelineBenchmark:
+    """
+    Times every stage of backtesting pipeline separately on pre downloaded candles:
+    - csv_read - parsing of csv files into candle columns;
+    - csv_read_candles - parsing of csv files into InternalCandle stream (the streaming path of data provider);
+    - candle_construction - InternalCandle construction from candle columns;
+    - analyze_candle:{strategy} - candle by candle analysis;
+    - analyze_candles:{strategy} - batch analysis (if strategy supports it);
+    - emulator:{strategy}:{emulator} - trading emulation candle by candle (stream) and on all candles (columns);
+    - viewer:{strategy}:{viewer} - view of results of all emulators.
+    Every stage is repeated `repeat` times and the best time is taken.
+    Logs are written as configured by caller, keep level WARNING or higher to measure calculations only.
+    """
+
+    def __init__(self, root_path: str, figies: list[str], from_days: int = -1, repeat: int = 1) -> None:
+        self.__root_path = root_path
+        self.__figies = figies
+        self.__from_days = from_days
+        self.__repeat = max(repeat, 1)
+
+        self.__stages: dict[str, StageResult] = dict()
+
+    def run(self) -> list[StageResult]:
+        self.__stages = dict()
+
+        # plot viewer doesn't open windows
+        matplotlib.use("Agg")
+        commission_calculator = CommissionEveryOrderCalculator(CommissionSettings(every_order=Decimal("0.003")))
+        metrics_engine = TradeMetricsEngine(commission_calculator)
+        viewers = [ResultViewerToLogs(metrics_engine), ResultViewerToPlot(metrics_engine)]
+
+        for figi in self.__figies:
+            logger.info(f"Benchmark figi: {figi}")
+
+            columns: CandleColumns = self.__measure(
+                "csv_read", 0,
+                lambda: CSVDataStorageReader(self.__root_path).read_candle_columns(figi, self.__from_days)
+            )
+            candles_count = len(columns)
+            self.__stages["csv_read"].candles += candles_count
+
+            self.__measure(
+                "csv_read_candles", candles_count,
+                lambda: sum(1 for _ in CSVDataStorageReader(self.__root_path).read_candles(figi, self.__from_days))
+            )
+            candles = self.__measure("candle_construction", candles_count, lambda: list(columns))
+
+            for strategy_name, settings in BENCHMARK_STRATEGIES.items():
+                self.__run_strategy(
+                    StrategySettings(name=strategy_name, figi=figi, settings=settings),
+                    columns,
+                    candles,
+                    viewers
+                )
+
+        return list(self.__stages.values())
+
+    def __run_strategy(
+            self,
+            strategy_settings: StrategySettings,
+            columns: CandleColumns,
+            candles: list,
+            viewers: list[IResultViewer]
+    ) -> None:
+        name = strategy_settings.name
+        candles_count = len(candles)
+
+        def analyze_candle() -> None:
+            strategy = StrategyFactory.new_factory(name, strategy_settings)
+            for candle in candles:
+                strategy.analyze_candle(candle)
+
+        self.__measure(f"analyze_candle:{name}", candles_count, analyze_candle)
+
+        if StrategyFactory.new_factory(name, strategy_settings).batch_supported:
+            self.__measure(
+                f"analyze_candles:{name}", candles_count,
+                lambda: StrategyFactory.new_factory(name, strategy_settings).analyze_candles(columns)
+            )
+
+        test_results: dict[str, TestResults] = dict()
+
+        for emulator in TradingEmulatorFactory.new_emulators(strategy_settings):
+            def emulate_stream() -> TestResults:
+                emulator.start_emulation()
+                for candle in candles:
+                    emulator.emulate_candle(candle)
+                return emulator.stop_emulation()
+
+            test_results[str(emulator)] = \
+                self.__measure(f"emulator:{name}:{emulator}:stream", candles_count, emulate_stream)
+
+            self.__measure(
+                f"emulator:{name}:{emulator}:columns", candles_count,
+                lambda: emulator.emulate_columns(columns)
+            )
+
+        for viewer in viewers:
+            def view() -> None:
+                with warnings.catch_warnings():
+                    # show() of non-interactive backend warns
+                    warnings.simplefilter("ignore", UserWarning)
+                    viewer.view(test_results)
+                plt.close("all")
+
+            self.__measure(f"viewer:{name}:{viewer.__class__.__name__}", candles_count, view)
+
+    def __measure(self, name: str, candles_count: int, action: Callable[[], Any]) -> Any:
+        best = float("inf")
+        result = None
+
+        for _ in range(self.__repeat):
+            start = time.perf_counter()
+            result = action()
+            best = min(best, time.perf_counter() - start)
+
+        stage = self.__stages.setdefault(name, StageResult(name))
+        stage.seconds += best
+        stage.candles += candles_count
+        stage.peak_rss_mb = peak_rss_mb()
+
+        logger.info(f"Stage {name}: {best:.4f} sec, candles: {candles_count}")
+
+        return result
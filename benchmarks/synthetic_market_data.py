@@ -0,0 +1,74 @@
+import logging
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from data_provider.internal_candle import InternalCandle
+from data_provider.tinkoff_downloaded.csv_data_storage import CSVDataStorageWriter
+from invest_api.utils import nano_to_quotation
+
+__all__ = ("generate_candle_tree")
+
+logger = logging.getLogger(__name__)
+
+# the main trading session of MOEX in UTC
+_SESSION_START = time(7, 0)
+_SESSION_MINUTES = 540
+# prices are rounded to 0.01 (in nano units)
+_PRICE_STEP = 10_000_000
+
+
+def generate_candle_tree(
+        root_path: str,
+        figies: list[str],
+        days: int,
+        seed: int = 0,
+        start: date = date(2022, 1, 3)
+) -> int:
+    """
+    Generate minute candles in 'TinkoffDownloaded' folder layout (root_path/figi/candle/year/month/day).
+    Prices are random walk, every working day has a full trading session.
+    The same arguments make the same files, so benchmarks of different commits read the same data.
+    Returns count of generated candles.
+    """
+    writer = CSVDataStorageWriter(root_path)
+    candles_count = 0
+
+    for figi in figies:
+        rnd = random.Random(f"{seed}:{figi}")
+        price = 100 * 10 ** 9
+
+        for day in (start + timedelta(days=x) for x in range(days)):
+            if day.weekday() >= 5:
+                continue
+
+            candles: list[InternalCandle] = []
+            session_start = datetime.combine(day, _SESSION_START, tzinfo=timezone.utc)
+
+            for minute in range(_SESSION_MINUTES):
+                open_ = price
+                close = max(_round_price(open_ + rnd.gauss(0, 0.003) * open_), _PRICE_STEP)
+                high = max(open_, close) + _round_price(abs(rnd.gauss(0, 0.001)) * open_)
+                low = max(min(open_, close) - _round_price(abs(rnd.gauss(0, 0.001)) * open_), _PRICE_STEP)
+
+                candles.append(
+                    InternalCandle(
+                        open=nano_to_quotation(open_),
+                        high=nano_to_quotation(high),
+                        low=nano_to_quotation(low),
+                        close=nano_to_quotation(close),
+                        volume=rnd.randint(1, 1000),
+                        time=session_start + timedelta(minutes=minute)
+                    )
+                )
+                price = close
+
+            writer.write_candles(figi, "candle", day, candles)
+            candles_count += len(candles)
+
+        logger.info(f"Synthetic candles have been generated: {figi}, days: {days}")
+
+    return candles_count
+
+
+def _round_price(nano: float) -> int:
+    return int(round(nano / _PRICE_STEP)) * _PRICE_STEP
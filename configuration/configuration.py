@@ -1,8 +1,10 @@
 from configparser import ConfigParser
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import ValuesView
 
-from configuration.settings import StrategySettings, CommissionSettings
+from configuration.settings import StrategySettings, CommissionSettings, SweepSettings, InstrumentationSettings, \
+    WalkForwardSettings, ResultCacheSettings
 
 __all__ = ("ProgramConfiguration")
 
@@ -20,22 +22,100 @@ class ProgramConfiguration:
             every_order=Decimal(config["COMMISSION"]["EVERY_ORDER_PERCENT"])
         )
 
-        self.__test_strategy_settings = \
+        # FIGI and TICKER can be lists (comma separated) to test strategy on several instruments
+        figies = [x.strip() for x in config["TEST_STRATEGY"]["FIGI"].split(",") if x.strip()]
+        tickers = [x.strip() for x in config["TEST_STRATEGY"]["TICKER"].split(",") if x.strip()]
+        if len(figies) != len(tickers):
+            raise Exception("Count of FIGI and TICKER values must be the same")
+        # results of instruments are keyed by ticker (figi if ticker is empty)
+        if len(set(figies)) != len(figies) or len(set(tickers)) != len(tickers):
+            raise Exception("FIGI and TICKER values must be unique")
+
+        self.__test_strategies_settings = [
             StrategySettings(
                 name=config["TEST_STRATEGY"]["STRATEGY_NAME"],
-                figi=config["TEST_STRATEGY"]["FIGI"],
-                ticker=config["TEST_STRATEGY"]["TICKER"],
+                figi=figi,
+                ticker=ticker,
                 settings=config["TEST_STRATEGY_SETTINGS"]
             )
+            for figi, ticker in zip(figies, tickers)
+        ]
+        self.__test_max_workers = int(config["TEST_STRATEGY"].get("MAX_WORKERS", 0))
 
         self.__data_provider_name = config["DATA_PROVIDER"]["NAME"]
         self.__data_provider_from_days = int(config["DATA_PROVIDER"]["FROM_DAYS"])
+        self.__data_provider_single_pass = config["DATA_PROVIDER"].getboolean("SINGLE_PASS", fallback=False)
+        self.__data_provider_columnar_store = config["DATA_PROVIDER"].getboolean("COLUMNAR_STORE", fallback=False)
+        # candles are aggregated into bars of the interval, 1 minute means no aggregation
+        self.__data_provider_interval_min = int(config["DATA_PROVIDER"].get("INTERVAL_MIN", 1))
+        self.__data_provider_rollup_cache_path = config["DATA_PROVIDER"].get("ROLLUP_CACHE_PATH", "")
+        # emulations are continued from checkpoints by new candles only, empty path means no checkpoints
+        self.__data_provider_checkpoint_path = config["DATA_PROVIDER"].get("CHECKPOINT_PATH", "")
 
         self.__data_provider_settings = config["DATA_PROVIDER_SETTINGS"].values()
 
+        # parameter sweep is optional
+        sweep = config["SWEEP"] if config.has_section("SWEEP") else {}
+        self.__sweep_settings = SweepSettings(
+            method=sweep.get("METHOD", "grid"),
+            random_count=int(sweep.get("RANDOM_COUNT", 0)),
+            random_seed=int(sweep["RANDOM_SEED"]) if sweep.get("RANDOM_SEED") else None,
+            max_workers=int(sweep.get("MAX_WORKERS", 0)),
+            top_count=int(sweep.get("TOP_COUNT", 10)),
+            strategy_settings={
+                key.upper(): value for key, value in config["SWEEP_STRATEGY_SETTINGS"].items()
+            } if config.has_section("SWEEP_STRATEGY_SETTINGS") else {}
+        )
+
+        # instrumentation is optional
+        instrumentation = config["INSTRUMENTATION"] if config.has_section("INSTRUMENTATION") else None
+        self.__instrumentation_settings = InstrumentationSettings(
+            enabled=instrumentation.getboolean("ENABLED", fallback=False),
+            profile=instrumentation.getboolean("PROFILE", fallback=False),
+            output_path=instrumentation.get("OUTPUT_PATH", "logs/instrumentation"),
+            formats=[x.strip().lower() for x in instrumentation.get("FORMATS", "json").split(",") if x.strip()]
+        ) if instrumentation else InstrumentationSettings()
+
+        # cache of test results is optional
+        result_cache = config["RESULT_CACHE"] if config.has_section("RESULT_CACHE") else None
+        self.__result_cache_settings = ResultCacheSettings(
+            enabled=result_cache.getboolean("ENABLED", fallback=False),
+            path=result_cache.get("PATH", "cache/results"),
+            max_entries=int(result_cache.get("MAX_ENTRIES", 100)),
+            max_size_mb=int(result_cache.get("MAX_SIZE_MB", 0))
+        ) if result_cache else ResultCacheSettings()
+
+        # walk-forward tests are optional
+        walk_forward = config["WALK_FORWARD"] if config.has_section("WALK_FORWARD") else {}
+        self.__walk_forward_settings = WalkForwardSettings(
+            windows=[
+                (_parse_date(start), _parse_date(end))
+                for start, _, end in (x.strip().partition(":") for x in walk_forward.get("WINDOWS", "").split(","))
+                if start and end
+            ],
+            start=_parse_date(walk_forward["START"]) if walk_forward.get("START") else None,
+            end=_parse_date(walk_forward["END"]) if walk_forward.get("END") else None,
+            test_days=int(walk_forward.get("TEST_DAYS", 30)),
+            train_days=int(walk_forward.get("TRAIN_DAYS", 0)),
+            step_days=int(walk_forward.get("STEP_DAYS", 0)),
+            anchored=config.getboolean("WALK_FORWARD", "ANCHORED", fallback=False),
+            optimize=config.getboolean("WALK_FORWARD", "OPTIMIZE", fallback=False),
+            max_workers=int(walk_forward.get("MAX_WORKERS", 0))
+        )
+
     @property
     def test_strategy_settings(self) -> StrategySettings:
-        return self.__test_strategy_settings
+        """Settings for the first (or the only) instrument"""
+        return self.__test_strategies_settings[0]
+
+    @property
+    def test_strategies_settings(self) -> list[StrategySettings]:
+        """Settings for every instrument"""
+        return self.__test_strategies_settings
+
+    @property
+    def test_max_workers(self) -> int:
+        return self.__test_max_workers
 
     @property
     def commission_settings(self) -> CommissionSettings:
@@ -49,6 +129,49 @@ class ProgramConfiguration:
     def data_provider_from_days(self) -> int:
         return self.__data_provider_from_days
 
+    @property
+    def data_provider_single_pass(self) -> bool:
+        return self.__data_provider_single_pass
+
+    @property
+    def data_provider_columnar_store(self) -> bool:
+        return self.__data_provider_columnar_store
+
+    @property
+    def data_provider_interval_min(self) -> int:
+        return self.__data_provider_interval_min
+
+    @property
+    def data_provider_rollup_cache_path(self) -> str:
+        return self.__data_provider_rollup_cache_path
+
+    @property
+    def data_provider_checkpoint_path(self) -> str:
+        return self.__data_provider_checkpoint_path
+
+    @property
+    def sweep_settings(self) -> SweepSettings:
+        return self.__sweep_settings
+
+    @property
+    def instrumentation_settings(self) -> InstrumentationSettings:
+        return self.__instrumentation_settings
+
+    @property
+    def result_cache_settings(self) -> ResultCacheSettings:
+        return self.__result_cache_settings
+
+    @property
+    def walk_forward_settings(self) -> WalkForwardSettings:
+        return self.__walk_forward_settings
+
     @property
     def data_provider_settings(self) -> ValuesView[str]:
         return self.__data_provider_settings
+
+
+def _parse_date(value: str) -> datetime:
+    """Date or time in ISO format (2022-01-31), UTC if time zone isn't specified"""
+    time = datetime.fromisoformat(value.strip())
+
+    return time if time.tzinfo else time.replace(tzinfo=timezone.utc)
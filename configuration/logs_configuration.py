@@ -0,0 +1,79 @@
+import atexit
+import logging
+import multiprocessing
+import os
+from configparser import ConfigParser
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+__all__ = ("LogsConfiguration", "prepare_logs")
+
+_LOGS_FOLDER = "logs/"
+_LOGS_FORMAT = "%(asctime)s - %(module)s - %(levelname)s - %(funcName)s: %(lineno)d - %(message)s"
+
+
+class LogsConfiguration:
+    """
+    Represent logs configuration (LOGGING section).
+    It's loaded separately from ProgramConfiguration, because logs are required before program configuration
+    is loaded (to log errors of program configuration).
+    """
+    def __init__(self, file_name: str) -> None:
+        config = ConfigParser()
+        config.read(file_name)
+
+        # the section is optional
+        section = config["LOGGING"] if config.has_section("LOGGING") else None
+
+        self.__level = section.get("LEVEL", "DEBUG").upper() if section else "DEBUG"
+        self.__queue = section.getboolean("QUEUE", fallback=False) if section else False
+
+    @property
+    def level(self) -> str:
+        return self.__level
+
+    @property
+    def queue(self) -> bool:
+        return self.__queue
+
+
+def prepare_logs(file_name: str, configuration: LogsConfiguration) -> None:
+    """
+    Configure root logger to write into file in logs folder.
+    In queue mode, records are put into a queue and written to file by a separate thread (QueueListener),
+    so the caller doesn't wait for file writing. The queue is shared with child processes.
+    """
+    if not os.path.exists(_LOGS_FOLDER):
+        os.makedirs(_LOGS_FOLDER)
+
+    file_handler = RotatingFileHandler(
+        os.path.join(_LOGS_FOLDER, file_name),
+        maxBytes=100000000,
+        backupCount=10,
+        encoding='utf-8'
+    )
+
+    if not configuration.queue:
+        logging.basicConfig(
+            level=configuration.level,
+            format=_LOGS_FORMAT,
+            handlers=[file_handler],
+            encoding="utf-8"
+        )
+        return
+
+    file_handler.setFormatter(logging.Formatter(_LOGS_FORMAT))
+
+    # multiprocessing queue is used, because child processes (process pools) log to the same file
+    log_queue = multiprocessing.Queue(-1)
+    listener = QueueListener(log_queue, file_handler)
+
+    # records are formatted by the file handler of listener only
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(configuration.level)
+    root_logger.addHandler(queue_handler)
+    listener.start()
+    # all records from the queue are written on exit
+    atexit.register(listener.stop)
@@ -1,7 +1,10 @@
+from datetime import datetime
 from decimal import Decimal
 from dataclasses import dataclass, field
+from typing import Optional
 
-__all__ = ("StrategySettings", "CommissionSettings")
+__all__ = ("StrategySettings", "CommissionSettings", "SweepSettings", "InstrumentationSettings", "WalkForwardSettings",
+           "ResultCacheSettings")
 
 
 @dataclass(eq=False, repr=True)
@@ -18,3 +21,56 @@ class StrategySettings:
 @dataclass(eq=False, repr=True)
 class CommissionSettings:
     every_order: Decimal = field(default_factory=Decimal)
+
+
+@dataclass(eq=False, repr=True)
+class SweepSettings:
+    # grid or random
+    method: str = "grid"
+    # count of random combinations (random method only)
+    random_count: int = 0
+    random_seed: Optional[int] = None
+    # 0 means count of CPU
+    max_workers: int = 0
+    top_count: int = 10
+    # ranges of strategy settings. Strategy settings without range are taken from TEST_STRATEGY_SETTINGS
+    strategy_settings: dict = field(default_factory=dict)
+
+
+@dataclass(eq=False, repr=True)
+class InstrumentationSettings:
+    enabled: bool = False
+    # capture every emulator by cProfile
+    profile: bool = False
+    output_path: str = "logs/instrumentation"
+    # json, prometheus
+    formats: list[str] = field(default_factory=lambda: ["json"])
+
+
+@dataclass(eq=False, repr=True)
+class WalkForwardSettings:
+    # explicit test periods [start, end). Rolling windows are used if they aren't specified
+    windows: list[tuple[datetime, datetime]] = field(default_factory=list)
+    # period of rolling windows (end is now by default)
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    test_days: int = 30
+    # train period before every test period, 0 means no training
+    train_days: int = 0
+    # shift of rolling windows, 0 means test_days (windows don't overlap)
+    step_days: int = 0
+    # train period starts from the beginning of history
+    anchored: bool = False
+    # choose settings on train period from ranges of SWEEP_STRATEGY_SETTINGS
+    optimize: bool = False
+    # 0 means count of CPU
+    max_workers: int = 0
+
+
+@dataclass(eq=False, repr=True)
+class ResultCacheSettings:
+    enabled: bool = False
+    path: str = "cache/results"
+    # the least recently used results are evicted above limits, 0 means no limit
+    max_entries: int = 100
+    max_size_mb: int = 0
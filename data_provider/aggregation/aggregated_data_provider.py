@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Generator, Optional
+
+import numpy as np
+
+from data_provider.aggregation.candle_aggregator import CandleAggregator, aggregate_columns
+from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns, datetime_to_ns, ns_to_datetime
+from data_provider.internal_candle import InternalCandle
+
+__all__ = ("AggregatedDataProvider")
+
+logger = logging.getLogger(__name__)
+
+
+class AggregatedDataProvider(IDataProvider):
+    """
+    Data provider aggregates candles of source provider into bars of `interval_min` minutes
+    (aligned bars, see CandleAggregator). Strategies get bars instead of 1 minute candles.
+    Streaming provide aggregates candles on the fly, columnar provide aggregates all candles at once.
+
+    Optional rollup cache keeps bars of closed days in binary file per figi and interval:
+        cache_path/figi/{interval_min}min/rollup.npy (+ rollup.json with covered period, source and day stamps)
+    Next runs read cached bars and aggregate only candles after the cached period (current day etc.).
+    The cache is rebuilt if it has been made from another source (see IDataProvider.source_id)
+    or candles of a cached day have been changed (backfilled, collected again, see IDataProvider.day_stamps).
+    Delete the folder to rebuild it anyway.
+    The cache is used if day is divided into whole bars only, so bars don't cross cached period bounds.
+    """
+    __ROLLUP_FILE = "rollup.npy"
+    __ROLLUP_META_FILE = "rollup.json"
+    __MINUTES_IN_DAY = 24 * 60
+
+    def __init__(self, source: IDataProvider, interval_min: int, cache_path: str = "") -> None:
+        self.__source = source
+        self.__interval = timedelta(minutes=interval_min)
+        self.__interval_min = interval_min
+
+        self.__cache_path = cache_path
+        if cache_path and self.__MINUTES_IN_DAY % interval_min:
+            logger.warning(f"Rollup cache is disabled: {interval_min} minutes interval doesn't divide a day")
+            self.__cache_path = ""
+
+    @property
+    def source_id(self) -> str:
+        # bars of another interval are other data
+        return f"{self.__source.source_id}, {self.__interval_min} min bars"
+
+    def period_start(self, from_days: int) -> Optional[datetime]:
+        return self.__source.period_start(from_days)
+
+    def day_stamps(self, figi: str, from_: Optional[datetime], to: datetime) -> Optional[dict[date, str]]:
+        return self.__source.day_stamps(figi, from_, to)
+
+    def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
+        if self.__cache_path:
+            yield from self.provide_columns(figi, from_days)
+            return
+
+        aggregator = CandleAggregator(self.__interval)
+
+        for candle in self.__source.provide(figi, from_days):
+            bar = aggregator.update(candle)
+            if bar:
+                yield bar.to_candle()
+
+        if aggregator.bar:
+            yield aggregator.bar.to_candle()
+
+    def provide_columns(self, figi: str, from_days: int) -> CandleColumns:
+        if not self.__cache_path:
+            return aggregate_columns(self.__source.provide_columns(figi, from_days), self.__interval)
+
+        # cached bars are sliced like source provider reads candles, so the cache doesn't change results
+        from_ = self.__source.period_start(from_days)
+        today_start = datetime.combine(datetime.now(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+
+        rollup_dir = Path(self.__cache_path, figi, f"{self.__interval_min}min")
+        cached = self.__read_rollup(rollup_dir, figi, from_)
+
+        if cached is None:
+            logger.info(f"Rollup cache is absent: figi: {figi}, interval: {self.__interval_min} min")
+
+            bars = aggregate_columns(self.__source.provide_columns(figi, from_days), self.__interval)
+            self.__write_rollup(rollup_dir, bars.time_slice(to=today_start), figi, from_, today_start)
+
+            return bars
+
+        cached_bars, cached_to = cached
+        logger.info(f"Rollup cache is used: figi: {figi}, interval: {self.__interval_min} min, "
+                    f"bars: {len(cached_bars)}, cached to: {cached_to}")
+
+        # only candles after cached period are aggregated
+        tail = aggregate_columns(self.__source.provide_columns_range(figi, cached_to), self.__interval)
+
+        if cached_to < today_start:
+            self.__write_rollup(
+                rollup_dir,
+                CandleColumns.concatenate([cached_bars, tail.time_slice(to=today_start)]),
+                figi,
+                self.__read_meta_from(rollup_dir),
+                today_start
+            )
+
+        return CandleColumns.concatenate([cached_bars.time_slice(from_), tail])
+
+    def __read_rollup(
+            self,
+            rollup_dir: Path,
+            figi: str,
+            from_: Optional[datetime]
+    ) -> Optional[tuple[CandleColumns, datetime]]:
+        """Cached bars and the end of cached period, if the cache covers requested period and it's valid"""
+        try:
+            with open(Path(rollup_dir, self.__ROLLUP_META_FILE), encoding="UTF8") as file:
+                meta = json.load(file)
+
+            cached_from = meta["from_ns"]
+            if cached_from is not None and (from_ is None or datetime_to_ns(from_) < cached_from):
+                logger.info(f"Rollup cache doesn't cover requested period and will be rebuilt: {rollup_dir}")
+                return None
+
+            if meta.get("source") != self.__source.source_id:
+                logger.info(f"Rollup cache has been made from another source and will be rebuilt: {rollup_dir}")
+                return None
+
+            cached_to = ns_to_datetime(meta["to_ns"])
+            day_stamps = self.__source.day_stamps(
+                figi,
+                ns_to_datetime(cached_from) if cached_from is not None else None,
+                cached_to
+            )
+            if day_stamps is not None and \
+                    {x.isoformat(): stamp for x, stamp in day_stamps.items()} != meta.get("day_stamps"):
+                logger.info(f"Candles of cached days have been changed, rollup cache will be rebuilt: {rollup_dir}")
+                return None
+
+            bars = CandleColumns.from_matrix(np.load(Path(rollup_dir, self.__ROLLUP_FILE)))
+
+            return bars, cached_to
+
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.info(f"Rollup cache read error {rollup_dir}. Cache will be rebuilt: {repr(ex)}")
+            return None
+
+    def __read_meta_from(self, rollup_dir: Path) -> Optional[datetime]:
+        with open(Path(rollup_dir, self.__ROLLUP_META_FILE), encoding="UTF8") as file:
+            from_ns = json.load(file)["from_ns"]
+
+        return ns_to_datetime(from_ns) if from_ns is not None else None
+
+    def __write_rollup(
+            self,
+            rollup_dir: Path,
+            bars: CandleColumns,
+            figi: str,
+            from_: Optional[datetime],
+            to: datetime
+    ) -> None:
+        rollup_file = str(Path(rollup_dir, self.__ROLLUP_FILE))
+        meta_file = str(Path(rollup_dir, self.__ROLLUP_META_FILE))
+
+        try:
+            day_stamps = self.__source.day_stamps(figi, from_, to)
+
+            os.makedirs(rollup_dir, exist_ok=True)
+
+            # meta is removed first and written last, so the cache is valid only when both files are ready
+            if os.path.exists(meta_file):
+                os.remove(meta_file)
+
+            tmp_rollup_file = rollup_file + ".tmp"
+            with open(tmp_rollup_file, "wb") as file:
+                np.save(file, bars.to_matrix())
+            os.replace(tmp_rollup_file, rollup_file)
+
+            tmp_meta_file = meta_file + ".tmp"
+            with open(tmp_meta_file, "w", encoding="UTF8") as file:
+                json.dump(
+                    {
+                        "from_ns": datetime_to_ns(from_) if from_ else None,
+                        "to_ns": datetime_to_ns(to),
+                        "source": self.__source.source_id,
+                        "day_stamps": {x.isoformat(): stamp for x, stamp in day_stamps.items()}
+                        if day_stamps is not None else None
+                    },
+                    file
+                )
+            os.replace(tmp_meta_file, meta_file)
+
+        except Exception as ex:
+            # read-only storage etc. Bars are still returned
+            logger.error(f"Rollup cache write error {rollup_dir}: {repr(ex)}")
@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from data_provider.candle_columns import CandleColumns, datetime_to_ns, ns_to_datetime
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import nano_to_quotation, quotation_to_nano
+
+__all__ = ("Bar", "CandleAggregator", "aggregate_columns", "bar_heads")
+
+
+@dataclass(eq=False, repr=True)
+class Bar:
+    """Candle of bigger interval in progress. Prices are fixed-point integers in nano units"""
+    time: datetime
+    open: int
+    high: int
+    low: int
+    close: int
+    volume: int
+
+    def to_candle(self) -> InternalCandle:
+        return InternalCandle(
+            open=nano_to_quotation(self.open),
+            high=nano_to_quotation(self.high),
+            low=nano_to_quotation(self.low),
+            close=nano_to_quotation(self.close),
+            volume=self.volume,
+            time=self.time
+        )
+
+
+class CandleAggregator:
+    """
+    Streaming aggregation of candles into bars of `interval` with O(1) work per candle.
+    Bars are:
+    - aligned (default) - bar is started on interval boundaries (UTC, like 10:00, 10:05 for 5 minutes)
+    and bar time is the boundary;
+    - anchored - bar is started by the first candle which is `interval` or later after the start of current bar,
+    bar time is time of its first candle.
+    """
+
+    def __init__(self, interval: timedelta, aligned: bool = True) -> None:
+        self.__interval_ns = interval // timedelta(microseconds=1) * 1000
+        self.__aligned = aligned
+
+        self.__bar: Optional[Bar] = None
+        self.__bar_start_ns = 0
+        self.__bars_count = 0
+
+    @property
+    def bar(self) -> Optional[Bar]:
+        """Bar in progress (the last bar)"""
+        return self.__bar
+
+    @property
+    def bars_count(self) -> int:
+        return self.__bars_count
+
+    def update(self, candle: InternalCandle) -> Optional[Bar]:
+        """
+        Add candle to bar in progress or start a new bar by the candle.
+        Returns completed bar if a new bar has been started.
+        """
+        time_ns = datetime_to_ns(candle.time)
+        bar = self.__bar
+
+        if bar and time_ns - self.__bar_start_ns < self.__interval_ns:
+            high, low = quotation_to_nano(candle.high), quotation_to_nano(candle.low)
+            if high > bar.high:
+                bar.high = high
+            if low < bar.low:
+                bar.low = low
+            bar.close = quotation_to_nano(candle.close)
+            bar.volume += candle.volume
+
+            return None
+
+        self.__bar_start_ns = time_ns - time_ns % self.__interval_ns if self.__aligned else time_ns
+        self.__bar = Bar(
+            time=ns_to_datetime(self.__bar_start_ns) if self.__aligned else candle.time,
+            open=quotation_to_nano(candle.open),
+            high=quotation_to_nano(candle.high),
+            low=quotation_to_nano(candle.low),
+            close=quotation_to_nano(candle.close),
+            volume=candle.volume
+        )
+        self.__bars_count += 1
+
+        return bar
+
+
+def bar_heads(time_ns: np.ndarray, interval: timedelta, aligned: bool = True) -> np.ndarray:
+    """Indexes of candles which start a new bar (the same rules as CandleAggregator has)"""
+    interval_ns = interval // timedelta(microseconds=1) * 1000
+    candles_count = len(time_ns)
+
+    if candles_count == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if aligned:
+        bar_numbers = time_ns.astype(np.int64) // interval_ns
+        return np.concatenate(([0], np.flatnonzero(bar_numbers[1:] != bar_numbers[:-1]) + 1)).astype(np.int64)
+
+    # every bar depends on the previous one, so the loop is sequential.
+    # Binary search on list is much faster than numpy calls for one value.
+    times = time_ns.astype(np.int64).tolist()
+
+    heads = [0]
+    while True:
+        next_head = bisect_left(times, times[heads[-1]] + interval_ns)
+        if next_head >= candles_count:
+            break
+
+        heads.append(next_head)
+
+    return np.array(heads, dtype=np.int64)
+
+
+def aggregate_columns(candles: CandleColumns, interval: timedelta, aligned: bool = True) -> CandleColumns:
+    """Vectorized aggregation of all candles into bars (the same result as CandleAggregator makes)"""
+    if len(candles) == 0:
+        return CandleColumns.empty()
+
+    time_ns = candles.time.view(np.int64)
+    heads = bar_heads(time_ns, interval, aligned)
+    interval_ns = interval // timedelta(microseconds=1) * 1000
+
+    return CandleColumns(
+        candles.open[heads],
+        np.maximum.reduceat(candles.high, heads),
+        np.minimum.reduceat(candles.low, heads),
+        candles.close[np.append(heads[1:], len(candles)) - 1],
+        np.add.reduceat(candles.volume, heads),
+        (time_ns[heads] - time_ns[heads] % interval_ns if aligned else time_ns[heads]).view("datetime64[ns]")
+    )
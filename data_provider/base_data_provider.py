@@ -1,6 +1,8 @@
 import abc
-from typing import Generator
+from datetime import date, datetime, timedelta, timezone
+from typing import Generator, Optional
 
+from data_provider.candle_columns import CandleColumns
 from data_provider.internal_candle import InternalCandle
 
 __all__ = ("IDataProvider")
@@ -8,6 +10,65 @@ __all__ = ("IDataProvider")
 
 class IDataProvider(abc.ABC):
     """Interface for different data providers: files, db, api etc."""
+    @property
+    def source_id(self) -> str:
+        """
+        Identity of data source (provider and its storage). Caches of derived data (rollup of bars etc.)
+        aren't used for data of another source.
+        """
+        return self.__class__.__name__
+
+    def period_start(self, from_days: int) -> Optional[datetime]:
+        """
+        Time of the first candle which can be provided for from_days period, None means all history.
+        Wrappers and caches slice loaded candles by it, so they provide the same candles as the provider itself.
+        """
+        return datetime.now(timezone.utc) - timedelta(days=from_days) if from_days > 0 else None
+
+    def day_stamps(self, figi: str, from_: Optional[datetime], to: datetime) -> Optional[dict[date, str]]:
+        """
+        Stamps of candles by days (UTC) in [from_, to) time range, a stamp is changed if candles of the day are changed.
+        None means provider can't make stamps without reading of candles, then derived data isn't checked by days.
+        """
+        return None
+
     @abc.abstractmethod
     def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
         pass
+
+    def provide_columns(self, figi: str, from_days: int) -> CandleColumns:
+        """
+        Provide all candles at once in columnar view.
+        Providers can override it if they are able to make columns faster than candle by candle.
+        """
+        return CandleColumns.from_candles(self.provide(figi, from_days))
+
+    def provide_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> Generator[InternalCandle, None, None]:
+        """
+        Provide candles in [from_, to) time range (to=None means up to now).
+        Default implementation provides all candles from the day of `from_` and filters them.
+        Providers can override it if they are able to seek to the time range.
+        """
+        from_days = (datetime.now(timezone.utc) - from_).days + 1
+
+        for candle in self.provide(figi, from_days):
+            if candle.time < from_:
+                continue
+            if to and candle.time >= to:
+                break
+
+            yield candle
+
+    def provide_columns_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> CandleColumns:
+        """Provide candles in [from_, to) time range at once in columnar view"""
+        return CandleColumns.from_candles(self.provide_range(figi, from_, to))
@@ -0,0 +1,14 @@
+import abc
+from typing import Generator
+
+from data_provider.base_data_provider import IDataProvider
+from data_provider.tick import Tick
+
+__all__ = ("ITickDataProvider")
+
+
+class ITickDataProvider(IDataProvider):
+    """Interface for data providers which are able to replay ticks (trades and last prices) in time order"""
+    @abc.abstractmethod
+    def provide_ticks(self, figi: str, from_days: int) -> Generator[Tick, None, None]:
+        pass
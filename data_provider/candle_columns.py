@@ -0,0 +1,201 @@
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Generator, Iterable, Optional
+
+import numpy as np
+
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import quotation_to_nano, nano_to_quotation
+
+__all__ = ("CandleColumns", "datetime_to_ns", "ns_to_datetime")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def datetime_to_ns(time: datetime) -> int:
+    """Convert datetime to nanoseconds from epoch (UTC). Naive datetime is treated as UTC"""
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=timezone.utc)
+
+    return (time - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=ns // 1000)
+
+
+class CandleColumns:
+    """
+    Columnar storage of candles.
+    Prices are int64 fixed-point values in nano units (like Quotation units and nano),
+    volume is int64 and time is datetime64[ns] (UTC).
+    Slicing by index returns views without copying of data.
+    """
+
+    def __init__(
+            self,
+            open_: np.ndarray,
+            high: np.ndarray,
+            low: np.ndarray,
+            close: np.ndarray,
+            volume: np.ndarray,
+            time: np.ndarray
+    ) -> None:
+        self.__open = open_
+        self.__high = high
+        self.__low = low
+        self.__close = close
+        self.__volume = volume
+        self.__time = time
+
+    @staticmethod
+    def empty() -> "CandleColumns":
+        return CandleColumns(
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype="datetime64[ns]")
+        )
+
+    @staticmethod
+    def from_candles(candles: Iterable[InternalCandle]) -> "CandleColumns":
+        """Build columns from candles stream. Temporary buffers are compact arrays, not python lists"""
+        open_, high, low, close, volume, time = \
+            array("q"), array("q"), array("q"), array("q"), array("q"), array("q")
+
+        for candle in candles:
+            open_.append(quotation_to_nano(candle.open))
+            high.append(quotation_to_nano(candle.high))
+            low.append(quotation_to_nano(candle.low))
+            close.append(quotation_to_nano(candle.close))
+            volume.append(candle.volume)
+            time.append(datetime_to_ns(candle.time))
+
+        return CandleColumns(
+            np.frombuffer(open_, dtype=np.int64),
+            np.frombuffer(high, dtype=np.int64),
+            np.frombuffer(low, dtype=np.int64),
+            np.frombuffer(close, dtype=np.int64),
+            np.frombuffer(volume, dtype=np.int64),
+            np.frombuffer(time, dtype=np.int64).view("datetime64[ns]")
+        )
+
+    @staticmethod
+    def concatenate(columns: list["CandleColumns"]) -> "CandleColumns":
+        if not columns:
+            return CandleColumns.empty()
+
+        if len(columns) == 1:
+            return columns[0]
+
+        return CandleColumns(
+            np.concatenate([x.open for x in columns]),
+            np.concatenate([x.high for x in columns]),
+            np.concatenate([x.low for x in columns]),
+            np.concatenate([x.close for x in columns]),
+            np.concatenate([x.volume for x in columns]),
+            np.concatenate([x.time for x in columns])
+        )
+
+    @staticmethod
+    def from_matrix(matrix: np.ndarray) -> "CandleColumns":
+        """Columns view of int64 matrix with columns: open, high, low, close, volume, time (see to_matrix)"""
+        return CandleColumns(
+            matrix[:, 0],
+            matrix[:, 1],
+            matrix[:, 2],
+            matrix[:, 3],
+            matrix[:, 4],
+            matrix[:, 5].view("datetime64[ns]")
+        )
+
+    def to_matrix(self) -> np.ndarray:
+        """
+        int64 matrix with columns: open, high, low, close (nano units), volume, time (ns).
+        Matrix is in column-major order, so every column is a contiguous array.
+        """
+        if not len(self):
+            return np.empty((0, 6), dtype=np.int64, order="F")
+
+        return np.asfortranarray(np.column_stack((
+            self.__open,
+            self.__high,
+            self.__low,
+            self.__close,
+            self.__volume,
+            self.__time.view(np.int64)
+        )), dtype=np.int64)
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.__open
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.__high
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.__low
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.__close
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.__volume
+
+    @property
+    def time(self) -> np.ndarray:
+        return self.__time
+
+    @property
+    def nbytes(self) -> int:
+        return self.__open.nbytes + self.__high.nbytes + self.__low.nbytes + self.__close.nbytes + \
+            self.__volume.nbytes + self.__time.nbytes
+
+    def __len__(self) -> int:
+        return len(self.__close)
+
+    def __getitem__(self, index: slice) -> "CandleColumns":
+        if not isinstance(index, slice):
+            raise TypeError("CandleColumns supports slices only. Use candle() method to get one candle.")
+
+        return CandleColumns(
+            self.__open[index],
+            self.__high[index],
+            self.__low[index],
+            self.__close[index],
+            self.__volume[index],
+            self.__time[index]
+        )
+
+    def __iter__(self) -> Generator[InternalCandle, None, None]:
+        for i in range(len(self)):
+            yield self.candle(i)
+
+    def candle(self, index: int) -> InternalCandle:
+        """Make InternalCandle view for strategies which work with candles one by one"""
+        return InternalCandle(
+            open=nano_to_quotation(int(self.__open[index])),
+            high=nano_to_quotation(int(self.__high[index])),
+            low=nano_to_quotation(int(self.__low[index])),
+            close=nano_to_quotation(int(self.__close[index])),
+            volume=int(self.__volume[index]),
+            time=ns_to_datetime(int(self.__time[index].astype(np.int64)))
+        )
+
+    def time_slice(self, from_: Optional[datetime] = None, to: Optional[datetime] = None) -> "CandleColumns":
+        """
+        Candles in [from_, to) time range. Time column is sorted, so binary search is used.
+        Result is a view on the same arrays.
+        """
+        start = 0 if from_ is None \
+            else int(np.searchsorted(self.__time, np.datetime64(datetime_to_ns(from_), "ns"), side="left"))
+        end = len(self) if to is None \
+            else int(np.searchsorted(self.__time, np.datetime64(datetime_to_ns(to), "ns"), side="left"))
+
+        return self[start:end]
@@ -0,0 +1,81 @@
+import logging
+from datetime import date, datetime
+from typing import Generator, Optional
+
+from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns
+from data_provider.internal_candle import InternalCandle
+
+__all__ = ("ColumnarDataProvider")
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarDataProvider(IDataProvider):
+    """
+    Data provider keeps candles from source provider in memory in columnar view (see CandleColumns).
+    Source provider is read once per figi, all next requests are served by slices of loaded columns.
+    """
+    def __init__(self, source: IDataProvider) -> None:
+        self.__source = source
+        # figi -> (from_days of loaded data, columns)
+        self.__columns: dict[str, tuple[int, CandleColumns]] = dict()
+
+    @property
+    def source_id(self) -> str:
+        return self.__source.source_id
+
+    def period_start(self, from_days: int) -> Optional[datetime]:
+        return self.__source.period_start(from_days)
+
+    def day_stamps(self, figi: str, from_: Optional[datetime], to: datetime) -> Optional[dict[date, str]]:
+        return self.__source.day_stamps(figi, from_, to)
+
+    def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
+        yield from self.provide_columns(figi, from_days)
+
+    def provide_columns(self, figi: str, from_days: int) -> CandleColumns:
+        loaded = self.__columns.get(figi)
+
+        if not loaded or not ColumnarDataProvider.__is_covered(loaded[0], from_days):
+            logger.info(f"Load columns from source provider: figi: {figi}, from_days: {from_days}")
+
+            columns = self.__source.provide_columns(figi, from_days)
+            self.__columns[figi] = (from_days, columns)
+
+            logger.info(f"Columns have been loaded: figi: {figi}, candles: {len(columns)}, bytes: {columns.nbytes}")
+
+            return columns
+
+        # the same period start as source provider, so every call gets the same candles
+        return loaded[1].time_slice(self.__source.period_start(from_days))
+
+    def provide_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> Generator[InternalCandle, None, None]:
+        yield from self.provide_columns_range(figi, from_, to)
+
+    def provide_columns_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> CandleColumns:
+        loaded = self.__columns.get(figi)
+
+        # loaded columns are sliced if they cover the range, otherwise the range isn't kept in memory
+        if loaded and (loaded[0] <= 0 or from_ >= self.__source.period_start(loaded[0])):
+            return loaded[1].time_slice(from_, to)
+
+        return self.__source.provide_columns_range(figi, from_, to)
+
+    @staticmethod
+    def __is_covered(loaded_from_days: int, from_days: int) -> bool:
+        # from_days <= 0 means all available history
+        if loaded_from_days <= 0:
+            return True
+
+        return 0 < from_days <= loaded_from_days
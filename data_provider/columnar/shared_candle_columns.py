@@ -0,0 +1,72 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from data_provider.candle_columns import CandleColumns
+
+__all__ = ("SharedCandleColumns")
+
+# open, high, low, close, volume, time
+_COLUMNS_COUNT = 6
+
+
+class SharedCandleColumns:
+    """
+    Candle columns in shared memory block. Child processes (like process pool workers) attach the block by name
+    and get CandleColumns without copying and pickling of candles.
+    The process which has published columns must close the block with unlink=True.
+    """
+
+    def __init__(self, shared_memory: SharedMemory, length: int) -> None:
+        self.__shared_memory = shared_memory
+        self.__length = length
+
+        matrix = np.ndarray((_COLUMNS_COUNT, length), dtype=np.int64, buffer=shared_memory.buf)
+        self.__columns = CandleColumns(
+            matrix[0], matrix[1], matrix[2], matrix[3], matrix[4], matrix[5].view("datetime64[ns]")
+        )
+
+    @staticmethod
+    def publish(columns: CandleColumns) -> "SharedCandleColumns":
+        """Copy columns to a new shared memory block"""
+        length = len(columns)
+        # shared memory block can't be empty
+        shared_memory = SharedMemory(create=True, size=max(1, _COLUMNS_COUNT * length * 8))
+
+        shared = SharedCandleColumns(shared_memory, length)
+        for target, source in zip(
+                (shared.columns.open, shared.columns.high, shared.columns.low,
+                 shared.columns.close, shared.columns.volume),
+                (columns.open, columns.high, columns.low, columns.close, columns.volume)
+        ):
+            target[:] = source
+        shared.columns.time[:] = columns.time
+
+        return shared
+
+    @staticmethod
+    def attach(name: str, length: int) -> "SharedCandleColumns":
+        """Attach block which has been published by another process"""
+        shared_memory = SharedMemory(name=name)
+
+        return SharedCandleColumns(shared_memory, length)
+
+    @property
+    def name(self) -> str:
+        return self.__shared_memory.name
+
+    @property
+    def length(self) -> int:
+        return self.__length
+
+    @property
+    def columns(self) -> CandleColumns:
+        return self.__columns
+
+    def close(self, unlink: bool = False) -> None:
+        # numpy views must be released before the block is closed
+        self.__columns = CandleColumns.empty()
+        self.__shared_memory.close()
+
+        if unlink:
+            self.__shared_memory.unlink()
@@ -2,6 +2,7 @@ from typing import Optional
 
 from data_provider.base_data_provider import IDataProvider
 from data_provider.tinkoff_downloaded.tinkoff_downloaded import TinkoffDownloaded
+from data_provider.tinkoff_downloaded.tinkoff_ticks import TinkoffTicks
 from data_provider.tinkoff_historic.tinkoff_historic import TinkoffHistoric
 
 __all__ = ("DataProviderFactory")
@@ -18,5 +19,7 @@ class DataProviderFactory:
                 return TinkoffHistoric(*args, **kwargs)
             case "TinkoffDownloaded":
                 return TinkoffDownloaded(*args, **kwargs)
+            case "TinkoffTicks":
+                return TinkoffTicks(*args, **kwargs)
             case _:
                 return None
@@ -0,0 +1,16 @@
+from typing import NamedTuple
+
+__all__ = ("Tick")
+
+
+class Tick(NamedTuple):
+    """
+    Compact price change from trade or last price stream.
+    Ticks are compared by time first, so sorted streams of ticks are merged by heapq.merge without key.
+    """
+    # nanoseconds from epoch (UTC)
+    time_ns: int
+    # fixed-point price in nano units
+    price: int
+    # lots of trade, 0 for last price
+    quantity: int
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from typing import Optional
+
+from data_provider.candle_columns import ns_to_datetime
+from data_provider.internal_candle import InternalCandle
+from data_provider.tick import Tick
+from invest_api.utils import nano_to_quotation
+
+__all__ = ("TickCandleBuilder")
+
+
+class TickCandleBuilder:
+    """
+    Builds candles of fixed interval from stream of ticks on the fly.
+    Candle is completed by the first tick of the next interval. Candle time is the start of its interval.
+    Volume is sum of trades quantity (last prices have no volume).
+    """
+
+    def __init__(self, interval: timedelta = timedelta(minutes=1)) -> None:
+        self.__interval_ns = interval // timedelta(microseconds=1) * 1000
+        self.__start_ns = -1
+        self.__open = self.__high = self.__low = self.__close = 0
+        self.__volume = 0
+
+    def add(self, tick: Tick) -> Optional[InternalCandle]:
+        """Add tick to current candle. Returns the previous candle if the tick starts a new interval"""
+        start_ns = tick.time_ns - tick.time_ns % self.__interval_ns
+
+        if start_ns == self.__start_ns:
+            if tick.price > self.__high:
+                self.__high = tick.price
+            elif tick.price < self.__low:
+                self.__low = tick.price
+            self.__close = tick.price
+            self.__volume += tick.quantity
+
+            return None
+
+        completed = self.flush()
+
+        self.__start_ns = start_ns
+        self.__open = self.__high = self.__low = self.__close = tick.price
+        self.__volume = tick.quantity
+
+        return completed
+
+    def flush(self) -> Optional[InternalCandle]:
+        """Complete current candle (at the end of stream)"""
+        if self.__start_ns < 0:
+            return None
+
+        candle = InternalCandle(
+            open=nano_to_quotation(self.__open),
+            high=nano_to_quotation(self.__high),
+            low=nano_to_quotation(self.__low),
+            close=nano_to_quotation(self.__close),
+            volume=self.__volume,
+            time=ns_to_datetime(self.__start_ns)
+        )
+        self.__start_ns = -1
+
+        return candle
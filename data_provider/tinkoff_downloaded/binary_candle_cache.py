@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from data_provider.candle_columns import CandleColumns
+
+__all__ = ("BinaryCandleCache")
+
+logger = logging.getLogger(__name__)
+
+
+class BinaryCandleCache:
+    """
+    Binary sidecar cache for csv files with candles.
+    Every csv file is converted once to `.npy` file near the source:
+        market_data.csv -> market_data.npy (+ market_data.npy.meta)
+    The npy file keeps int64 matrix with columns: open, high, low, close (nano units), volume, time (ns).
+    The matrix is stored in column-major order, so every column is a contiguous array.
+    Cache is invalidated by size and modification time of the source file.
+    Valid cache is memory-mapped instead of parsing csv again.
+    """
+    __CACHE_SUFFIX = ".npy"
+    __META_SUFFIX = ".npy.meta"
+
+    __COLUMNS_COUNT = 6
+
+    def load(
+            self,
+            source_file: str,
+            parse_source: Callable[[str], CandleColumns]
+    ) -> CandleColumns:
+        """
+        Return candles from cache for the source file.
+        If cache is absent or invalid, the source file is parsed by `parse_source` and cache is rebuilt.
+        """
+        cache_file, meta_file = self.__cache_files(source_file)
+        source_stat = os.stat(source_file)
+
+        matrix = self.__read_cache(cache_file, meta_file, source_stat)
+        if matrix is not None:
+            return CandleColumns.from_matrix(matrix)
+
+        logger.debug("Build binary cache for %s", source_file)
+
+        columns = parse_source(source_file)
+        self.__write_cache(cache_file, meta_file, source_stat, columns)
+
+        return columns
+
+    def __cache_files(self, source_file: str) -> tuple[str, str]:
+        stem = str(Path(source_file).with_suffix(""))
+        return stem + self.__CACHE_SUFFIX, stem + self.__META_SUFFIX
+
+    @staticmethod
+    def __source_meta(source_stat: os.stat_result) -> dict:
+        return {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns}
+
+    def __read_cache(
+            self,
+            cache_file: str,
+            meta_file: str,
+            source_stat: os.stat_result
+    ) -> Optional[np.ndarray]:
+        try:
+            with open(meta_file, encoding="UTF8") as file:
+                meta = json.load(file)
+
+            if meta != BinaryCandleCache.__source_meta(source_stat):
+                logger.debug("Binary cache is outdated: %s", cache_file)
+                return None
+
+            matrix = np.load(cache_file, mmap_mode="r")
+
+            if matrix.ndim != 2 or matrix.shape[1] != self.__COLUMNS_COUNT:
+                logger.info(f"Binary cache has wrong format and will be rebuilt: {cache_file}")
+                return None
+
+            return matrix
+
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.info(f"Binary cache read error {cache_file}. Cache will be rebuilt: {repr(ex)}")
+            return None
+
+    @staticmethod
+    def __write_cache(
+            cache_file: str,
+            meta_file: str,
+            source_stat: os.stat_result,
+            columns: CandleColumns
+    ) -> None:
+        try:
+            # write to temporary files and rename them to avoid broken cache if process is interrupted.
+            # meta is written last, so cache is valid only when both files are ready.
+            tmp_cache_file = cache_file + ".tmp"
+            with open(tmp_cache_file, "wb") as file:
+                np.save(file, columns.to_matrix())
+            os.replace(tmp_cache_file, cache_file)
+
+            tmp_meta_file = meta_file + ".tmp"
+            with open(tmp_meta_file, "w", encoding="UTF8") as file:
+                json.dump(BinaryCandleCache.__source_meta(source_stat), file)
+            os.replace(tmp_meta_file, meta_file)
+
+        except Exception as ex:
+            # read-only storage etc. Data is still returned from parsed source.
+            logger.error(f"Binary cache write error {cache_file}: {repr(ex)}")
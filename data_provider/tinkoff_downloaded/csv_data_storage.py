@@ -1,14 +1,25 @@
 import csv
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
+import io
 import logging
+import os
+import threading
 from decimal import Decimal
 from pathlib import Path
-from typing import Generator
+from typing import Generator, Optional
 
-from tinkoff.invest import Candle, Trade, LastPrice, TradeDirection
-from tinkoff.invest.utils import decimal_to_quotation
+import numpy as np
+from tinkoff.invest import Candle, HistoricCandle, Trade, LastPrice, TradeDirection
+from tinkoff.invest.utils import decimal_to_quotation, quotation_to_decimal
 
-__all__ = ("CSVDataStorageReader")
+from data_provider.candle_columns import CandleColumns, ns_to_datetime
+from data_provider.tick import Tick
+from data_provider.tinkoff_downloaded.binary_candle_cache import BinaryCandleCache
+from data_provider.tinkoff_downloaded.csv_parsers import parse_nano, parse_time, parse_times_ns
+from data_provider.tinkoff_downloaded.day_manifest import DayManifest, ManifestDay
+from invest_api.utils import nano_to_quotation
+
+__all__ = ("CSVDataStorageReader", "CSVDataStorageWriter")
 
 logger = logging.getLogger(__name__)
 
@@ -20,28 +31,78 @@ class CSVDataStorageReader:
     __TRADE_TYPE_FOLDER = "trade"
     __LAST_PRICE_TYPE_FOLDER = "last_price"
 
-    def __init__(self, root_path: str) -> None:
+    def __init__(self, root_path: str, binary_cache: bool = False) -> None:
         self.__root_path = root_path
+        self.__binary_cache = BinaryCandleCache() if binary_cache else None
+        # type folder -> manifest of day files
+        self.__manifests: dict[Path, DayManifest] = dict()
+        self.__manifests_lock = threading.Lock()
 
         if not self.__root_path:
             logger.error(f"Storage reader init failed: root path is empty!")
 
             raise Exception(f"CSVDataStorageReader: root path is empty!")
 
-    def read_candles(self, figi: str, from_days: int) -> Generator[Candle, None, None]:
+    def read_candles(
+            self,
+            figi: str,
+            from_days: int,
+            type_folder: Optional[str] = None
+    ) -> Generator[Candle, None, None]:
         """
         Headers in candle csv file:
         open, close, high, low, volume, time
+        type_folder - folder with candles of other interval, 1 minute candles folder by default
         """
 
         logger.info(f"Start read candles from root folder:{self.__root_path}, figi:{figi}, from_days:{from_days}")
 
+        yield from self.read_candles_range(figi, CSVDataStorageReader.from_days_time(from_days), None, type_folder)
+
+    def read_candles_range(
+            self,
+            figi: str,
+            from_: Optional[datetime],
+            to: Optional[datetime],
+            type_folder: Optional[str] = None
+    ) -> Generator[Candle, None, None]:
+        """
+        Candles in [from_, to) time range (None means unbounded).
+        Days are selected by manifest, the first day file is read from the hour of `from_` and
+        reading stops at `to`.
+        """
+        if self.__binary_cache:
+            try:
+                for columns in self.__read_candle_days(figi, type_folder, from_, to):
+                    for i in range(len(columns)):
+                        yield Candle(
+                            figi=figi,
+                            open=nano_to_quotation(int(columns.open[i])),
+                            high=nano_to_quotation(int(columns.high[i])),
+                            low=nano_to_quotation(int(columns.low[i])),
+                            close=nano_to_quotation(int(columns.close[i])),
+                            volume=int(columns.volume[i]),
+                            time=ns_to_datetime(int(columns.time[i].astype(np.int64)))
+                        )
+            except Exception as ex:
+                logger.error(f"Error while read candle data from files: {repr(ex)}")
+
+            return
+
         try:
             for row in self.__read_market_files(
                     figi,
-                    self.__CANDLE_TYPE_FOLDER,
-                    from_days
+                    type_folder or self.__CANDLE_TYPE_FOLDER,
+                    from_,
+                    to
             ):
+                time = parse_time(row[5])
+
+                if from_ and time < from_:
+                    continue
+                if to and time >= to:
+                    break
+
                 yield Candle(
                     figi=figi,
                     open=decimal_to_quotation(Decimal(row[0])),
@@ -49,11 +110,57 @@ class CSVDataStorageReader:
                     low=decimal_to_quotation(Decimal(row[3])),
                     close=decimal_to_quotation(Decimal(row[1])),
                     volume=int(row[4]),
-                    time=datetime.strptime(row[5], '%Y-%m-%d %H:%M:%S%z')  # 2022-09-02 07:34:00+00:00
+                    time=time
                 )
         except Exception as ex:
             logger.error(f"Error while read candle data from files: {repr(ex)}")
 
+    def read_candle_days(
+            self,
+            figi: str,
+            from_days: int,
+            type_folder: Optional[str] = None
+    ) -> Generator[CandleColumns, None, None]:
+        """
+        Read candles in columnar view, one CandleColumns per day file.
+        Binary cache (if it is enabled) is used instead of csv parsing.
+        """
+        yield from self.__read_candle_days(figi, type_folder, CSVDataStorageReader.from_days_time(from_days), None)
+
+    def read_candle_columns(self, figi: str, from_days: int) -> CandleColumns:
+        logger.info(f"Start read candle columns from root folder:{self.__root_path}, figi:{figi}, "
+                    f"from_days:{from_days}")
+
+        return CandleColumns.concatenate(list(self.read_candle_days(figi, from_days)))
+
+    def read_candle_columns_range(
+            self,
+            figi: str,
+            from_: Optional[datetime],
+            to: Optional[datetime]
+    ) -> CandleColumns:
+        """Candles in [from_, to) time range in columnar view"""
+        logger.info(f"Start read candle columns from root folder:{self.__root_path}, figi:{figi}, "
+                    f"from:{from_}, to:{to}")
+
+        return CandleColumns.concatenate(list(self.__read_candle_days(figi, None, from_, to)))
+
+    def read_candle_day_stamps(
+            self,
+            figi: str,
+            from_: Optional[datetime],
+            to: datetime
+    ) -> dict[date, str]:
+        """
+        Stamps of 1 minute candle day files in [from_, to) time range by manifest (files aren't read):
+        count of rows, size and modification time of file
+        """
+        return {
+            manifest_day.day: f"{manifest_day.rows}:{manifest_day.size}:{manifest_day.mtime_ns}"
+            for _, manifest_day in self.__get_market_data_files(figi, self.__CANDLE_TYPE_FOLDER, from_, to)
+            if datetime.combine(manifest_day.day, datetime.min.time(), tzinfo=timezone.utc) < to
+        }
+
     def read_trade(self, figi: str, from_days: int) -> Generator[Trade, None, None]:
         """
         Headers in trade csv file:
@@ -66,14 +173,15 @@ class CSVDataStorageReader:
             for row in self.__read_market_files(
                     figi,
                     self.__TRADE_TYPE_FOLDER,
-                    from_days
+                    CSVDataStorageReader.from_days_time(from_days),
+                    None
             ):
                 yield Trade(
                     figi=figi,
                     direction=TradeDirection(int(row[0])),
                     price=decimal_to_quotation(Decimal(row[1])),
                     quantity=int(row[2]),
-                    time=datetime.strptime(row[3], '%Y-%m-%d %H:%M:%S%z')  # 2022-09-02 07:34:00+00:00
+                    time=parse_time(row[3])
                 )
         except Exception as ex:
             logger.error(f"Error while read trade data from files: {repr(ex)}")
@@ -90,73 +198,246 @@ class CSVDataStorageReader:
             for row in self.__read_market_files(
                     figi,
                     self.__LAST_PRICE_TYPE_FOLDER,
-                    from_days
+                    CSVDataStorageReader.from_days_time(from_days),
+                    None
             ):
                 yield LastPrice(
                     figi=figi,
                     price=decimal_to_quotation(Decimal(row[0])),
-                    time=datetime.strptime(row[1], '%Y-%m-%d %H:%M:%S%z')  # 2022-09-02 07:34:00+00:00
+                    time=parse_time(row[1])
                 )
         except Exception as ex:
             logger.error(f"Error while read last price data from files: {repr(ex)}")
 
-    def __read_market_files(self, figi: str, type_folder: str, from_days: int) -> Generator[str, None, None]:
-        for data_file_path in self.__get_market_data_file_paths(
+    def read_trade_ticks(self, figi: str, from_days: int) -> Generator[Tick, None, None]:
+        """
+        Trades as compact ticks (time, price, quantity) in time order.
+        Every day file is parsed at once, so only one day of trades is kept in memory.
+        """
+        logger.info(f"Start read trade ticks from root folder:{self.__root_path}, figi:{figi}, from_days:{from_days}")
+
+        for rows in self.__read_market_days(figi, self.__TRADE_TYPE_FOLDER, from_days):
+            times = parse_times_ns([row[3] for row in rows]).tolist()
+
+            for row, time_ns in zip(rows, times):
+                yield Tick(time_ns, parse_nano(row[1]), int(row[2]))
+
+    def read_last_price_ticks(self, figi: str, from_days: int) -> Generator[Tick, None, None]:
+        """Last prices as compact ticks (time, price, 0) in time order"""
+        logger.info(f"Start read last price ticks from root folder:{self.__root_path}, figi:{figi}, "
+                    f"from_days:{from_days}")
+
+        for rows in self.__read_market_days(figi, self.__LAST_PRICE_TYPE_FOLDER, from_days):
+            times = parse_times_ns([row[1] for row in rows]).tolist()
+
+            for row, time_ns in zip(rows, times):
+                yield Tick(time_ns, parse_nano(row[0]), 0)
+
+    def __read_market_days(self, figi: str, type_folder: str, from_days: int) -> Generator[list[list[str]], None, None]:
+        for data_file_path, _ in self.__get_market_data_files(
                 figi,
                 type_folder,
-                from_days
+                CSVDataStorageReader.from_days_time(from_days),
+                None
+        ):
+            try:
+                rows = list(CSVDataStorageReader.__read_data_file(data_file_path))
+            except Exception as ex:
+                logger.error(f"Error while read data from file {data_file_path}. "
+                             f"File has been skipped: {repr(ex)}")
+                continue
+
+            yield rows
+
+    def __read_candle_days(
+            self,
+            figi: str,
+            type_folder: Optional[str],
+            from_: Optional[datetime],
+            to: Optional[datetime]
+    ) -> Generator[CandleColumns, None, None]:
+        for data_file_path, _ in self.__get_market_data_files(
+                figi,
+                type_folder or self.__CANDLE_TYPE_FOLDER,
+                from_,
+                to
         ):
             try:
-                for row in CSVDataStorageReader.__read_data_file(data_file_path):
+                if self.__binary_cache:
+                    columns = self.__binary_cache.load(data_file_path, CSVDataStorageReader.__parse_candle_file)
+                else:
+                    columns = CSVDataStorageReader.__parse_candle_file(data_file_path)
+
+                # only the first and the last days are cut actually
+                yield columns.time_slice(from_, to)
+            except Exception as ex:
+                logger.error(f"Error while read data from file {data_file_path}. "
+                             f"File has been skipped: {repr(ex)}")
+
+    def __read_market_files(
+            self,
+            figi: str,
+            type_folder: str,
+            from_: Optional[datetime],
+            to: Optional[datetime]
+    ) -> Generator[list[str], None, None]:
+        for data_file_path, manifest_day in self.__get_market_data_files(
+                figi,
+                type_folder,
+                from_,
+                to
+        ):
+            try:
+                # the first day is read from the hour of from_ time
+                offset = manifest_day.offset(from_) if from_ else 0
+
+                for row in CSVDataStorageReader.__read_data_file(data_file_path, offset):
                     yield row
             except Exception as ex:
                 logger.error(f"Error while read data from file {data_file_path}. "
                              f"File has been skipped: {repr(ex)}")
 
-    def __get_market_data_file_paths(self, figi: str, type_folder: str, from_days: int) -> Generator[str, None, None]:
+    def __get_market_data_files(
+            self,
+            figi: str,
+            type_folder: str,
+            from_: Optional[datetime],
+            to: Optional[datetime]
+    ) -> list[tuple[str, ManifestDay]]:
         """
         Folder Structure is:
         root_path
             figi
                 type_folder
+                    manifest.json
                     year
                         month
                             day
                                 {__FILE_NAME}
+        Day files are selected by manifest (see DayManifest) instead of directories scanning.
         """
 
         # check root_path
         root_dir = Path(self.__root_path, figi, type_folder)
 
-        if root_dir.exists():
-            from_ = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(days=from_days) \
-                if from_days > 0 else datetime.min
+        if not root_dir.exists():
+            logger.info(f"Root directory doesn't exist: {root_dir}.")
+            return []
 
-            for year_dir in sorted(root_dir.iterdir(), key=lambda x: int(str(x.name))):
-                if from_.year > int(str(year_dir.name)):
-                    continue
+        with self.__manifests_lock:
+            manifest = self.__manifests.get(root_dir)
+            if not manifest:
+                manifest = self.__manifests[root_dir] = DayManifest(root_dir, self.__FILE_NAME)
 
-                for month_dir in sorted(year_dir.iterdir(), key=lambda x: int(str(x.name))):
-                    if from_.year == int(str(year_dir.name)) and from_.month > int(str(month_dir.name)):
-                        continue
+            manifest.refresh()
 
-                    for day_dir in sorted(month_dir.iterdir(), key=lambda x: int(str(x.name))):
-                        if from_.year == int(str(year_dir.name)) and \
-                                from_.month == int(str(month_dir.name)) and from_.day > int(str(day_dir.name)):
-                            continue
+            return [(manifest.day_file_path(x.day), x) for x in manifest.select(from_, to)]
 
-                        yield str(Path(day_dir, self.__FILE_NAME))
-        else:
-            logger.info(f"Root directory doesn't exist: {root_dir}.")
+    @staticmethod
+    def from_days_time(from_days: int) -> Optional[datetime]:
+        """Start of the first day (UTC) of from_days period. None means all history"""
+        if from_days <= 0:
+            return None
+
+        from_day = (datetime.utcnow() - timedelta(days=from_days)).date()
+        return datetime.combine(from_day, datetime.min.time(), tzinfo=timezone.utc)
+
+    @staticmethod
+    def __parse_candle_file(file_name: str) -> CandleColumns:
+        """Columns are parsed directly into nano prices and int64 time, without Candle and datetime per row"""
+        rows = list(CSVDataStorageReader.__read_data_file(file_name))
+
+        if not rows:
+            return CandleColumns.empty()
+
+        def price_column(index: int) -> np.ndarray:
+            return np.fromiter((parse_nano(row[index]) for row in rows), dtype=np.int64, count=len(rows))
+
+        return CandleColumns(
+            price_column(0),
+            price_column(2),
+            price_column(3),
+            price_column(1),
+            np.fromiter((int(row[4]) for row in rows), dtype=np.int64, count=len(rows)),
+            parse_times_ns([row[5] for row in rows]).view("datetime64[ns]")
+        )
 
     @staticmethod
-    def __read_data_file(file_name: str) -> Generator[list[str], None, None]:
-        logger.debug(f"Read file: {file_name}")
+    def __read_data_file(file_name: str, offset: int = 0) -> Generator[list[str], None, None]:
+        logger.debug("Read file: %s, offset: %s", file_name, offset)
+
+        with open(file_name, "rb") as binary_file:
+            binary_file.seek(offset)
+            csv_reader = csv.reader(io.TextIOWrapper(binary_file, encoding='UTF8', newline=""))
 
-        with open(file_name, encoding='UTF8', newline="") as file:
-            csv_reader = csv.reader(file)
+            if not logger.isEnabledFor(logging.DEBUG):
+                # every row is logged in debug mode only, the check is done once per file
+                yield from csv_reader
+                return
 
             for row in csv_reader:
-                logger.debug(f"Read row: {row}")
+                logger.debug("Read row: %s", row)
 
                 yield row
+
+
+class CSVDataStorageWriter:
+    """
+    Writes candles in the same folder structure and csv format as CSVDataStorageReader reads.
+    Every day file is written once at whole. Temporary file is used to avoid broken files.
+    Written day is added to manifest of the type folder (if manifest has been built already).
+    """
+    __FILE_NAME = "market_data.csv"
+
+    def __init__(self, root_path: str) -> None:
+        self.__root_path = root_path
+        # type folder -> manifest of day files
+        self.__manifests: dict[Path, DayManifest] = dict()
+        self.__manifests_lock = threading.Lock()
+
+        if not self.__root_path:
+            logger.error(f"Storage writer init failed: root path is empty!")
+
+            raise Exception(f"CSVDataStorageWriter: root path is empty!")
+
+    def day_file_path(self, figi: str, type_folder: str, day: date) -> str:
+        return str(Path(self.__root_path, figi, type_folder, str(day.year), str(day.month), str(day.day),
+                        self.__FILE_NAME))
+
+    def is_day_exist(self, figi: str, type_folder: str, day: date) -> bool:
+        return os.path.exists(self.day_file_path(figi, type_folder, day))
+
+    def write_candles(self, figi: str, type_folder: str, day: date, candles: list[Candle | HistoricCandle]) -> None:
+        """
+        Headers in candle csv file:
+        open, close, high, low, volume, time
+        Empty list makes empty file. It means no candles for the day.
+        """
+        file_name = self.day_file_path(figi, type_folder, day)
+        logger.debug("Write %s candles to file: %s", len(candles), file_name)
+
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+
+        tmp_file_name = file_name + ".tmp"
+        with open(tmp_file_name, "w", encoding='UTF8', newline="") as file:
+            csv_writer = csv.writer(file)
+
+            for candle in candles:
+                csv_writer.writerow([
+                    format(quotation_to_decimal(candle.open), "f"),
+                    format(quotation_to_decimal(candle.close), "f"),
+                    format(quotation_to_decimal(candle.high), "f"),
+                    format(quotation_to_decimal(candle.low), "f"),
+                    candle.volume,
+                    candle.time.astimezone(timezone.utc).replace(microsecond=0).isoformat(sep=" ")
+                ])
+
+        os.replace(tmp_file_name, file_name)
+
+        type_dir = Path(self.__root_path, figi, type_folder)
+        with self.__manifests_lock:
+            manifest = self.__manifests.get(type_dir)
+            if not manifest:
+                manifest = self.__manifests[type_dir] = DayManifest(type_dir, self.__FILE_NAME)
+
+            manifest.add_day(day)
@@ -0,0 +1,82 @@
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+from tinkoff.invest.utils import decimal_to_quotation
+
+from data_provider.candle_columns import datetime_to_ns
+from invest_api.utils import NANO_IN_UNIT, quotation_to_nano
+
+__all__ = ("parse_time", "parse_times_ns", "parse_nano")
+
+# 2022-09-02 07:34:00+00:00
+_TIME_LENGTH = 25
+_TIME_SEPARATORS = {4: ord("-"), 7: ord("-"), 10: ord(" "), 13: ord(":"), 16: ord(":"), 22: ord(":")}
+_NANO_DIGITS = 9
+
+
+def parse_time(value: str) -> datetime:
+    """Parse time of market data files (2022-09-02 07:34:00+00:00). It's much faster than strptime"""
+    return datetime.fromisoformat(value)
+
+
+def parse_times_ns(values: list[str]) -> np.ndarray:
+    """
+    Parse time column of market data file into int64 nanoseconds from epoch (UTC) by one vectorized step.
+    Values of other layout are parsed one by one.
+    """
+    if not values:
+        return np.empty(0, dtype=np.int64)
+
+    # longer values would be cut by fixed width array
+    if any(len(x) != _TIME_LENGTH for x in values):
+        return _parse_times_ns_by_one(values)
+
+    matrix = np.array(values, dtype=f"S{_TIME_LENGTH}").view(np.uint8).reshape(-1, _TIME_LENGTH)
+
+    signs = matrix[:, 19]
+    if any((matrix[:, i] != char).any() for i, char in _TIME_SEPARATORS.items()) or \
+            ((signs != ord("+")) & (signs != ord("-"))).any():
+        return _parse_times_ns_by_one(values)
+
+    digits = matrix.astype(np.int64) - ord("0")
+
+    def number(start: int, end: int) -> np.ndarray:
+        result = digits[:, start]
+        for i in range(start + 1, end):
+            result = result * 10 + digits[:, i]
+        return result
+
+    year, month, day = number(0, 4), number(5, 7), number(8, 10)
+    seconds = number(11, 13) * 3600 + number(14, 16) * 60 + number(17, 19)
+    offset = np.where(signs == ord("-"), -1, 1) * (number(20, 22) * 3600 + number(23, 25) * 60)
+
+    return ((_days_from_civil(year, month, day) * 86400 + seconds - offset) * NANO_IN_UNIT).astype(np.int64)
+
+
+def parse_nano(value: str) -> int:
+    """Parse decimal price into fixed-point integer in nano units without Decimal"""
+    units, _, fraction = value.partition(".")
+
+    if (fraction and not fraction.isdigit()) or len(fraction) > _NANO_DIGITS or not units.lstrip("-").isdigit():
+        # exponent, too long fraction etc.
+        return quotation_to_nano(decimal_to_quotation(Decimal(value)))
+
+    nano = int(units.lstrip("-")) * NANO_IN_UNIT + int(fraction.ljust(_NANO_DIGITS, "0"))
+
+    return -nano if units.startswith("-") else nano
+
+
+def _parse_times_ns_by_one(values: list[str]) -> np.ndarray:
+    return np.array([datetime_to_ns(parse_time(x)) for x in values], dtype=np.int64)
+
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Days from epoch for proleptic Gregorian dates (H. Hinnant's algorithm)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+
+    return era * 146097 + day_of_era - 719468
@@ -0,0 +1,329 @@
+import json
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from data_provider.tinkoff_downloaded.csv_parsers import parse_time
+
+__all__ = ("DayManifest", "ManifestDay")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False, repr=True)
+class ManifestDay:
+    day: date
+    rows: int = 0
+    first_time: Optional[datetime] = None
+    last_time: Optional[datetime] = None
+    # size and modification time of day file when it was indexed
+    size: int = 0
+    mtime_ns: int = 0
+    # byte offset of the first row of every hour (UTC) in day file
+    hour_offsets: dict[int, int] = field(default_factory=dict)
+
+    def offset(self, from_: datetime) -> int:
+        """Byte offset of the first row which can be at `from_` time or later"""
+        from_ = from_.astimezone(timezone.utc)
+        if self.first_time is None or from_.date() != self.day:
+            return 0
+
+        for hour in range(from_.hour, 24):
+            if hour in self.hour_offsets:
+                return self.hour_offsets[hour]
+
+        # all rows are earlier
+        return self.size
+
+
+class DayManifest:
+    """
+    Index of day files in type folder (figi/type_folder/year/month/day/market_data.csv).
+    It's persisted as manifest.json in type folder, so directories are scanned once only.
+    For every day it keeps count of rows, the first and the last time and byte offsets of hours.
+    Manifest is updated incrementally:
+    - modification times of year and month folders are kept, only changed month folders are listed for new days
+    (a day folder added before the last indexed day is found too), it costs one stat per year and month folder;
+    - selected days are reindexed if their files have been changed (market data collector appends rows
+    to the current day, earlier days can be backfilled or collected again) and removed if their files
+    have been deleted, it costs one stat per selected day.
+    Days written by CSVDataStorageWriter are added to manifest by the writer itself.
+    The time is the last column in all market data files.
+    """
+    __MANIFEST_FILE = "manifest.json"
+    __VERSION = 1
+
+    def __init__(self, type_dir: Path, data_file_name: str) -> None:
+        self.__type_dir = type_dir
+        self.__data_file_name = data_file_name
+        self.__manifest_file = str(Path(type_dir, self.__MANIFEST_FILE))
+        self.__days: list[ManifestDay] = []
+        # sorted days for binary search
+        self.__keys: list[date] = []
+        # modification time of manifest file which has been loaded or saved by this instance
+        self.__manifest_mtime_ns: Optional[int] = None
+        # year or month folder ("2022" or "2022/9") -> modification time when it was listed
+        self.__dir_mtimes: dict[str, int] = dict()
+
+    @property
+    def days(self) -> list[ManifestDay]:
+        return self.__days
+
+    def refresh(self) -> "DayManifest":
+        """Load persisted manifest and update it by changes in folder"""
+        self.__sync()
+
+        dir_mtimes = dict(self.__dir_mtimes)
+
+        new_days = self.__scan_days()
+        for day in new_days:
+            self.__set_day(self.__index_day(day))
+
+        if new_days or dir_mtimes != self.__dir_mtimes:
+            self.__save()
+
+        return self
+
+    def select(self, from_: Optional[datetime] = None, to: Optional[datetime] = None) -> list[ManifestDay]:
+        """
+        Not empty days which can have rows in [from_, to] time range (by dates of bounds).
+        Days with changed files are reindexed before selection.
+        """
+        start = bisect_left(self.__keys, from_.astimezone(timezone.utc).date()) if from_ else 0
+        end = bisect_right(self.__keys, to.astimezone(timezone.utc).date()) if to else len(self.__keys)
+
+        changed = False
+        removed: list[ManifestDay] = []
+        for index in range(start, end):
+            try:
+                if self.__is_changed(self.__days[index]):
+                    self.__days[index] = self.__index_day(self.__days[index].day)
+                    changed = True
+            except FileNotFoundError:
+                removed.append(self.__days[index])
+
+        selected = [x for x in self.__days[start:end] if x.rows and x not in removed]
+
+        for manifest_day in removed:
+            index = self.__days.index(manifest_day)
+            del self.__days[index]
+            del self.__keys[index]
+
+        if changed or removed:
+            self.__save()
+
+        return selected
+
+    def add_day(self, day: date) -> None:
+        """
+        Index written day file and save manifest.
+        Nothing is done if manifest hasn't been built yet, it will be built with all days by the first reading.
+        """
+        if not self.__sync():
+            return
+
+        self.__set_day(self.__index_day(day))
+        self.__save()
+
+    def day_file_path(self, day: date) -> str:
+        return str(Path(self.__type_dir, str(day.year), str(day.month), str(day.day), self.__data_file_name))
+
+    def __set_day(self, manifest_day: ManifestDay) -> None:
+        index = bisect_left(self.__keys, manifest_day.day)
+
+        if index < len(self.__keys) and self.__keys[index] == manifest_day.day:
+            self.__days[index] = manifest_day
+        else:
+            self.__days.insert(index, manifest_day)
+            self.__keys.insert(index, manifest_day.day)
+
+    def __has_day(self, day: date) -> bool:
+        index = bisect_left(self.__keys, day)
+
+        return index < len(self.__keys) and self.__keys[index] == day
+
+    def __is_changed(self, manifest_day: ManifestDay) -> bool:
+        """Raises FileNotFoundError if day file has been removed"""
+        stat = os.stat(self.day_file_path(manifest_day.day))
+
+        return stat.st_size != manifest_day.size or stat.st_mtime_ns != manifest_day.mtime_ns
+
+    def __scan_days(self) -> list[date]:
+        """
+        New days with data file. Month folder is listed if its modification time has been changed
+        (a day folder has been added or removed). Year folder is listed if it has been changed,
+        otherwise months are known from the previous listing.
+        """
+        days: list[date] = []
+
+        for year in DayManifest.__numeric_dirs(self.__type_dir):
+            year_dir = Path(self.__type_dir, str(year))
+
+            if self.__update_dir_mtime(str(year), year_dir):
+                months = DayManifest.__numeric_dirs(year_dir)
+                # removed month folders are forgotten
+                for key in [x for x in self.__dir_mtimes if x.startswith(f"{year}/")]:
+                    if int(key.split("/")[1]) not in months:
+                        del self.__dir_mtimes[key]
+            else:
+                months = [int(x.split("/")[1]) for x in self.__dir_mtimes if x.startswith(f"{year}/")]
+
+            for month in months:
+                month_dir = Path(year_dir, str(month))
+                if not self.__update_dir_mtime(f"{year}/{month}", month_dir):
+                    continue
+
+                for day in DayManifest.__numeric_dirs(month_dir):
+                    current = date(year, month, day)
+
+                    if self.__has_day(current):
+                        continue
+
+                    if os.path.exists(self.day_file_path(current)):
+                        days.append(current)
+                    else:
+                        # data file of the day hasn't been written yet, the month is listed again next time
+                        self.__dir_mtimes[f"{year}/{month}"] = 0
+
+        return days
+
+    def __update_dir_mtime(self, key: str, path: Path) -> bool:
+        """
+        Keep modification time of folder, returns True if it has been changed since the previous listing.
+        Time is taken before listing, so changes made during listing are found next time.
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self.__dir_mtimes.pop(key, None)
+            return False
+
+        if self.__dir_mtimes.get(key) == mtime_ns:
+            return False
+
+        self.__dir_mtimes[key] = mtime_ns
+        return True
+
+    def __index_day(self, day: date) -> ManifestDay:
+        file_name = self.day_file_path(day)
+        stat = os.stat(file_name)
+
+        manifest_day = ManifestDay(day=day, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        offset = 0
+
+        with open(file_name, "rb") as file:
+            for line in file:
+                if line.strip():
+                    time = DayManifest.__line_time(line)
+                    manifest_day.hour_offsets.setdefault(time.astimezone(timezone.utc).hour, offset)
+
+                    if not manifest_day.rows:
+                        manifest_day.first_time = time
+                    manifest_day.last_time = time
+                    manifest_day.rows += 1
+
+                offset += len(line)
+
+        return manifest_day
+
+    def __sync(self) -> bool:
+        """
+        Reload manifest if it has been changed by another instance (reader and writer have own instances).
+        Returns False if manifest file doesn't exist.
+        """
+        try:
+            mtime_ns = os.stat(self.__manifest_file).st_mtime_ns
+        except FileNotFoundError:
+            if self.__manifest_mtime_ns is None and not self.__days:
+                logger.info(f"Manifest doesn't exist and will be built: {self.__manifest_file}")
+            return False
+
+        if mtime_ns != self.__manifest_mtime_ns:
+            self.__load()
+            self.__manifest_mtime_ns = mtime_ns
+
+        return True
+
+    def __load(self) -> None:
+        manifest_file = self.__manifest_file
+        self.__days, self.__keys, self.__dir_mtimes = [], [], dict()
+
+        try:
+            with open(manifest_file, encoding="UTF8") as file:
+                manifest = json.load(file)
+
+            if manifest.get("version") != self.__VERSION:
+                logger.info(f"Manifest has another version and will be rebuilt: {manifest_file}")
+                return
+
+            for item in manifest["days"]:
+                self.__set_day(DayManifest.__day_from_json(item))
+            # all folders are listed once if manifest has been saved without them
+            self.__dir_mtimes = manifest.get("dir_mtimes", dict())
+
+        except Exception as ex:
+            logger.info(f"Manifest read error {manifest_file}. Manifest will be rebuilt: {repr(ex)}")
+            self.__days, self.__keys, self.__dir_mtimes = [], [], dict()
+
+    def __save(self) -> None:
+        manifest_file = self.__manifest_file
+
+        try:
+            # write to temporary file and rename it to avoid broken manifest if process is interrupted
+            tmp_manifest_file = manifest_file + ".tmp"
+            with open(tmp_manifest_file, "w", encoding="UTF8") as file:
+                json.dump(
+                    {
+                        "version": self.__VERSION,
+                        "days": [DayManifest.__day_to_json(x) for x in self.__days],
+                        "dir_mtimes": self.__dir_mtimes
+                    },
+                    file
+                )
+            os.replace(tmp_manifest_file, manifest_file)
+
+            self.__manifest_mtime_ns = os.stat(manifest_file).st_mtime_ns
+
+        except Exception as ex:
+            # read-only storage etc. Manifest is still used in memory.
+            logger.error(f"Manifest write error {manifest_file}: {repr(ex)}")
+
+    @staticmethod
+    def __numeric_dirs(path: Path) -> list[int]:
+        try:
+            return sorted(int(x.name) for x in os.scandir(path) if x.is_dir() and x.name.isdigit())
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def __line_time(line: bytes) -> datetime:
+        # 2022-09-02 07:34:00+00:00
+        return parse_time(line[line.rindex(b",") + 1:].strip().decode())
+
+    @staticmethod
+    def __day_to_json(manifest_day: ManifestDay) -> dict:
+        return {
+            "day": manifest_day.day.isoformat(),
+            "rows": manifest_day.rows,
+            "first_time": manifest_day.first_time.isoformat() if manifest_day.first_time else None,
+            "last_time": manifest_day.last_time.isoformat() if manifest_day.last_time else None,
+            "size": manifest_day.size,
+            "mtime_ns": manifest_day.mtime_ns,
+            "hour_offsets": {str(hour): offset for hour, offset in manifest_day.hour_offsets.items()}
+        }
+
+    @staticmethod
+    def __day_from_json(item: dict) -> ManifestDay:
+        return ManifestDay(
+            day=date.fromisoformat(item["day"]),
+            rows=item["rows"],
+            first_time=datetime.fromisoformat(item["first_time"]) if item["first_time"] else None,
+            last_time=datetime.fromisoformat(item["last_time"]) if item["last_time"] else None,
+            size=item["size"],
+            mtime_ns=item["mtime_ns"],
+            hour_offsets={int(hour): offset for hour, offset in item["hour_offsets"].items()}
+        )
@@ -1,7 +1,10 @@
 import logging
-from typing import Generator
+import os
+from datetime import date, datetime
+from typing import Generator, Optional
 
 from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns
 from data_provider.internal_candle import InternalCandle
 from data_provider.tinkoff_downloaded.csv_data_storage import CSVDataStorageReader
 
@@ -12,8 +15,21 @@ logger = logging.getLogger(__name__)
 
 class TinkoffDownloaded(IDataProvider):
     """Data provider for downloaded market data by (data_collectors\tinkoff_stream_py) project"""
-    def __init__(self, root_path: str) -> None:
-        self.__data_reader = CSVDataStorageReader(root_path)
+    def __init__(self, root_path: str, binary_cache: str = "False") -> None:
+        # settings are passed as strings from configuration file
+        self.__root_path = root_path
+        self.__data_reader = CSVDataStorageReader(root_path, str(binary_cache).lower() == "true")
+
+    @property
+    def source_id(self) -> str:
+        return f"TinkoffDownloaded: {os.path.abspath(self.__root_path)}"
+
+    def period_start(self, from_days: int) -> Optional[datetime]:
+        # the first day is read from its start
+        return CSVDataStorageReader.from_days_time(from_days)
+
+    def day_stamps(self, figi: str, from_: Optional[datetime], to: datetime) -> Optional[dict[date, str]]:
+        return self.__data_reader.read_candle_day_stamps(figi, from_, to)
 
     def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
         for candle in self.__data_reader.read_candles(figi, from_days):
@@ -25,3 +41,30 @@ class TinkoffDownloaded(IDataProvider):
                 volume=candle.volume,
                 time=candle.time
             )
+
+    def provide_columns(self, figi: str, from_days: int) -> CandleColumns:
+        return self.__data_reader.read_candle_columns(figi, from_days)
+
+    def provide_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> Generator[InternalCandle, None, None]:
+        for candle in self.__data_reader.read_candles_range(figi, from_, to):
+            yield InternalCandle(
+                open=candle.open,
+                high=candle.high,
+                low=candle.low,
+                close=candle.close,
+                volume=candle.volume,
+                time=candle.time
+            )
+
+    def provide_columns_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> CandleColumns:
+        return self.__data_reader.read_candle_columns_range(figi, from_, to)
@@ -0,0 +1,43 @@
+import heapq
+import logging
+from typing import Generator
+
+from data_provider.base_tick_data_provider import ITickDataProvider
+from data_provider.internal_candle import InternalCandle
+from data_provider.tick import Tick
+from data_provider.tick_candle_builder import TickCandleBuilder
+from data_provider.tinkoff_downloaded.csv_data_storage import CSVDataStorageReader
+
+__all__ = ("TinkoffTicks")
+
+logger = logging.getLogger(__name__)
+
+
+class TinkoffTicks(ITickDataProvider):
+    """
+    Tick data provider for downloaded market data by (data_collectors\tinkoff_stream_py) project.
+    Trade and last price streams are merged in time order. Streams are read day by day, so memory is bounded.
+    Candles (1 minute) are built from ticks on the fly, so the provider can be used by candle emulators as well.
+    """
+    def __init__(self, root_path: str, binary_cache: str = "False") -> None:
+        # settings are passed as strings from configuration file, the same settings as TinkoffDownloaded.
+        # Binary cache is for candle files, ticks are read from csv files anyway
+        self.__data_reader = CSVDataStorageReader(root_path, str(binary_cache).lower() == "true")
+
+    def provide_ticks(self, figi: str, from_days: int) -> Generator[Tick, None, None]:
+        yield from heapq.merge(
+            self.__data_reader.read_trade_ticks(figi, from_days),
+            self.__data_reader.read_last_price_ticks(figi, from_days)
+        )
+
+    def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
+        candle_builder = TickCandleBuilder()
+
+        for tick in self.provide_ticks(figi, from_days):
+            candle = candle_builder.add(tick)
+            if candle:
+                yield candle
+
+        candle = candle_builder.flush()
+        if candle:
+            yield candle
@@ -0,0 +1,158 @@
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Generator, Union
+
+from tinkoff.invest import CandleInterval, HistoricCandle
+
+from data_provider.internal_candle import InternalCandle
+from data_provider.tinkoff_downloaded.csv_data_storage import CSVDataStorageReader, CSVDataStorageWriter
+from invest_api.services.async_client_service import AsyncClientService
+from invest_api.services.client_service import ClientService
+from invest_api.utils import historic_candle_to_internal
+
+__all__ = ("HistoricCandleCache")
+
+logger = logging.getLogger(__name__)
+
+
+class HistoricCandleCache:
+    """
+    Local append-only cache for historical candles. Cache key is (figi, interval, day).
+    Closed (past) days are downloaded once and written in the TinkoffDownloaded folder structure,
+    so the cache can be read by TinkoffDownloaded data provider as well.
+    Current day is not closed yet, it is always downloaded and never cached.
+    If api is not available, cached days are provided only (offline mode).
+    """
+    # the same folder name as tinkoff_market_data_collector uses for 1 minute candles
+    __ONE_MIN_CANDLE_TYPE_FOLDER = "candle"
+
+    def __init__(self, root_path: str, client_service: Union[ClientService, AsyncClientService]) -> None:
+        self.__client_service = client_service
+
+        self.__reader = CSVDataStorageReader(root_path)
+        self.__writer = CSVDataStorageWriter(root_path)
+
+    def provide(
+            self,
+            figi: str,
+            from_days: int,
+            interval: CandleInterval
+    ) -> Generator[InternalCandle, None, None]:
+        type_folder = HistoricCandleCache.__type_folder(interval)
+        today = datetime.utcnow().date()
+        from_day = today - timedelta(days=from_days)
+
+        logger.info(f"Start provide cached candles. Figi: {figi}, from day: {from_day}, interval: {interval.name}")
+
+        try:
+            self.__download_missing_days(figi, type_folder, from_day, today, interval)
+        except Exception as ex:
+            logger.error(f"Missing days download error. Cached days are used only: {repr(ex)}")
+
+        today_start = HistoricCandleCache.__day_start(today)
+
+        for candle in self.__reader.read_candles(figi, from_days, type_folder):
+            # candles of current day are not cached, they are provided from api below
+            if candle.time < today_start:
+                yield InternalCandle(
+                    open=candle.open,
+                    high=candle.high,
+                    low=candle.low,
+                    close=candle.close,
+                    volume=candle.volume,
+                    time=candle.time
+                )
+
+        try:
+            for candle in self.__client_service.download_historic_candle_range(
+                figi,
+                max(today_start, datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(days=from_days)),
+                datetime.utcnow().replace(tzinfo=timezone.utc),
+                interval
+            ):
+                yield historic_candle_to_internal(candle)
+        except Exception as ex:
+            logger.error(f"Current day download error. Cached days are provided only: {repr(ex)}")
+
+    def __download_missing_days(
+            self,
+            figi: str,
+            type_folder: str,
+            from_day: date,
+            today: date,
+            interval: CandleInterval
+    ) -> None:
+        missing_days = [
+            from_day + timedelta(days=i)
+            for i in range((today - from_day).days)
+            if not self.__writer.is_day_exist(figi, type_folder, from_day + timedelta(days=i))
+        ]
+
+        logger.info(f"Missing days in cache: {len(missing_days)}")
+
+        # download continuous ranges of missing days by one request
+        for days_range in HistoricCandleCache.__continuous_ranges(missing_days):
+            candles = self.__client_service.download_historic_candle_range(
+                figi,
+                HistoricCandleCache.__day_start(days_range[0]),
+                HistoricCandleCache.__day_start(days_range[-1] + timedelta(days=1)),
+                interval
+            )
+
+            # candles are streamed in time order, so every day is written as soon as the next day begins.
+            # Every closed day is written, empty days too. It means no trading that day.
+            current_day = days_range[0]
+            day_candles: list[HistoricCandle] = []
+
+            for candle in candles:
+                candle_day = candle.time.astimezone(timezone.utc).date()
+                if candle_day < current_day:
+                    continue
+
+                while current_day < candle_day:
+                    self.__write_day(figi, type_folder, current_day, today, day_candles)
+                    current_day += timedelta(days=1)
+                    day_candles = []
+
+                day_candles.append(candle)
+
+            while current_day <= days_range[-1]:
+                self.__write_day(figi, type_folder, current_day, today, day_candles)
+                current_day += timedelta(days=1)
+                day_candles = []
+
+    def __write_day(
+            self,
+            figi: str,
+            type_folder: str,
+            day: date,
+            today: date,
+            day_candles: list[HistoricCandle]
+    ) -> None:
+        if day < today:
+            self.__writer.write_candles(figi, type_folder, day, day_candles)
+
+    @staticmethod
+    def __continuous_ranges(days: list[date]) -> Generator[list[date], None, None]:
+        days_range: list[date] = []
+
+        for day in days:
+            if days_range and (day - days_range[-1]).days > 1:
+                yield days_range
+                days_range = []
+
+            days_range.append(day)
+
+        if days_range:
+            yield days_range
+
+    @staticmethod
+    def __day_start(day: date) -> datetime:
+        return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+    @staticmethod
+    def __type_folder(interval: CandleInterval) -> str:
+        if interval == CandleInterval.CANDLE_INTERVAL_1_MIN:
+            return HistoricCandleCache.__ONE_MIN_CANDLE_TYPE_FOLDER
+
+        return interval.name.lower()
@@ -1,10 +1,13 @@
 import logging
-from typing import Generator
+from datetime import datetime, timezone
+from typing import Generator, Optional
 
 from tinkoff.invest import CandleInterval
 
 from data_provider.base_data_provider import IDataProvider
 from data_provider.internal_candle import InternalCandle
+from data_provider.tinkoff_historic.historic_candle_cache import HistoricCandleCache
+from invest_api.services.async_client_service import AsyncClientService
 from invest_api.services.client_service import ClientService
 from invest_api.utils import historic_candle_to_internal
 
@@ -16,13 +19,48 @@ logger = logging.getLogger(__name__)
 
 class TinkoffHistoric(IDataProvider):
     """Data provider from tinkoff historic candles (api download_historic_candle)"""
-    def __init__(self, token: str, app_name: str) -> None:
-        self.__client_service = ClientService(token, app_name)
+    def __init__(
+            self,
+            token: str,
+            app_name: str,
+            cache_path: str = "",
+            concurrency: str = "1",
+            requests_per_minute: str = "300"
+    ) -> None:
+        # settings are passed as strings from configuration file.
+        # Several days are downloaded concurrently by async client if concurrency is more than 1
+        self.__client_service = AsyncClientService(token, app_name, int(concurrency), int(requests_per_minute)) \
+            if int(concurrency) > 1 else ClientService(token, app_name)
+        # local cache is used if path is specified
+        self.__cache = HistoricCandleCache(cache_path, self.__client_service) if cache_path else None
 
     def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
+        if self.__cache:
+            yield from self.__cache.provide(figi, from_days, CandleInterval.CANDLE_INTERVAL_1_MIN)
+            return
+
         for candle in self.__client_service.download_historic_candle(
             figi,
             from_days,
             CandleInterval.CANDLE_INTERVAL_1_MIN
         ):
             yield historic_candle_to_internal(candle)
+
+    def provide_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> Generator[InternalCandle, None, None]:
+        if self.__cache:
+            yield from super().provide_range(figi, from_, to)
+            return
+
+        # only the range is requested from api
+        for candle in self.__client_service.download_historic_candle_range(
+            figi,
+            from_,
+            to or datetime.now(timezone.utc),
+            CandleInterval.CANDLE_INTERVAL_1_MIN
+        ):
+            yield historic_candle_to_internal(candle)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+
+__all__ = ("CheckpointStore", "EmulatorCheckpoint")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False, repr=True)
+class EmulatorCheckpoint:
+    key: str
+    # the last candle emulated before the checkpoint
+    last_time: Optional[datetime] = None
+    # the next candle, it's held back because it could be incomplete. Emulation is continued from it
+    resume_time: Optional[datetime] = None
+    candles_count: int = 0
+    # the first emulated candle, emulation started with it
+    first_time: Optional[datetime] = None
+    # stamps of days before the day of resume_time (see IDataProvider.day_stamps), iso day -> stamp.
+    # None if data provider can't make stamps
+    day_stamps: Optional[dict[str, str]] = None
+    # see ITradingEmulator.snapshot
+    state: dict = field(default_factory=dict)
+
+
+class CheckpointStore:
+    """
+    Snapshots of emulations (strategy state, emulator state and test results) to continue them by new candles only.
+    Checkpoint of emulator is keyed by hash of strategy name and settings, emulator type and configuration,
+    figi, data range (from_days) and data source (see IDataProvider.source_id).
+    Changed settings make another key, so stale checkpoints are never used.
+    Changed candles of tested days are detected by day stamps of checkpoint (see HistoryTestsManager).
+    Format version is a part of the key too: change it if state of strategies or emulators is changed.
+    Checkpoints are pickle files in the folder, delete them to replay all history.
+    """
+    __VERSION = 4
+
+    def __init__(self, path: str) -> None:
+        self.__path = path
+
+    @staticmethod
+    def checkpoint_key(trading_emulator: ITradingEmulator, from_days: int, source_id: str) -> str:
+        strategy_settings = trading_emulator.strategy_settings
+
+        key = json.dumps(
+            {
+                "version": CheckpointStore.__VERSION,
+                "strategy": strategy_settings.name,
+                "settings": {str(name): str(value) for name, value in strategy_settings.settings.items()},
+                "short_enabled": strategy_settings.short_enabled_flag,
+                "emulator": f"{trading_emulator.__class__.__name__}: {trading_emulator}",
+                "figi": trading_emulator.figi,
+                "from_days": from_days,
+                "source": source_id
+            },
+            sort_keys=True
+        )
+
+        return hashlib.sha256(key.encode("UTF8")).hexdigest()
+
+    def load(self, key: str) -> Optional[EmulatorCheckpoint]:
+        file_name = self.__file_name(key)
+
+        try:
+            with open(file_name, "rb") as file:
+                checkpoint = pickle.load(file)
+
+            if not isinstance(checkpoint, EmulatorCheckpoint) or checkpoint.key != key:
+                logger.info(f"Checkpoint is broken and will be replaced: {file_name}")
+                return None
+
+            return checkpoint
+
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.info(f"Checkpoint read error {file_name}. Checkpoint will be replaced: {repr(ex)}")
+            return None
+
+    def save(self, checkpoint: EmulatorCheckpoint) -> None:
+        file_name = self.__file_name(checkpoint.key)
+
+        try:
+            os.makedirs(self.__path, exist_ok=True)
+
+            # write to temporary file and rename it to avoid broken checkpoint if process is interrupted
+            tmp_file_name = file_name + ".tmp"
+            with open(tmp_file_name, "wb") as file:
+                pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file_name, file_name)
+
+        except Exception as ex:
+            logger.error(f"Checkpoint write error {file_name}: {repr(ex)}")
+
+    def __file_name(self, key: str) -> str:
+        return str(Path(self.__path, f"{key}.pkl"))
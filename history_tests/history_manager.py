@@ -1,7 +1,17 @@
 import logging
+from datetime import datetime, time, timezone
+from typing import Iterable, Optional
 
+from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns
+from data_provider.internal_candle import InternalCandle
+from history_tests.checkpoints.checkpoint_store import CheckpointStore, EmulatorCheckpoint
+from history_tests.result_cache.result_cache import ResultCache, candles_fingerprint, stamps_fingerprint
 from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
 from history_tests.test_results import TestResults
+from instrumentation.active_instrumentation import activate_instrumentation
+from instrumentation.base_instrumentation import IInstrumentation
+from instrumentation.null_instrumentation import NullInstrumentation
 from result_viewer.base_viewer import IResultViewer
 
 __all__ = ("HistoryTestsManager")
@@ -11,29 +21,135 @@ logger = logging.getLogger(__name__)
 
 class HistoryTestsManager:
     """
-    The manager for testing strategy on historical data
+    The manager for testing strategy on historical data.
+    Emulators and strategies are measured by instrumentation (disabled by default).
+    Data provider has to be wrapped by the same instrumentation before emulators are created.
+    If checkpoint store is specified, emulations are continued from saved checkpoints by new candles only
+    (emulators have to support snapshots, otherwise all candles are tested as usual).
+    If result cache is specified, emulators with cached results for the same settings and candles aren't tested.
     """
 
     def __init__(
             self,
             trading_emulators: list[ITradingEmulator],
-            result_viewers: list[IResultViewer]
+            result_viewers: list[IResultViewer],
+            data_provider: Optional[IDataProvider] = None,
+            instrumentation: Optional[IInstrumentation] = None,
+            checkpoint_store: Optional[CheckpointStore] = None,
+            result_cache: Optional[ResultCache] = None
     ) -> None:
-        self.__trading_emulators = trading_emulators
+        self.__instrumentation = instrumentation or NullInstrumentation()
+        self.__trading_emulators = [self.__instrumentation.wrap_emulator(x) for x in trading_emulators]
         self.__result_viewers = result_viewers
+        self.__data_provider = data_provider
+        self.__checkpoint_store = checkpoint_store
+        self.__result_cache = result_cache
 
     def test(
             self,
-            from_days
+            from_days,
+            single_pass: bool = False
     ) -> None:
         """
         Main entry point to start testing
+        single_pass - read data provider once and share every candle between all emulators
         """
         logger.info(f"Start strategy tests")
+
+        with activate_instrumentation(self.__instrumentation):
+            # emulator name -> key of result in cache
+            result_keys: dict[str, str] = dict()
+            cached_results: dict[str, TestResults] = dict()
+            # figi -> candles which have been read for fingerprint, they aren't read again by columnar tests
+            loaded_candles: dict[str, CandleColumns] = dict()
+            if self.__result_cache and self.__data_provider:
+                result_keys, cached_results, loaded_candles = self.__load_cached_results(from_days)
+
+            trading_emulators = [x for x in self.__trading_emulators if str(x) not in cached_results]
+            if not trading_emulators:
+                new_results = dict()
+            elif self.__checkpoint_store and self.__data_provider:
+                new_results = self.__test_incremental(trading_emulators, from_days)
+            elif single_pass and self.__data_provider:
+                new_results = self.__test_single_pass(trading_emulators, from_days, loaded_candles)
+            else:
+                new_results = self.__test_every_emulator(trading_emulators, from_days)
+
+        for emulator_name, test_result in new_results.items():
+            if emulator_name in result_keys:
+                self.__result_cache.save(result_keys[emulator_name], test_result)
+
+        # results are in order of emulators, broken emulators haven't results
+        test_results: dict[str, TestResults] = dict()
+        for emulator_name in (str(x) for x in self.__trading_emulators):
+            if emulator_name in cached_results:
+                test_results[emulator_name] = cached_results[emulator_name]
+            elif emulator_name in new_results:
+                test_results[emulator_name] = new_results[emulator_name]
+
+        self.__instrumentation.export()
+
+        # Show all results
+        logger.info(f"Start view all test results")
+        for result_viewer in self.__result_viewers:
+            try:
+                result_viewer.view(test_results)
+            except Exception as ex:
+                logger.error(f"View results {result_viewer} error: {repr(ex)}")
+
+    def __load_cached_results(
+            self,
+            from_days: int
+    ) -> tuple[dict[str, str], dict[str, TestResults], dict[str, CandleColumns]]:
+        """
+        Keys of results for all emulators, cached results found by them and candles read for fingerprints.
+        Fingerprint of data is made by day stamps of data provider, candles are read only if provider
+        can't make them. So changed or new candles give new keys.
+        """
+        result_keys: dict[str, str] = dict()
+        cached_results: dict[str, TestResults] = dict()
+        loaded_candles: dict[str, CandleColumns] = dict()
+
+        for figi, trading_emulators in self.__emulators_by_figi(self.__trading_emulators).items():
+            try:
+                period_start = self.__data_provider.period_start(from_days)
+                day_stamps = self.__data_provider.day_stamps(figi, period_start, datetime.now(timezone.utc))
+
+                if day_stamps is not None:
+                    fingerprint = stamps_fingerprint(self.__data_provider.source_id, period_start, day_stamps)
+                    data_description = f"days: {len(day_stamps)}"
+                else:
+                    candles = loaded_candles[figi] = self.__data_provider.provide_columns(figi, from_days)
+                    fingerprint = candles_fingerprint(candles)
+                    data_description = f"candles: {len(candles)}"
+            except Exception as ex:
+                logger.error(f"Fingerprint of candles error, results aren't cached: figi: {figi}, {repr(ex)}")
+                continue
+
+            hits_count = 0
+            for trading_emulator in trading_emulators:
+                emulator_name = str(trading_emulator)
+                result_keys[emulator_name] = ResultCache.result_key(trading_emulator, fingerprint)
+
+                test_result = self.__result_cache.load(result_keys[emulator_name])
+                if test_result is not None:
+                    cached_results[emulator_name] = test_result
+                    hits_count += 1
+
+            logger.info(f"Cached results: figi: {figi}, {data_description}, "
+                        f"emulators: {hits_count} of {len(trading_emulators)}")
+
+        return result_keys, cached_results, loaded_candles
+
+    @staticmethod
+    def __test_every_emulator(
+            trading_emulators: list[ITradingEmulator],
+            from_days: int
+    ) -> dict[str, TestResults]:
         test_results: dict[str, TestResults] = dict()
 
         # test strategy in different emulators
-        for trading_emulator in self.__trading_emulators:
+        for trading_emulator in trading_emulators:
             try:
                 test_results[str(trading_emulator)] = trading_emulator.emulate_trading(from_days)
             except Exception as ex:
@@ -41,10 +157,242 @@ class HistoryTestsManager:
             else:
                 logger.info("End strategy tests")
 
-        # Show all results
-        logger.info(f"Start view all test results")
-        for result_viewer in self.__result_viewers:
+        return test_results
+
+    def __test_single_pass(
+            self,
+            trading_emulators: list[ITradingEmulator],
+            from_days: int,
+            loaded_candles: dict[str, CandleColumns]
+    ) -> dict[str, TestResults]:
+        test_results: dict[str, TestResults] = dict()
+
+        for figi, trading_emulators in self.__emulators_by_figi(trading_emulators).items():
+            logger.info(f"Start single pass test: figi: {figi}, from_days: {from_days}, "
+                        f"emulators count: {len(trading_emulators)}")
+
+            if all(trading_emulator.batch_supported for trading_emulator in trading_emulators):
+                test_results.update(self.__test_columns(figi, from_days, trading_emulators, loaded_candles.get(figi)))
+                continue
+
+            active_emulators: list[ITradingEmulator] = []
+            for trading_emulator in trading_emulators:
+                try:
+                    trading_emulator.start_emulation()
+                except Exception as ex:
+                    logger.error(f"Testing error: {repr(ex)}")
+                else:
+                    active_emulators.append(trading_emulator)
+
             try:
-                result_viewer.view(test_results)
+                # columns are iterated candle by candle if they have been read already
+                active_emulators = self.__emulate_candles(
+                    loaded_candles[figi] if figi in loaded_candles else self.__data_provider.provide(figi, from_days),
+                    active_emulators
+                )
             except Exception as ex:
-                logger.error(f"View results {result_viewer} error: {repr(ex)}")
+                logger.error(f"Testing error: {repr(ex)}")
+                continue
+
+            for trading_emulator in active_emulators:
+                test_results[str(trading_emulator)] = trading_emulator.stop_emulation()
+
+            logger.info("End strategy tests")
+
+        return test_results
+
+    def __test_incremental(
+            self,
+            trading_emulators: list[ITradingEmulator],
+            from_days: int
+    ) -> dict[str, TestResults]:
+        """
+        Candles are read once per figi and shared between all emulators (as single pass test).
+        Emulators of figi are restored from checkpoints if all of them have valid checkpoints of the same candle,
+        and get candles from it only. Otherwise, emulation is started from scratch.
+        Checkpoint isn't valid if it was started before the requested period (from_days period moves with time)
+        or candles of tested days have been changed (backfilled, collected again, see IDataProvider.day_stamps).
+        The last candle can be incomplete (bar of aggregated interval or current minute isn't closed yet),
+        so checkpoints are saved before it and the next test starts from it again.
+        """
+        test_results: dict[str, TestResults] = dict()
+
+        for figi, trading_emulators in self.__emulators_by_figi(trading_emulators).items():
+            if any(trading_emulator.snapshot() is None for trading_emulator in trading_emulators):
+                logger.info(f"Emulators don't support checkpoints, all candles are tested: figi: {figi}")
+                test_results.update(self.__test_every_emulator(trading_emulators, from_days))
+                continue
+
+            source_id = self.__data_provider.source_id
+            keys = [CheckpointStore.checkpoint_key(x, from_days, source_id) for x in trading_emulators]
+            checkpoints = [self.__checkpoint_store.load(key) for key in keys]
+            resumed = all(checkpoints) and len({checkpoint.resume_time for checkpoint in checkpoints}) == 1 \
+                and self.__is_checkpoint_valid(figi, from_days, checkpoints[0])
+
+            try:
+                if resumed:
+                    resume_time = checkpoints[0].resume_time
+                    logger.info(f"Continue tests from checkpoints: figi: {figi}, from candle: {resume_time}, "
+                                f"tested candles: {checkpoints[0].candles_count}")
+
+                    for trading_emulator, checkpoint in zip(trading_emulators, checkpoints):
+                        trading_emulator.restore(checkpoint.state)
+
+                    # the held back candle is tested again (it could have been changed since the last test)
+                    candles = self.__data_provider.provide_range(figi, resume_time)
+                else:
+                    logger.info(f"Start tests without checkpoints: figi: {figi}, from_days: {from_days}")
+
+                    for trading_emulator in trading_emulators:
+                        trading_emulator.start_emulation()
+
+                    candles = self.__data_provider.provide(figi, from_days)
+
+                new_checkpoints = [
+                    checkpoint if resumed else EmulatorCheckpoint(key=key)
+                    for key, checkpoint in zip(keys, checkpoints)
+                ]
+                tracker = _CandlesTracker(candles)
+
+                # checkpoint of the figi is consistent for all emulators, so any error stops all of them
+                self.__emulate_candles(tracker.candles(), trading_emulators, exclude_broken=False)
+
+                if tracker.last_candle:
+                    # state is pickled by save, so the last candle can be emulated after it
+                    if tracker.count:
+                        first_time = new_checkpoints[0].first_time or tracker.first_time
+                        day_stamps = self.__day_stamps(figi, first_time, tracker.last_candle.time)
+
+                        for trading_emulator, checkpoint in zip(trading_emulators, new_checkpoints):
+                            checkpoint.last_time = tracker.last_time
+                            checkpoint.resume_time = tracker.last_candle.time
+                            checkpoint.candles_count += tracker.count
+                            checkpoint.first_time = first_time
+                            checkpoint.day_stamps = day_stamps
+                            checkpoint.state = trading_emulator.snapshot()
+                            self.__checkpoint_store.save(checkpoint)
+
+                    self.__emulate_candles([tracker.last_candle], trading_emulators, exclude_broken=False)
+
+            except Exception as ex:
+                logger.error(f"Testing error: {repr(ex)}")
+                continue
+
+            logger.info(f"New candles have been tested: figi: {figi}, "
+                        f"candles: {tracker.count + (1 if tracker.last_candle else 0)}")
+
+            for trading_emulator in trading_emulators:
+                test_results[str(trading_emulator)] = trading_emulator.stop_emulation()
+
+            logger.info("End strategy tests")
+
+        return test_results
+
+    def __is_checkpoint_valid(self, figi: str, from_days: int, checkpoint: EmulatorCheckpoint) -> bool:
+        period_start = self.__data_provider.period_start(from_days)
+        if period_start and (checkpoint.first_time is None or checkpoint.first_time < period_start):
+            logger.info(f"Checkpoints are out of the requested period and will be replaced: figi: {figi}, "
+                        f"first candle: {checkpoint.first_time}, period start: {period_start}")
+            return False
+
+        if self.__day_stamps(figi, checkpoint.first_time, checkpoint.resume_time) != checkpoint.day_stamps:
+            logger.info(f"Candles of tested days have been changed, checkpoints will be replaced: figi: {figi}")
+            return False
+
+        return True
+
+    def __day_stamps(self, figi: str, first_time: datetime, resume_time: datetime) -> Optional[dict[str, str]]:
+        """
+        Stamps of days before the day of resume candle. The day of resume candle isn't stamped,
+        because new candles are appended to it, and it's tested from resume candle anyway.
+        """
+        resume_day_start = datetime.combine(resume_time.astimezone(timezone.utc).date(), time.min, tzinfo=timezone.utc)
+        day_stamps = self.__data_provider.day_stamps(figi, first_time, resume_day_start)
+
+        return {day.isoformat(): stamp for day, stamp in day_stamps.items()} if day_stamps is not None else None
+
+    @staticmethod
+    def __emulators_by_figi(trading_emulators: list[ITradingEmulator]) -> dict[str, list[ITradingEmulator]]:
+        # emulators can test different instruments, so data is read once per figi
+        emulators_by_figi: dict[str, list[ITradingEmulator]] = dict()
+        for trading_emulator in trading_emulators:
+            emulators_by_figi.setdefault(trading_emulator.figi, []).append(trading_emulator)
+
+        return emulators_by_figi
+
+    @staticmethod
+    def __emulate_candles(
+            candles: Iterable[InternalCandle],
+            active_emulators: list[ITradingEmulator],
+            exclude_broken: bool = True
+    ) -> list[ITradingEmulator]:
+        """Every candle is emulated by all active emulators. Returns emulators which weren't broken"""
+        for candle in candles:
+            for trading_emulator in active_emulators:
+                try:
+                    trading_emulator.emulate_candle(candle)
+                except Exception as ex:
+                    if not exclude_broken:
+                        raise
+
+                    # the broken emulator is excluded, others continue testing
+                    logger.error(f"Testing error {trading_emulator}: {repr(ex)}")
+                    active_emulators = [x for x in active_emulators if x is not trading_emulator]
+
+        return active_emulators
+
+    def __test_columns(
+            self,
+            figi: str,
+            from_days: int,
+            trading_emulators: list[ITradingEmulator],
+            candles: Optional[CandleColumns] = None
+    ) -> dict[str, TestResults]:
+        """
+        All candles are read once in columnar view and analyzed by batch strategies.
+        Candles which have been read already can be passed.
+        """
+        test_results: dict[str, TestResults] = dict()
+
+        try:
+            if candles is None:
+                candles = self.__data_provider.provide_columns(figi, from_days)
+        except Exception as ex:
+            logger.error(f"Testing error: {repr(ex)}")
+            return test_results
+
+        for trading_emulator in trading_emulators:
+            try:
+                test_results[str(trading_emulator)] = trading_emulator.emulate_columns(candles)
+            except Exception as ex:
+                logger.error(f"Testing error: {repr(ex)}")
+
+        logger.info("End strategy tests")
+
+        return test_results
+
+
+class _CandlesTracker:
+    """
+    Candles pass through it except the last one, it's held back (see last_candle).
+    The first and the last passed candle times and count are kept for checkpoints.
+    """
+
+    def __init__(self, candles: Iterable[InternalCandle]) -> None:
+        self.__candles = candles
+        self.first_time = None
+        self.last_time = None
+        self.count = 0
+        self.last_candle: Optional[InternalCandle] = None
+
+    def candles(self) -> Iterable[InternalCandle]:
+        for candle in self.__candles:
+            if self.last_candle:
+                if self.first_time is None:
+                    self.first_time = self.last_candle.time
+                self.last_time = self.last_candle.time
+                self.count += 1
+
+                yield self.last_candle
+
+            self.last_candle = candle
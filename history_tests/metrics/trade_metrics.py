@@ -0,0 +1,150 @@
+import math
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from history_tests.test_results import TestResults
+from invest_api.utils import nano_to_decimal
+from trade_system.commissions.base_commission import ICommissionCalculator
+from trade_system.signal import SignalType
+
+__all__ = ("TradeMetrics", "TradeMetricsEngine", "calculate_metrics")
+
+
+@dataclass(eq=False, repr=True)
+class TradeMetrics:
+    """
+    Performance of executed orders. Money values are in price units (Decimal), net values include commission.
+    Sharpe and Sortino ratios are calculated by net results of trades (per trade, not annualized).
+    Per trade columns are int64 arrays in nano units in order of executed orders.
+    Equity curve is in order of close time, because merged results (portfolio, walk forward) aren't ordered by time.
+    """
+    orders_count: int = 0
+    # orders with profit (without commission) and others
+    win_count: int = 0
+    loss_count: int = 0
+    profit: Decimal = field(default_factory=Decimal)
+    commission: Decimal = field(default_factory=Decimal)
+    net_profit: Decimal = field(default_factory=Decimal)
+    win_rate: float = 0.0
+    average_trade: Decimal = field(default_factory=Decimal)
+    # sum of net profits / sum of net losses, inf if there aren't losses
+    profit_factor: float = 0.0
+    # the biggest fall of net equity from its peak (positive value)
+    max_drawdown: Decimal = field(default_factory=Decimal)
+    sharpe_ratio: float = 0.0
+    sortino_ratio: float = 0.0
+    # time in positions (overlapped positions are counted once)
+    # and its part of time from the first open to the last close
+    exposure_time: timedelta = field(default_factory=timedelta)
+    exposure_ratio: float = 0.0
+    trade_profit: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    trade_commission: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    # net equity after every order and time of order close
+    equity_curve: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    equity_time: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="datetime64[ns]"))
+
+
+def calculate_metrics(test_result: TestResults, commission_calculator: ICommissionCalculator) -> TradeMetrics:
+    """All metrics of executed orders at once by numpy (no python objects per order)"""
+    ledger = test_result.executed_orders
+    orders_count = len(ledger)
+    if not orders_count:
+        return TradeMetrics()
+
+    signal_type = np.array(ledger.signal_types, dtype=np.int8)
+    open_level = np.array(ledger.open_levels, dtype=np.int64)
+    close_level = np.array(ledger.close_levels, dtype=np.int64)
+    open_time = np.array(ledger.open_times_ns, dtype=np.int64)
+    close_time = np.array(ledger.close_times_ns, dtype=np.int64)
+
+    # long profit if close > open, short profit if open > close
+    trade_profit = np.where(signal_type == SignalType.LONG, close_level - open_level, open_level - close_level)
+    trade_commission = commission_calculator.calculate_nano(open_level) + \
+        commission_calculator.calculate_nano(close_level)
+    trade_net = trade_profit - trade_commission
+
+    # stable sort keeps order of executed orders with the same close time
+    by_close_time = np.argsort(close_time, kind="stable")
+    equity_curve = np.cumsum(trade_net[by_close_time])
+    # drawdown from the start equity (0) too
+    peaks = np.maximum.accumulate(np.maximum(equity_curve, 0))
+    max_drawdown = int((peaks - equity_curve).max())
+
+    win_count = int(np.count_nonzero(trade_profit > 0))
+    net_gains = int(trade_net[trade_net > 0].sum())
+    net_losses = -int(trade_net[trade_net < 0].sum())
+
+    net_profit = int(equity_curve[-1])
+    mean = float(trade_net.mean())
+    deviation = float(trade_net.std(ddof=1)) if orders_count > 1 else 0.0
+    downside_deviation = math.sqrt(float(np.square(np.minimum(trade_net, 0).astype(np.float64)).mean()))
+
+    exposure_ns, period_ns = _exposure(open_time, close_time)
+
+    return TradeMetrics(
+        orders_count=orders_count,
+        win_count=win_count,
+        loss_count=orders_count - win_count,
+        profit=nano_to_decimal(int(trade_profit.sum())),
+        commission=nano_to_decimal(int(trade_commission.sum())),
+        net_profit=nano_to_decimal(net_profit),
+        win_rate=win_count / orders_count,
+        average_trade=nano_to_decimal(net_profit) / orders_count,
+        profit_factor=net_gains / net_losses if net_losses else (math.inf if net_gains else 0.0),
+        max_drawdown=nano_to_decimal(max_drawdown),
+        sharpe_ratio=mean / deviation if deviation else 0.0,
+        sortino_ratio=mean / downside_deviation if downside_deviation else 0.0,
+        exposure_time=timedelta(microseconds=exposure_ns // 1000),
+        exposure_ratio=exposure_ns / period_ns if period_ns else 0.0,
+        trade_profit=trade_profit,
+        trade_commission=trade_commission,
+        equity_curve=equity_curve,
+        equity_time=close_time[by_close_time].view("datetime64[ns]")
+    )
+
+
+def _exposure(open_time: np.ndarray, close_time: np.ndarray) -> tuple[int, int]:
+    """Length of union of position intervals and time from the first open to the last close (in nanoseconds)"""
+    # time of positions is known if both times are logged
+    timed = (open_time > 0) & (close_time > 0)
+    if not timed.any():
+        return 0, 0
+
+    by_open_time = np.argsort(open_time[timed], kind="stable")
+    open_time = open_time[timed][by_open_time]
+    close_time = close_time[timed][by_open_time]
+
+    # a position adds time after the latest close of previous positions only
+    covered_to = np.maximum.accumulate(close_time)
+    starts = np.maximum(open_time, np.concatenate((open_time[:1], covered_to[:-1])))
+    exposure_ns = int(np.clip(close_time - starts, 0, None).sum())
+
+    return exposure_ns, int(covered_to[-1] - open_time[0])
+
+
+class TradeMetricsEngine:
+    """
+    Metrics of test results shared by all result viewers: every result is calculated once.
+    Metrics are kept while test results exist and recalculated if new orders have been executed.
+    """
+
+    def __init__(self, commission_calculator: ICommissionCalculator) -> None:
+        self.__commission_calculator = commission_calculator
+        # test results -> count of orders and metrics of them
+        self.__metrics: WeakKeyDictionary[TestResults, tuple[int, TradeMetrics]] = WeakKeyDictionary()
+
+    def metrics(self, test_result: TestResults) -> TradeMetrics:
+        orders_count = len(test_result.executed_orders)
+
+        cached = self.__metrics.get(test_result)
+        if cached and cached[0] == orders_count:
+            return cached[1]
+
+        metrics = calculate_metrics(test_result, self.__commission_calculator)
+        self.__metrics[test_result] = (orders_count, metrics)
+
+        return metrics
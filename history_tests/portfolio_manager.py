@@ -0,0 +1,134 @@
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from threading import BoundedSemaphore
+
+from configuration.settings import StrategySettings
+from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.trading_emulator_factory import TradingEmulatorFactory
+from result_viewer.base_viewer import IResultViewer
+
+__all__ = ("PortfolioTestsManager")
+
+logger = logging.getLogger(__name__)
+
+# name of combined results for all instruments
+PORTFOLIO_NAME = "Portfolio"
+
+
+class PortfolioTestsManager:
+    """
+    The manager for testing strategy on several instruments (portfolio) concurrently.
+    Candles are loaded by threads (data providers wait for files or api most of the time),
+    every loaded instrument is emulated in a separate process, so loading and emulation are overlapped.
+    """
+
+    def __init__(
+            self,
+            strategies_settings: list[StrategySettings],
+            result_viewers: list[IResultViewer],
+            data_provider: IDataProvider,
+            max_workers: int = 0
+    ) -> None:
+        self.__strategies_settings = strategies_settings
+        self.__result_viewers = result_viewers
+        self.__data_provider = data_provider
+        self.__max_workers = max_workers if max_workers > 0 else os.cpu_count()
+
+    def test(self, from_days: int) -> None:
+        """
+        Main entry point to start testing.
+        Results of every instrument are viewed with combined results of all instruments (portfolio)
+        """
+        logger.info(f"Start portfolio tests: instruments: {len(self.__strategies_settings)}, "
+                    f"workers: {self.__max_workers}")
+
+        instruments_results = self.__test_instruments(from_days)
+
+        test_results: dict[str, TestResults] = dict()
+        for instrument_name, emulators_results in instruments_results.items():
+            for emulator_name, test_result in emulators_results.items():
+                test_results[f"{instrument_name}: {emulator_name}"] = test_result
+        test_results.update(PortfolioTestsManager.__merge_results(instruments_results))
+
+        # Show all results
+        logger.info(f"Start view all test results")
+        for result_viewer in self.__result_viewers:
+            try:
+                result_viewer.view(test_results)
+            except Exception as ex:
+                logger.error(f"View results {result_viewer} error: {repr(ex)}")
+
+    def __test_instruments(self, from_days: int) -> dict[str, dict[str, TestResults]]:
+        # loaded candles wait for a free process in memory, so count of them is limited
+        loaded_slots = BoundedSemaphore(self.__max_workers * 2)
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers) as loaders, \
+                ProcessPoolExecutor(max_workers=self.__max_workers) as emulators:
+
+            def load_and_emulate(strategy_settings: StrategySettings) -> Future:
+                loaded_slots.acquire()
+                try:
+                    candles = self.__data_provider.provide_columns(strategy_settings.figi, from_days)
+                    logger.info(f"Candles have been loaded: figi: {strategy_settings.figi}, candles: {len(candles)}")
+
+                    future = emulators.submit(_test_instrument, strategy_settings, candles)
+                except Exception:
+                    loaded_slots.release()
+                    raise
+
+                future.add_done_callback(lambda _: loaded_slots.release())
+                return future
+
+            load_futures = {
+                loaders.submit(load_and_emulate, strategy_settings): strategy_settings
+                for strategy_settings in self.__strategies_settings
+            }
+
+            instruments_results: dict[str, dict[str, TestResults]] = dict()
+            for load_future in as_completed(load_futures):
+                strategy_settings = load_futures[load_future]
+                try:
+                    instruments_results[strategy_settings.ticker or strategy_settings.figi] = \
+                        load_future.result().result()
+                except Exception as ex:
+                    logger.error(f"Testing error: figi: {strategy_settings.figi}, {repr(ex)}")
+                else:
+                    logger.info(f"End strategy tests: figi: {strategy_settings.figi}")
+
+        # keep order of instruments from configuration
+        return {
+            name: instruments_results[name]
+            for name in (x.ticker or x.figi for x in self.__strategies_settings)
+            if name in instruments_results
+        }
+
+    @staticmethod
+    def __merge_results(instruments_results: dict[str, dict[str, TestResults]]) -> dict[str, TestResults]:
+        """
+        Executed orders of all instruments for every emulator.
+        Open positions aren't merged, because TestResults keeps only one current position
+        """
+        portfolio_results: dict[str, TestResults] = dict()
+
+        for emulators_results in instruments_results.values():
+            for emulator_name, test_result in emulators_results.items():
+                portfolio_result = portfolio_results.setdefault(f"{PORTFOLIO_NAME}: {emulator_name}", TestResults())
+                portfolio_result.merge_executed_orders(test_result)
+
+        return portfolio_results
+
+
+def _test_instrument(strategy_settings: StrategySettings, candles: CandleColumns) -> dict[str, TestResults]:
+    """Test one instrument by all trading emulators. It's called in worker process"""
+    test_results: dict[str, TestResults] = dict()
+
+    for trading_emulator in TradingEmulatorFactory.new_emulators(strategy_settings):
+        try:
+            test_results[str(trading_emulator)] = trading_emulator.emulate_columns(candles)
+        except Exception as ex:
+            logger.error(f"Testing error: figi: {strategy_settings.figi}, {trading_emulator}: {repr(ex)}")
+
+    return test_results
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+from data_provider.candle_columns import CandleColumns
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+
+__all__ = ("ResultCache", "candles_fingerprint", "stamps_fingerprint")
+
+logger = logging.getLogger(__name__)
+
+
+def candles_fingerprint(candles: CandleColumns) -> str:
+    """Content hash of candles: the same candles give the same fingerprint regardless of data provider"""
+    fingerprint = hashlib.blake2b(digest_size=16)
+
+    fingerprint.update(len(candles).to_bytes(8, "little"))
+    for column in (candles.time, candles.open, candles.high, candles.low, candles.close, candles.volume):
+        fingerprint.update(column.tobytes())
+
+    return fingerprint.hexdigest()
+
+
+def stamps_fingerprint(source_id: str, period_start: Optional[datetime], day_stamps: dict[date, str]) -> str:
+    """
+    Fingerprint of candles by data source, period and stamps of days (see IDataProvider.day_stamps).
+    Candles aren't read, so it's used if data provider makes day stamps.
+    """
+    fingerprint = hashlib.blake2b(digest_size=16)
+
+    fingerprint.update(
+        json.dumps(
+            {
+                "source": source_id,
+                "from": period_start.isoformat() if period_start else None,
+                "days": {day.isoformat(): stamp for day, stamp in day_stamps.items()}
+            },
+            sort_keys=True
+        ).encode("UTF8")
+    )
+
+    return fingerprint.hexdigest()
+
+
+class ResultCache:
+    """
+    Test results of emulators saved to files to skip emulation if settings and data haven't been changed.
+    Result is keyed by hash of strategy name and settings, emulator type and parameters, figi
+    and fingerprint of candles: stamps of days if data provider makes them (see stamps_fingerprint),
+    otherwise content of candles (see candles_fingerprint).
+    Cache is limited by count of results and total size of files, the least recently used results are evicted
+    (time of usage is modification time of file, it's updated by every hit).
+    """
+    __VERSION = 3
+    __FILE_SUFFIX = ".pkl"
+
+    def __init__(self, path: str, max_entries: int = 100, max_size_mb: int = 0) -> None:
+        self.__path = path
+        self.__max_entries = max_entries
+        # 0 means unlimited size
+        self.__max_size_bytes = max_size_mb * 1024 * 1024
+
+    @staticmethod
+    def result_key(trading_emulator: ITradingEmulator, fingerprint: str) -> str:
+        strategy_settings = trading_emulator.strategy_settings
+
+        key = json.dumps(
+            {
+                "version": ResultCache.__VERSION,
+                "strategy": strategy_settings.name,
+                "settings": {str(name): str(value) for name, value in strategy_settings.settings.items()},
+                "short_enabled": strategy_settings.short_enabled_flag,
+                "emulator": f"{trading_emulator.__class__.__name__}: {trading_emulator}",
+                "figi": trading_emulator.figi,
+                "fingerprint": fingerprint
+            },
+            sort_keys=True
+        )
+
+        return hashlib.sha256(key.encode("UTF8")).hexdigest()
+
+    def load(self, key: str) -> Optional[TestResults]:
+        file_name = self.__file_name(key)
+
+        try:
+            with open(file_name, "rb") as file:
+                test_results = pickle.load(file)
+
+            if not isinstance(test_results, TestResults):
+                logger.info(f"Cached result is broken and will be replaced: {file_name}")
+                return None
+
+            # the result is recently used now
+            os.utime(file_name)
+
+            return test_results
+
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            logger.info(f"Cached result read error {file_name}. Result will be replaced: {repr(ex)}")
+            return None
+
+    def save(self, key: str, test_results: TestResults) -> None:
+        file_name = self.__file_name(key)
+
+        try:
+            os.makedirs(self.__path, exist_ok=True)
+
+            # write to temporary file and rename it to avoid broken result if process is interrupted
+            tmp_file_name = file_name + ".tmp"
+            with open(tmp_file_name, "wb") as file:
+                pickle.dump(test_results, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file_name, file_name)
+
+            self.__evict()
+
+        except Exception as ex:
+            logger.error(f"Cached result write error {file_name}: {repr(ex)}")
+
+    def __evict(self) -> None:
+        """Remove the least recently used results above limits of count and size"""
+        files = []
+        for file_path in Path(self.__path).glob(f"*{self.__FILE_SUFFIX}"):
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, file_path))
+
+        # the most recently used first
+        files.sort(key=lambda x: x[0], reverse=True)
+
+        total_size = 0
+        for index, (_, size, file_path) in enumerate(files):
+            total_size += size
+
+            if (self.__max_entries > 0 and index >= self.__max_entries) or \
+                    (self.__max_size_bytes > 0 and total_size > self.__max_size_bytes and index > 0):
+                logger.debug("Evict cached result: %s", file_path)
+                file_path.unlink(missing_ok=True)
+                total_size -= size
+
+    def __file_name(self, key: str) -> str:
+        return str(Path(self.__path, f"{key}{self.__FILE_SUFFIX}"))
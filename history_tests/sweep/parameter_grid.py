@@ -0,0 +1,70 @@
+import random
+from decimal import Decimal, InvalidOperation
+from typing import Generator, Optional
+
+__all__ = ("ParameterGrid")
+
+
+class ParameterGrid:
+    """
+    Grid of strategy settings. Every setting is specified as string in one of formats:
+    - "start:stop:step" - numbers from start to stop (inclusive) with step, like "10:20:2" or "0.98:0.995:0.005"
+    - "value1,value2,value3" - list of values, like "close,high,low"
+    - "value" - one value
+    Values are kept as strings, because strategies parse settings themselves.
+    """
+
+    def __init__(self, base_settings: dict, ranges: dict[str, str]) -> None:
+        self.__base_settings = dict(base_settings)
+        self.__names = list(ranges.keys())
+        self.__values = [ParameterGrid.__parse_range(name, ranges[name]) for name in self.__names]
+
+    @property
+    def size(self) -> int:
+        """Count of all combinations in the grid"""
+        size = 1
+        for values in self.__values:
+            size *= len(values)
+        return size
+
+    def combinations(self) -> Generator[dict, None, None]:
+        """All combinations of settings in grid order"""
+        for index in range(self.size):
+            yield self.combination(index)
+
+    def random_combinations(self, count: int, seed: Optional[int] = None) -> Generator[dict, None, None]:
+        """Random combinations without repeats. The grid isn't built in memory, so it can be huge"""
+        for index in random.Random(seed).sample(range(self.size), min(count, self.size)):
+            yield self.combination(index)
+
+    def combination(self, index: int) -> dict:
+        """Combination by index in grid order. The last setting is changed first"""
+        settings = dict(self.__base_settings)
+
+        for name, values in zip(reversed(self.__names), reversed(self.__values)):
+            index, value_index = divmod(index, len(values))
+            settings[name] = values[value_index]
+
+        return settings
+
+    @staticmethod
+    def __parse_range(name: str, value: str) -> list[str]:
+        value = value.strip()
+
+        if ":" in value:
+            try:
+                start, stop, step = (Decimal(x.strip()) for x in value.split(":"))
+            except (ValueError, InvalidOperation):
+                raise ValueError(f"Wrong range of {name}: '{value}'. Expected format is 'start:stop:step'")
+
+            if step <= 0 or stop < start:
+                raise ValueError(f"Wrong range of {name}: '{value}'. Step must be positive and stop >= start")
+
+            count = int((stop - start) // step) + 1
+            return [str(start + step * i) for i in range(count)]
+
+        values = [x.strip() for x in value.split(",") if x.strip()]
+        if not values:
+            raise ValueError(f"Empty range of {name}")
+
+        return values
@@ -0,0 +1,156 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import Optional
+
+from configuration.settings import StrategySettings, CommissionSettings
+from data_provider.candle_columns import CandleColumns
+from data_provider.columnar.shared_candle_columns import SharedCandleColumns
+from history_tests.metrics.trade_metrics import calculate_metrics
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.trading_emulator_factory import TradingEmulatorFactory
+from trade_system.commissions.base_commission import ICommissionCalculator
+from trade_system.commissions.commissions import CommissionEveryOrderCalculator
+
+__all__ = ("ParameterSweep", "SweepResult", "make_sweep_result")
+
+logger = logging.getLogger(__name__)
+
+# a worker process gets several combinations per task to reduce pickling and scheduling overhead,
+# but small enough tasks keep all workers busy up to the end
+_TASKS_PER_WORKER = 8
+
+
+@dataclass(eq=False, repr=True)
+class SweepResult:
+    settings: dict = field(default_factory=dict)
+    emulator: str = ""
+    orders_count: int = 0
+    profit: Decimal = field(default_factory=Decimal)
+    commission: Decimal = field(default_factory=Decimal)
+    net_profit: Decimal = field(default_factory=Decimal)
+    win_rate: float = 0.0
+    profit_factor: float = 0.0
+    max_drawdown: Decimal = field(default_factory=Decimal)
+    sharpe_ratio: float = 0.0
+
+
+class ParameterSweep:
+    """
+    Test every combination of strategy settings by all trading emulators in parallel processes.
+    Candles are loaded once and shared with worker processes via shared memory.
+    Results are ranked by net profit (profit minus commission).
+    """
+
+    def __init__(
+            self,
+            strategy_settings: StrategySettings,
+            commission_settings: CommissionSettings,
+            max_workers: int = 0
+    ) -> None:
+        self.__strategy_settings = strategy_settings
+        self.__commission_settings = commission_settings
+        self.__max_workers = max_workers if max_workers > 0 else os.cpu_count()
+
+    def run(self, candles: CandleColumns, combinations: list[dict]) -> list[SweepResult]:
+        logger.info(f"Start parameter sweep: combinations: {len(combinations)}, candles: {len(candles)}, "
+                    f"workers: {self.__max_workers}")
+
+        results: list[SweepResult] = []
+        shared_candles = SharedCandleColumns.publish(candles)
+
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=self.__max_workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        shared_candles.name,
+                        shared_candles.length,
+                        self.__strategy_settings,
+                        self.__commission_settings
+                    )
+            ) as executor:
+                chunksize = max(1, len(combinations) // (self.__max_workers * _TASKS_PER_WORKER))
+
+                for combination_results in executor.map(_test_combination, combinations, chunksize=chunksize):
+                    results.extend(combination_results)
+        finally:
+            shared_candles.close(unlink=True)
+
+        logger.info(f"Parameter sweep has been completed: results: {len(results)}")
+
+        return sorted(results, key=lambda x: x.net_profit, reverse=True)
+
+
+# state of worker process
+_worker_candles: Optional[SharedCandleColumns] = None
+_worker_strategy_settings: Optional[StrategySettings] = None
+_worker_commission_calculator: Optional[ICommissionCalculator] = None
+
+
+def _init_worker(
+        candles_name: str,
+        candles_length: int,
+        strategy_settings: StrategySettings,
+        commission_settings: CommissionSettings
+) -> None:
+    global _worker_candles, _worker_strategy_settings, _worker_commission_calculator
+
+    # detailed logs of every emulation are useless for thousands of tests
+    logging.getLogger().setLevel(logging.WARNING)
+
+    _worker_candles = SharedCandleColumns.attach(candles_name, candles_length)
+    _worker_strategy_settings = strategy_settings
+    _worker_commission_calculator = CommissionEveryOrderCalculator(commission_settings)
+
+
+def _test_combination(settings: dict) -> list[SweepResult]:
+    strategy_settings = replace(_worker_strategy_settings, settings=settings)
+    results: list[SweepResult] = []
+
+    try:
+        trading_emulators = TradingEmulatorFactory.new_emulators(strategy_settings)
+    except Exception as ex:
+        logger.error(f"Sweep testing error: settings: {settings}, {repr(ex)}")
+        return results
+
+    # a broken emulator doesn't discard results of others
+    for trading_emulator in trading_emulators:
+        try:
+            results.append(
+                make_sweep_result(
+                    settings,
+                    str(trading_emulator),
+                    trading_emulator.emulate_columns(_worker_candles.columns),
+                    _worker_commission_calculator
+                )
+            )
+        except Exception as ex:
+            logger.error(f"Sweep testing error: settings: {settings}, {trading_emulator}: {repr(ex)}")
+
+    return results
+
+
+def make_sweep_result(
+        settings: dict,
+        emulator: str,
+        test_result: TestResults,
+        commission_calculator: ICommissionCalculator
+) -> SweepResult:
+    """Summary metrics of executed orders (see calculate_metrics), arrays of metrics aren't kept"""
+    metrics = calculate_metrics(test_result, commission_calculator)
+
+    return SweepResult(
+        settings=settings,
+        emulator=emulator,
+        orders_count=metrics.orders_count,
+        profit=metrics.profit,
+        commission=metrics.commission,
+        net_profit=metrics.net_profit,
+        win_rate=metrics.win_rate,
+        profit_factor=metrics.profit_factor,
+        max_drawdown=metrics.max_drawdown,
+        sharpe_ratio=metrics.sharpe_ratio
+    )
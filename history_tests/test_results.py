@@ -1,64 +1,91 @@
-from decimal import Decimal
 from typing import Optional
 
+from history_tests.trade_ledger import ExitReason, TradeLedger
 from trade_system.signal import Signal
 
 __all__ = ("TestResults", "TestPosition")
 
 
 class TestPosition:
-    def __init__(self, signal: Signal, open_level: Decimal) -> None:
+    """
+    Current open position. Signal is mutable (emulators can move stop level of open position).
+    Open and close price levels are fixed-point integers in nano units, time is nanoseconds from epoch.
+    """
+    __slots__ = ("__signal", "__open_level", "__open_time_ns", "__close_level")
+
+    def __init__(self, signal: Signal, open_level: int, open_time_ns: int = 0) -> None:
         self.__signal = signal
         self.__open_level = open_level
-        self.__close_level = Decimal(0)
+        self.__open_time_ns = open_time_ns
+        self.__close_level = 0
 
     @property
     def signal(self) -> Signal:
         return self.__signal
 
     @property
-    def open_level(self) -> Decimal:
+    def open_level(self) -> int:
         return self.__open_level
 
     @property
-    def close_level(self) -> Decimal:
+    def open_time_ns(self) -> int:
+        return self.__open_time_ns
+
+    @property
+    def close_level(self) -> int:
         return self.__close_level
 
-    def close_position(self, close_level: Decimal) -> None:
+    def close_position(self, close_level: int) -> None:
         self.__close_level = close_level
 
 
 class TestResults:
     """Class keeps information about trading result (emulation):
     - Current open position
-    - All positions for history
+    - All positions for history (columnar ledger, see TradeLedger)
     - Signal for position
-    - Open and close price level
+    - Open and close price level, time and reason of close
     """
 
     def __init__(self) -> None:
         self.__current_position: Optional[TestPosition] = None
-        self.__executed_orders: list[TestPosition] = []
+        self.__executed_orders = TradeLedger()
 
     @property
     def current_position(self) -> TestPosition:
         return self.__current_position
 
     @property
-    def executed_orders(self) -> list[TestPosition]:
+    def executed_orders(self) -> TradeLedger:
         return self.__executed_orders
 
-    def open_position(self, signal: Signal, open_level: Decimal) -> None:
+    def open_position(self, signal: Signal, open_level: int, open_time_ns: int = 0) -> None:
         if self.__current_position:
             raise Exception("Cannot open position. Current position is exist.")
         else:
-            self.__current_position = TestPosition(signal, open_level)
-
-    def close_position(self, close_level: Decimal) -> None:
+            self.__current_position = TestPosition(signal, open_level, open_time_ns)
+
+    def close_position(
+            self,
+            close_level: int,
+            close_time_ns: int = 0,
+            exit_reason: ExitReason = ExitReason.NONE
+    ) -> None:
         if self.__current_position:
-            self.__current_position.close_position(close_level)
-
-            self.__executed_orders.append(self.__current_position)
+            position = self.__current_position
+
+            self.__executed_orders.append(
+                position.signal,
+                position.open_level,
+                close_level,
+                position.open_time_ns,
+                close_time_ns,
+                exit_reason
+            )
             self.__current_position = None
         else:
             raise Exception("Cannot close position. Current position isn't exist.")
+
+    def merge_executed_orders(self, test_result: "TestResults") -> None:
+        """Append all executed orders of other results (open position isn't merged)"""
+        self.__executed_orders.extend(test_result.executed_orders)
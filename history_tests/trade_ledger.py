@@ -0,0 +1,185 @@
+import enum
+from array import array
+from typing import Generator
+
+import numpy as np
+
+from trade_system.signal import Signal, SignalType
+
+__all__ = ("ExitReason", "TradeLedger", "LedgerPosition")
+
+
+@enum.unique
+class ExitReason(enum.IntEnum):
+    # reason isn't known (positions merged from old results, for example)
+    NONE = 0
+    STOP_LOSS = 1
+    TAKE_PROFIT = 2
+    # position is closed by a signal of another type
+    REVERSE_SIGNAL = 3
+    CLOSE_SIGNAL = 4
+
+
+class LedgerPosition:
+    """
+    Read-only view of a closed position in TradeLedger. It keeps the ledger and the row index only.
+    Signal is made by every call from ledger columns, so changes of it aren't saved.
+    """
+    __slots__ = ("__ledger", "__index")
+
+    def __init__(self, ledger: "TradeLedger", index: int) -> None:
+        self.__ledger = ledger
+        self.__index = index
+
+    @property
+    def signal(self) -> Signal:
+        return self.__ledger.signal(self.__index)
+
+    @property
+    def signal_type(self) -> SignalType:
+        return SignalType(self.__ledger.signal_types[self.__index])
+
+    @property
+    def open_level(self) -> int:
+        return self.__ledger.open_levels[self.__index]
+
+    @property
+    def close_level(self) -> int:
+        return self.__ledger.close_levels[self.__index]
+
+    @property
+    def open_time_ns(self) -> int:
+        return self.__ledger.open_times_ns[self.__index]
+
+    @property
+    def close_time_ns(self) -> int:
+        return self.__ledger.close_times_ns[self.__index]
+
+    @property
+    def exit_reason(self) -> ExitReason:
+        return ExitReason(self.__ledger.exit_reasons[self.__index])
+
+
+class TradeLedger:
+    """
+    Columnar log of closed positions. Every field is a compact array (no python object per position),
+    so long tests with many positions don't load memory and garbage collector.
+    Price levels are fixed-point integers in nano units, time is nanoseconds from epoch (0 if it isn't known).
+    Figi is kept as index in the table of figies (results of a portfolio have many instruments).
+    """
+
+    def __init__(self) -> None:
+        self.__figies: list[str] = []
+        self.__figi_indexes: dict[str, int] = dict()
+
+        self.__figi_index = array("H")
+        self.__signal_type = array("b")
+        self.__take_profit_level = array("q")
+        self.__stop_loss_level = array("q")
+        self.__open_level = array("q")
+        self.__close_level = array("q")
+        self.__open_time_ns = array("q")
+        self.__close_time_ns = array("q")
+        self.__exit_reason = array("b")
+
+    @property
+    def signal_types(self) -> array:
+        return self.__signal_type
+
+    @property
+    def open_levels(self) -> array:
+        return self.__open_level
+
+    @property
+    def close_levels(self) -> array:
+        return self.__close_level
+
+    @property
+    def open_times_ns(self) -> array:
+        return self.__open_time_ns
+
+    @property
+    def close_times_ns(self) -> array:
+        return self.__close_time_ns
+
+    @property
+    def exit_reasons(self) -> array:
+        return self.__exit_reason
+
+    def append(
+            self,
+            signal: Signal,
+            open_level: int,
+            close_level: int,
+            open_time_ns: int = 0,
+            close_time_ns: int = 0,
+            exit_reason: ExitReason = ExitReason.NONE
+    ) -> None:
+        self.__figi_index.append(self.__add_figi(signal.figi))
+        self.__signal_type.append(signal.signal_type)
+        self.__take_profit_level.append(signal.take_profit_level)
+        self.__stop_loss_level.append(signal.stop_loss_level)
+        self.__open_level.append(open_level)
+        self.__close_level.append(close_level)
+        self.__open_time_ns.append(open_time_ns)
+        self.__close_time_ns.append(close_time_ns)
+        self.__exit_reason.append(exit_reason)
+
+    def extend(self, other: "TradeLedger") -> None:
+        """Append all positions of other ledger by arrays at once"""
+        figi_indexes = [self.__add_figi(figi) for figi in other.__figies]
+        self.__figi_index.extend(array("H", (figi_indexes[x] for x in other.__figi_index)))
+
+        self.__signal_type.extend(other.__signal_type)
+        self.__take_profit_level.extend(other.__take_profit_level)
+        self.__stop_loss_level.extend(other.__stop_loss_level)
+        self.__open_level.extend(other.__open_level)
+        self.__close_level.extend(other.__close_level)
+        self.__open_time_ns.extend(other.__open_time_ns)
+        self.__close_time_ns.extend(other.__close_time_ns)
+        self.__exit_reason.extend(other.__exit_reason)
+
+    def signal(self, index: int) -> Signal:
+        return Signal(
+            figi=self.__figies[self.__figi_index[index]],
+            signal_type=SignalType(self.__signal_type[index]),
+            take_profit_level=self.__take_profit_level[index],
+            stop_loss_level=self.__stop_loss_level[index]
+        )
+
+    def to_columns(self) -> dict[str, np.ndarray]:
+        """Export all positions at once as numpy arrays (copies), time columns are datetime64[ns]"""
+        return {
+            "figi": np.array(self.__figies, dtype=object)[np.array(self.__figi_index, dtype=np.intp)],
+            "signal_type": np.array(self.__signal_type, dtype=np.int8),
+            "take_profit_level": np.array(self.__take_profit_level, dtype=np.int64),
+            "stop_loss_level": np.array(self.__stop_loss_level, dtype=np.int64),
+            "open_level": np.array(self.__open_level, dtype=np.int64),
+            "close_level": np.array(self.__close_level, dtype=np.int64),
+            "open_time": np.array(self.__open_time_ns, dtype=np.int64).view("datetime64[ns]"),
+            "close_time": np.array(self.__close_time_ns, dtype=np.int64).view("datetime64[ns]"),
+            "exit_reason": np.array(self.__exit_reason, dtype=np.int8)
+        }
+
+    def __add_figi(self, figi: str) -> int:
+        index = self.__figi_indexes.get(figi)
+        if index is None:
+            index = self.__figi_indexes[figi] = len(self.__figies)
+            self.__figies.append(figi)
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self.__open_level)
+
+    def __getitem__(self, index: int) -> LedgerPosition:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Position index out of range")
+
+        return LedgerPosition(self, index)
+
+    def __iter__(self) -> Generator[LedgerPosition, None, None]:
+        for index in range(len(self)):
+            yield LedgerPosition(self, index)
@@ -1,14 +1,18 @@
 import logging
-
-from tinkoff.invest.utils import quotation_to_decimal
+from typing import Optional
 
 from configuration.settings import StrategySettings
 from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns, datetime_to_ns
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import quotation_to_nano
 from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
-from trade_system.signal import SignalType
+from trade_system.signal import Signal, SignalType
 from trade_system.strategies.base_strategy import IStrategy
 from trade_system.strategies.strategy_factory import StrategyFactory
 from history_tests.test_results import TestResults
+from history_tests.trade_ledger import ExitReason
+from instrumentation.active_instrumentation import active_instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -24,12 +28,28 @@ class AllFromStrategyEmulator(ITradingEmulator):
             strategy_settings: StrategySettings,
             data_provider: IDataProvider
     ) -> None:
+        self.__strategy_name = strategy_name
+        self.__strategy_settings = strategy_settings
         self.__strategy: IStrategy = StrategyFactory.new_factory(
             strategy_name,
             strategy_settings
         )
         self.__data_provider = data_provider
 
+        self.__test_result = TestResults()
+
+    @property
+    def figi(self) -> str:
+        return self.__strategy.settings.figi
+
+    @property
+    def strategy_settings(self) -> StrategySettings:
+        return self.__strategy_settings
+
+    @property
+    def batch_supported(self) -> bool:
+        return self.__strategy.batch_supported
+
     def emulate_trading(
             self,
             from_days: int
@@ -38,36 +58,94 @@ class AllFromStrategyEmulator(ITradingEmulator):
             f"Start AllFromStrategyEmulator test: {self.__strategy}, figi: {self.__strategy.settings.figi}, "
             f"from_days: {from_days}")
 
-        test_result = TestResults()
+        if self.batch_supported:
+            return self.emulate_columns(
+                self.__data_provider.provide_columns(self.__strategy.settings.figi, from_days)
+            )
+
+        self.start_emulation()
 
         for candle in self.__data_provider.provide(self.__strategy.settings.figi, from_days):
-            signal = self.__strategy.analyze_candle(candle)
-
-            if signal:
-                logger.info(f"New Signal: {signal}")
-
-                if test_result.current_position:
-                    # if position has been already opened
-                    if test_result.current_position.signal.signal_type == signal.signal_type:
-                        # skip signal if new and current have the same type
-                        logger.info("Signal skipped. Old still alive")
-                    elif signal.signal_type == SignalType.CLOSE:
-                        # close position if signal to Close position
-                        logger.info("Signal CLOSE. Close position")
-                        test_result.close_position(quotation_to_decimal(candle.close))
-                    else:
-                        # close current position and open a new
-                        logger.info("Close current position and open a new")
-                        test_result.close_position(quotation_to_decimal(candle.close))
-                        test_result.open_position(signal, quotation_to_decimal(candle.close))
+            self.emulate_candle(candle)
+
+        return self.stop_emulation()
+
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        self.start_emulation()
+
+        signals = self.__strategy.analyze_candles(candles) if self.__strategy.batch_supported else None
+
+        if signals is None:
+            for candle in candles:
+                self.emulate_candle(candle)
+        else:
+            logger.info(f"Batch signals are used: {len(signals)}")
+
+            # positions are opened and closed by signals only, so candles without signal are skipped
+            for position, index in enumerate(signals.index.tolist()):
+                self.__emulate_candle_signal(candles.candle(index), signals.signal(position, self.figi))
+
+        return self.stop_emulation()
+
+    def start_emulation(self) -> None:
+        # every emulation starts with a clean strategy state
+        self.__strategy = StrategyFactory.new_factory(
+            self.__strategy_name,
+            self.__strategy_settings
+        )
+        self.__test_result = TestResults()
+
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        # strategy doesn't depend on emulator state, so the candle can be analyzed first
+        self.__emulate_candle_signal(candle, self.__strategy.analyze_candle(candle))
+
+    def __emulate_candle_signal(self, candle: InternalCandle, signal: Optional[Signal]) -> None:
+        test_result = self.__test_result
+
+        if signal:
+            logger.info("New Signal: %s", signal)
+
+            if test_result.current_position:
+                # if position has been already opened
+                if test_result.current_position.signal.signal_type == signal.signal_type:
+                    # skip signal if new and current have the same type
+                    logger.info("Signal skipped. Old still alive")
+                elif signal.signal_type == SignalType.CLOSE:
+                    # close position if signal to Close position
+                    logger.info("Signal CLOSE. Close position")
+                    test_result.close_position(
+                        quotation_to_nano(candle.close),
+                        datetime_to_ns(candle.time),
+                        ExitReason.CLOSE_SIGNAL
+                    )
                 else:
-                    # no current position - open a new position
-                    logger.info("Open a new position")
-                    test_result.open_position(signal, quotation_to_decimal(candle.close))
+                    # close current position and open a new
+                    logger.info("Close current position and open a new")
+                    test_result.close_position(
+                        quotation_to_nano(candle.close),
+                        datetime_to_ns(candle.time),
+                        ExitReason.REVERSE_SIGNAL
+                    )
+                    test_result.open_position(signal, quotation_to_nano(candle.close), datetime_to_ns(candle.time))
+            else:
+                # no current position - open a new position
+                logger.info("Open a new position")
+                test_result.open_position(signal, quotation_to_nano(candle.close), datetime_to_ns(candle.time))
+
+    def snapshot(self) -> Optional[dict]:
+        return {
+            "strategy": self.__strategy,
+            "test_result": self.__test_result
+        }
+
+    def restore(self, state: dict) -> None:
+        self.__strategy = active_instrumentation().wrap_strategy(state["strategy"])
+        self.__test_result = state["test_result"]
 
+    def stop_emulation(self) -> TestResults:
         logger.info(f"Tests were completed")
 
-        return test_result
+        return self.__test_result
 
     def __str__(self):
         """Override method for better representation in test results"""
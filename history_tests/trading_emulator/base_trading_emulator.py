@@ -1,5 +1,9 @@
 import abc
+from typing import Optional
 
+from configuration.settings import StrategySettings
+from data_provider.candle_columns import CandleColumns
+from data_provider.internal_candle import InternalCandle
 from history_tests.test_results import TestResults
 
 __all__ = ("ITradingEmulator")
@@ -7,6 +11,54 @@ __all__ = ("ITradingEmulator")
 
 class ITradingEmulator(abc.ABC):
     """Interface to emulate different style of trading"""
+    @property
+    @abc.abstractmethod
+    def figi(self) -> str:
+        """Figi of instrument which candles are required for emulation"""
+        pass
+
+    @property
+    @abc.abstractmethod
+    def strategy_settings(self) -> StrategySettings:
+        pass
+
+    @property
+    @abc.abstractmethod
+    def batch_supported(self) -> bool:
+        """True if strategy of emulator is able to analyze all candles at once"""
+        pass
+
     @abc.abstractmethod
     def emulate_trading(self, from_days: int) -> TestResults:
         pass
+
+    @abc.abstractmethod
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        """Emulate trading on all candles at once. Batch strategy analysis is used if it's supported"""
+        pass
+
+    @abc.abstractmethod
+    def start_emulation(self) -> None:
+        """Prepare a new emulation: reset strategy state and test results"""
+        pass
+
+    @abc.abstractmethod
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        """Emulate trading on one more candle"""
+        pass
+
+    @abc.abstractmethod
+    def stop_emulation(self) -> TestResults:
+        """Complete current emulation and return results"""
+        pass
+
+    def snapshot(self) -> Optional[dict]:
+        """
+        State of current emulation (strategy, test results, emulator state) to continue it later by restore.
+        Returns None if emulator doesn't support it.
+        """
+        return None
+
+    def restore(self, state: dict) -> None:
+        """Continue emulation from the snapshot instead of start_emulation"""
+        raise NotImplementedError(f"{self.__class__.__name__} doesn't support snapshots")
@@ -0,0 +1,216 @@
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from data_provider.candle_columns import CandleColumns
+from history_tests.test_results import TestResults
+from history_tests.trade_ledger import ExitReason
+from trade_system.signal import SignalType
+from trade_system.signal_columns import SignalColumns
+
+__all__ = ("KernelPosition", "stop_take_positions", "moving_stop_positions", "fill_test_results")
+
+# the first bars after open are checked in a small window, the window grows for long positions
+_FIRST_WINDOW_SIZE = 64
+_MAX_WINDOW_SIZE = 65536
+
+
+@dataclass(eq=True, repr=True)
+class KernelPosition:
+    """
+    Position resolved by the kernel. All values are indexes or nano price units:
+    signal_position - position of signal in SignalColumns,
+    open_index and close_index - indexes of candles (close_index is -1 for position which is still open),
+    stop_loss_level - stop price level at the moment of close (or at the end of candles),
+    reversed - position is closed by reverse signal (not by stop or take).
+    """
+    signal_position: int
+    open_index: int
+    close_index: int
+    stop_loss_level: int
+    reversed: bool = False
+
+
+def stop_take_positions(
+        candles: CandleColumns,
+        signals: SignalColumns,
+        skip_reverse_signal: bool
+) -> list[KernelPosition]:
+    """
+    Resolve positions of StopTakeEmulator: position is closed by candle close price
+    if stop or take price level is between candle low and high.
+    """
+    high, low = candles.high, candles.low
+
+    def find_exit(position: int, open_index: int, last_index: int) -> tuple[int, int]:
+        stop = int(signals.stop_loss_level[position])
+        take = int(signals.take_profit_level[position])
+
+        def is_executed(start: int, end: int) -> np.ndarray:
+            window_low, window_high = low[start:end], high[start:end]
+            return ((window_low <= stop) & (stop <= window_high)) | ((window_low <= take) & (take <= window_high))
+
+        return _first_executed(open_index, last_index, is_executed), stop
+
+    return _walk_positions(candles, signals, skip_reverse_signal, find_exit)
+
+
+def moving_stop_positions(
+        candles: CandleColumns,
+        signals: SignalColumns,
+        skip_reverse_signal: bool,
+        update_stop_to_no_loss: bool
+) -> list[KernelPosition]:
+    """
+    Resolve positions of MovingStopEmulator.
+    Stop level follows close price with the same diff as it was on open. With no loss option stop level moves to
+    open price level as soon as close price has been better than open.
+    It means stop level for a candle depends on the best close price before the candle only,
+    so the level is calculated for all candles by running maximum (long) or minimum (short).
+    """
+    high, low, close = candles.high, candles.low, candles.close
+
+    def find_exit(position: int, open_index: int, last_index: int) -> tuple[int, int]:
+        open_level = int(close[open_index])
+        stop = int(signals.stop_loss_level[position])
+        signal_type = int(signals.signal_type[position])
+
+        if signal_type == SignalType.LONG:
+            best_of, is_better = np.maximum, np.greater
+        elif signal_type == SignalType.SHORT:
+            best_of, is_better = np.minimum, np.less
+        else:
+            # stop level isn't moved for other signals
+            def is_stop_executed(start: int, end: int) -> np.ndarray:
+                return (low[start:end] <= stop) & (stop <= high[start:end])
+
+            return _first_executed(open_index, last_index, is_stop_executed), stop
+
+        price_diff = open_level - stop
+
+        def stop_levels(best_closes: np.ndarray) -> np.ndarray:
+            levels = best_closes - price_diff
+            if update_stop_to_no_loss:
+                levels = np.where(is_better(best_closes, open_level), best_of(levels, open_level), levels)
+            return levels
+
+        # the best close price before the current window and stop levels of the window
+        best_close = open_level
+        window_start = 0
+        window_stops = np.empty(0, dtype=np.int64)
+
+        def is_stop_executed(start: int, end: int) -> np.ndarray:
+            nonlocal best_close, window_start, window_stops
+
+            best_closes = best_of.accumulate(np.concatenate(([best_close], close[start:end])))
+            window_start, window_stops = start, stop_levels(best_closes[:-1])
+            best_close = int(best_closes[-1])
+
+            return (low[start:end] <= window_stops) & (window_stops <= high[start:end])
+
+        exit_index = _first_executed(open_index, last_index, is_stop_executed)
+        if exit_index >= 0:
+            return exit_index, int(window_stops[exit_index - window_start])
+
+        # stop level after the last candle
+        return exit_index, int(stop_levels(np.array([best_close], dtype=np.int64))[0])
+
+    return _walk_positions(candles, signals, skip_reverse_signal, find_exit)
+
+
+def fill_test_results(
+        candles: CandleColumns,
+        signals: SignalColumns,
+        positions: list[KernelPosition],
+        figi: str
+) -> TestResults:
+    """
+    Make TestResults with the same levels as emulators make candle by candle.
+    Stop is checked before take by emulators, so it's the reason of close if both levels are in the candle.
+    """
+    test_result = TestResults()
+    high, low, close, time = candles.high, candles.low, candles.close, candles.time.view(np.int64)
+
+    for position in positions:
+        signal = signals.signal(position.signal_position, figi)
+        signal.stop_loss_level = position.stop_loss_level
+
+        open_index, close_index = position.open_index, position.close_index
+        test_result.open_position(signal, int(close[open_index]), int(time[open_index]))
+        if close_index >= 0:
+            if position.reversed:
+                exit_reason = ExitReason.REVERSE_SIGNAL
+            elif low[close_index] <= signal.stop_loss_level <= high[close_index]:
+                exit_reason = ExitReason.STOP_LOSS
+            else:
+                exit_reason = ExitReason.TAKE_PROFIT
+
+            test_result.close_position(int(close[close_index]), int(time[close_index]), exit_reason)
+
+    return test_result
+
+
+def _walk_positions(
+        candles: CandleColumns,
+        signals: SignalColumns,
+        skip_reverse_signal: bool,
+        find_exit: Callable[[int, int, int], tuple[int, int]]
+) -> list[KernelPosition]:
+    """
+    Walk through signals only: new signal opens position, the position is closed by stop (or take) or
+    by the next reverse signal. Signals of the same type as the current position are skipped.
+    """
+    positions: list[KernelPosition] = []
+    signal_index = signals.index
+    signals_count = len(signals)
+    last_candle = len(candles) - 1
+
+    # the nearest next signal with another type for every signal
+    type_changes = np.flatnonzero(signals.signal_type[1:] != signals.signal_type[:-1]) + 1
+    next_reverse = np.append(type_changes, signals_count)[
+        np.searchsorted(type_changes, np.arange(signals_count), side="right")
+    ]
+
+    position = 0
+    while position < signals_count:
+        open_index = int(signal_index[position])
+        reverse_position = signals_count if skip_reverse_signal else int(next_reverse[position])
+        last_index = int(signal_index[reverse_position]) if reverse_position < signals_count else last_candle
+
+        close_index, stop = find_exit(position, open_index, last_index)
+
+        if close_index >= 0:
+            positions.append(KernelPosition(position, open_index, close_index, stop))
+            # signal on the same candle opens a new position after stop or take
+            position = int(np.searchsorted(signal_index, close_index, side="left"))
+        elif reverse_position < signals_count:
+            positions.append(KernelPosition(position, open_index, last_index, stop, reversed=True))
+            position = reverse_position
+        else:
+            positions.append(KernelPosition(position, open_index, -1, stop))
+            break
+
+    return positions
+
+
+def _first_executed(
+        open_index: int,
+        last_index: int,
+        is_executed: Callable[[int, int], np.ndarray]
+) -> int:
+    """
+    Index of the first candle in (open_index, last_index] where is_executed is True, -1 if there isn't.
+    Candles are checked by growing windows, so a short position doesn't cost a check of all candles.
+    """
+    start, size = open_index + 1, _FIRST_WINDOW_SIZE
+    while start <= last_index:
+        end = min(start + size, last_index + 1)
+
+        executed = is_executed(start, end)
+        if executed.any():
+            return start + int(executed.argmax())
+
+        start, size = end, min(size * 2, _MAX_WINDOW_SIZE)
+
+    return -1
@@ -1,15 +1,19 @@
 import logging
-from decimal import Decimal
-
-from tinkoff.invest.utils import quotation_to_decimal
+from typing import Optional
 
 from configuration.settings import StrategySettings
 from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns, datetime_to_ns
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import quotation_to_nano
 from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
-from trade_system.signal import SignalType
+from history_tests.trading_emulator.execution_kernel import moving_stop_positions, fill_test_results
+from trade_system.signal import Signal, SignalType
 from trade_system.strategies.base_strategy import IStrategy
 from trade_system.strategies.strategy_factory import StrategyFactory
 from history_tests.test_results import TestResults
+from history_tests.trade_ledger import ExitReason
+from instrumentation.active_instrumentation import active_instrumentation
 
 __all__ = ("MovingStopEmulator")
 
@@ -29,6 +33,8 @@ class MovingStopEmulator(ITradingEmulator):
             skip_reverse_signal: bool,
             update_stop_to_no_loss: bool
     ) -> None:
+        self.__strategy_name = strategy_name
+        self.__strategy_settings = strategy_settings
         self.__strategy: IStrategy = StrategyFactory.new_factory(
             strategy_name,
             strategy_settings
@@ -38,6 +44,21 @@ class MovingStopEmulator(ITradingEmulator):
         self.__skip_reverse_signal = skip_reverse_signal
         self.__update_stop_to_no_loss = update_stop_to_no_loss
 
+        self.__test_result = TestResults()
+        self.__price_diff = 0
+
+    @property
+    def figi(self) -> str:
+        return self.__strategy.settings.figi
+
+    @property
+    def strategy_settings(self) -> StrategySettings:
+        return self.__strategy_settings
+
+    @property
+    def batch_supported(self) -> bool:
+        return self.__strategy.batch_supported
+
     def emulate_trading(
             self,
             from_days: int
@@ -45,83 +66,141 @@ class MovingStopEmulator(ITradingEmulator):
         logger.info(f"Start MovingStopEmulator test: {self.__strategy}, "
                     f"figi: {self.__strategy.settings.figi}, from_days: {from_days}")
 
-        test_result = TestResults()
-        price_diff = Decimal(0)
+        if self.batch_supported:
+            return self.emulate_columns(
+                self.__data_provider.provide_columns(self.__strategy.settings.figi, from_days)
+            )
+
+        self.start_emulation()
 
         for candle in self.__data_provider.provide(self.__strategy.settings.figi, from_days):
-            current_price_level = quotation_to_decimal(candle.close)
+            self.emulate_candle(candle)
+
+        return self.stop_emulation()
+
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        self.start_emulation()
+
+        signals = self.__strategy.analyze_candles(candles) if self.__strategy.batch_supported else None
+
+        if signals is None:
+            for candle in candles:
+                self.emulate_candle(candle)
+        else:
+            logger.info(f"Batch signals are used: {len(signals)}")
+
+            # stop and take levels are checked by the kernel for all candles of a position at once
+            positions = moving_stop_positions(
+                candles, signals, self.__skip_reverse_signal, self.__update_stop_to_no_loss
+            )
+            self.__test_result = fill_test_results(candles, signals, positions, self.figi)
+
+        return self.stop_emulation()
+
+    def start_emulation(self) -> None:
+        # every emulation starts with a clean strategy state
+        self.__strategy = StrategyFactory.new_factory(
+            self.__strategy_name,
+            self.__strategy_settings
+        )
+        self.__test_result = TestResults()
+        self.__price_diff = 0
+
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        # strategy doesn't depend on emulator state, so the candle can be analyzed first
+        self.__emulate_candle_signal(candle, self.__strategy.analyze_candle(candle))
+
+    def __emulate_candle_signal(self, candle: InternalCandle, signal: Optional[Signal]) -> None:
+        test_result = self.__test_result
+        current_price_level = quotation_to_nano(candle.close)
+
+        # Check price from candle for stop price level
+        if test_result.current_position:
+            high = quotation_to_nano(candle.high)
+            low = quotation_to_nano(candle.low)
+
+            # Logic is:
+            # if stop price level is between high and low, then stop will be executed
+            # candle.close is the nearest price level to emulate price of closed position
+            if low <= test_result.current_position.signal.stop_loss_level <= high:
+                logger.info("Test STOP LOSS executed")
+                logger.info("CANDLE: %s", candle)
+                logger.info("Signal: %s", test_result.current_position.signal)
+
+                test_result.close_position(current_price_level, datetime_to_ns(candle.time), ExitReason.STOP_LOSS)
+            else:
+                # if price level moved on high (long) or low (short) price, then stop price level will be moved also
+                current_price_diff = current_price_level - self.__price_diff
+                logger.debug("Current price diff with stop %s", current_price_diff)
+
+                # Long
+                if test_result.current_position.signal.signal_type == SignalType.LONG:
+                    # if current price goes up then stop level will rise also
+                    if current_price_diff > test_result.current_position.signal.stop_loss_level:
+                        test_result.current_position.signal.stop_loss_level = current_price_diff
+                        logger.info("Update stop level (diff) to %s", test_result.current_position.signal.stop_loss_level)
+
+                    # update stop level to open position if price higher than open
+                    # stop to "NO LOSS" price level
+                    if self.__update_stop_to_no_loss \
+                            and test_result.current_position.signal.stop_loss_level < test_result.current_position.open_level < current_price_level:
+                        test_result.current_position.signal.stop_loss_level = test_result.current_position.open_level
+                        logger.info("Update stop level (open) to %s", test_result.current_position.signal.stop_loss_level)
+
+                # Short
+                elif test_result.current_position.signal.signal_type == SignalType.SHORT:
+                    # if current price goes down then stop level will down also
+                    if current_price_diff < test_result.current_position.signal.stop_loss_level:
+                        test_result.current_position.signal.stop_loss_level = current_price_diff
+                        logger.info("Update stop level (diff) to %s", test_result.current_position.signal.stop_loss_level)
+
+                    # update stop level to open position if price lower than open
+                    # stop to "NO LOSS" price level
+                    if self.__update_stop_to_no_loss \
+                            and test_result.current_position.signal.stop_loss_level > test_result.current_position.open_level > current_price_level:
+                        test_result.current_position.signal.stop_loss_level = test_result.current_position.open_level
+                        logger.info("Update stop level to (open) %s", test_result.current_position.signal.stop_loss_level)
+
+        if signal:
+            logger.info("New Signal: %s", signal)
 
-            # Check price from candle for stop price level
             if test_result.current_position:
-                high = quotation_to_decimal(candle.high)
-                low = quotation_to_decimal(candle.low)
-
-                # Logic is:
-                # if stop price level is between high and low, then stop will be executed
-                # candle.close is the nearest price level to emulate price of closed position
-                if low <= test_result.current_position.signal.stop_loss_level <= high:
-                    logger.info("Test STOP LOSS executed")
-                    logger.info(f"CANDLE: {candle}")
-                    logger.info(f"Signal: {test_result.current_position.signal}")
-
-                    test_result.close_position(current_price_level)
+                # skip signal if skip setting is on or signals have the same type
+                if self.__skip_reverse_signal \
+                        or test_result.current_position.signal.signal_type == signal.signal_type:
+                    logger.info("Signal skipped. Old still alive")
+                    return
                 else:
-                    # if price level moved on high (long) or low (short) price, then stop price level will be moved also
-                    current_price_diff = current_price_level - price_diff
-                    logger.info(f"Current price diff with stop {current_price_diff}")
-
-                    # Long
-                    if test_result.current_position.signal.signal_type == SignalType.LONG:
-                        # if current price goes up then stop level will rise also
-                        if current_price_diff > test_result.current_position.signal.stop_loss_level:
-                            test_result.current_position.signal.stop_loss_level = current_price_diff
-                            logger.info(f"Update stop level (diff) to {test_result.current_position.signal.stop_loss_level}")
-
-                        # update stop level to open position if price higher than open
-                        # stop to "NO LOSS" price level
-                        if self.__update_stop_to_no_loss \
-                                and test_result.current_position.signal.stop_loss_level < test_result.current_position.open_level < current_price_level:
-                            test_result.current_position.signal.stop_loss_level = test_result.current_position.open_level
-                            logger.info(f"Update stop level (open) to {test_result.current_position.signal.stop_loss_level}")
-
-                    # Short
-                    elif test_result.current_position.signal.signal_type == SignalType.SHORT:
-                        # if current price goes down then stop level will down also
-                        if current_price_diff < test_result.current_position.signal.stop_loss_level:
-                            test_result.current_position.signal.stop_loss_level = current_price_diff
-                            logger.info(f"Update stop level (diff) to {test_result.current_position.signal.stop_loss_level}")
-
-                        # update stop level to open position if price lower than open
-                        # stop to "NO LOSS" price level
-                        if self.__update_stop_to_no_loss \
-                                and test_result.current_position.signal.stop_loss_level > test_result.current_position.open_level > current_price_level:
-                            test_result.current_position.signal.stop_loss_level = test_result.current_position.open_level
-                            logger.info(f"Update stop level to (open) {test_result.current_position.signal.stop_loss_level}")
-
-            signal = self.__strategy.analyze_candle(candle)
-            if signal:
-                logger.info(f"New Signal: {signal}")
-
-                if test_result.current_position:
-                    # skip signal if skip setting is on or signals have the same type
-                    if self.__skip_reverse_signal \
-                            or test_result.current_position.signal.signal_type == signal.signal_type:
-                        logger.info("Signal skipped. Old still alive")
-                        continue
-                    else:
-                        # close current position and open a new
-                        test_result.close_position(current_price_level)
-
-                # candle.close is the nearest price level to emulate price of open position
-                test_result.open_position(signal, current_price_level)
-
-                # save diff from signal to move stop
-                price_diff = current_price_level - signal.stop_loss_level
-                logger.info(f"New price diff: {price_diff}")
-
+                    # close current position and open a new
+                    test_result.close_position(
+                        current_price_level,
+                        datetime_to_ns(candle.time),
+                        ExitReason.REVERSE_SIGNAL
+                    )
+
+            # candle.close is the nearest price level to emulate price of open position
+            test_result.open_position(signal, current_price_level, datetime_to_ns(candle.time))
+
+            # save diff from signal to move stop
+            self.__price_diff = current_price_level - signal.stop_loss_level
+            logger.info("New price diff: %s", self.__price_diff)
+
+    def snapshot(self) -> Optional[dict]:
+        return {
+            "strategy": self.__strategy,
+            "test_result": self.__test_result,
+            "price_diff": self.__price_diff
+        }
+
+    def restore(self, state: dict) -> None:
+        self.__strategy = active_instrumentation().wrap_strategy(state["strategy"])
+        self.__test_result = state["test_result"]
+        self.__price_diff = state["price_diff"]
+
+    def stop_emulation(self) -> TestResults:
         logger.info(f"Tests were completed")
 
-        return test_result
+        return self.__test_result
 
     def __str__(self):
         """Override method for better representation in test results"""
@@ -1,13 +1,19 @@
 import logging
-
-from tinkoff.invest.utils import quotation_to_decimal
+from typing import Optional
 
 from configuration.settings import StrategySettings
 from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns, datetime_to_ns
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import quotation_to_nano
 from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from history_tests.trading_emulator.execution_kernel import stop_take_positions, fill_test_results
+from trade_system.signal import Signal
 from trade_system.strategies.base_strategy import IStrategy
 from trade_system.strategies.strategy_factory import StrategyFactory
 from history_tests.test_results import TestResults
+from history_tests.trade_ledger import ExitReason
+from instrumentation.active_instrumentation import active_instrumentation
 
 __all__ = ("StopTakeEmulator")
 
@@ -26,6 +32,8 @@ class StopTakeEmulator(ITradingEmulator):
             data_provider: IDataProvider,
             skip_reverse_signal: bool
     ) -> None:
+        self.__strategy_name = strategy_name
+        self.__strategy_settings = strategy_settings
         self.__strategy: IStrategy = StrategyFactory.new_factory(
             strategy_name,
             strategy_settings
@@ -33,6 +41,20 @@ class StopTakeEmulator(ITradingEmulator):
         self.__data_provider = data_provider
         self.__skip_reverse_signal = skip_reverse_signal
 
+        self.__test_result = TestResults()
+
+    @property
+    def figi(self) -> str:
+        return self.__strategy.settings.figi
+
+    @property
+    def strategy_settings(self) -> StrategySettings:
+        return self.__strategy_settings
+
+    @property
+    def batch_supported(self) -> bool:
+        return self.__strategy.batch_supported
+
     def emulate_trading(
             self,
             from_days: int
@@ -41,52 +63,114 @@ class StopTakeEmulator(ITradingEmulator):
             f"Start StopTakeEmulator test: {self.__strategy}, figi: {self.__strategy.settings.figi}, "
             f"from_days: {from_days}")
 
-        test_result = TestResults()
+        if self.batch_supported:
+            return self.emulate_columns(
+                self.__data_provider.provide_columns(self.__strategy.settings.figi, from_days)
+            )
 
-        for candle in self.__data_provider.provide(self.__strategy.settings.figi, from_days):
-            # Check price from candle for take or stop price level
-            if test_result.current_position:
-                high = quotation_to_decimal(candle.high)
-                low = quotation_to_decimal(candle.low)
+        self.start_emulation()
 
-                # Logic is:
-                # if stop or take price level is between high and low, then stop or take will be executed
-                # candle.close is the nearest price level to emulate price of closed position
-                if low <= test_result.current_position.signal.stop_loss_level <= high:
-                    logger.info("Test STOP LOSS executed")
-                    logger.info(f"CANDLE: {candle}")
-                    logger.info(f"Signal: {test_result.current_position.signal}")
+        for candle in self.__data_provider.provide(self.__strategy.settings.figi, from_days):
+            self.emulate_candle(candle)
 
-                    test_result.close_position(quotation_to_decimal(candle.close))
+        return self.stop_emulation()
 
-                elif low <= test_result.current_position.signal.take_profit_level <= high:
-                    logger.info("Test TAKE PROFIT executed")
-                    logger.info(f"CANDLE: {candle}")
-                    logger.info(f"Signal: {test_result.current_position.signal}")
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        self.start_emulation()
 
-                    test_result.close_position(quotation_to_decimal(candle.close))
+        signals = self.__strategy.analyze_candles(candles) if self.__strategy.batch_supported else None
 
-            signal = self.__strategy.analyze_candle(candle)
+        if signals is None:
+            for candle in candles:
+                self.emulate_candle(candle)
+        else:
+            logger.info(f"Batch signals are used: {len(signals)}")
 
-            if signal:
-                logger.info(f"New Signal: {signal}")
+            # stop and take levels are checked by the kernel for all candles of a position at once
+            positions = stop_take_positions(candles, signals, self.__skip_reverse_signal)
+            self.__test_result = fill_test_results(candles, signals, positions, self.figi)
 
-                if test_result.current_position:
-                    # skip signal if skip setting is on or signals have the same type
-                    if self.__skip_reverse_signal \
-                            or test_result.current_position.signal.signal_type == signal.signal_type:
-                        logger.info("Signal skipped. Old still alive")
-                        continue
-                    else:
-                        # close current position and open a new
-                        test_result.close_position(quotation_to_decimal(candle.close))
+        return self.stop_emulation()
 
-                # candle.close is the nearest price level to emulate price of open position
-                test_result.open_position(signal, quotation_to_decimal(candle.close))
+    def start_emulation(self) -> None:
+        # every emulation starts with a clean strategy state
+        self.__strategy = StrategyFactory.new_factory(
+            self.__strategy_name,
+            self.__strategy_settings
+        )
+        self.__test_result = TestResults()
+
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        # strategy doesn't depend on emulator state, so the candle can be analyzed first
+        self.__emulate_candle_signal(candle, self.__strategy.analyze_candle(candle))
+
+    def __emulate_candle_signal(self, candle: InternalCandle, signal: Optional[Signal]) -> None:
+        test_result = self.__test_result
+
+        # Check price from candle for take or stop price level
+        if test_result.current_position:
+            high = quotation_to_nano(candle.high)
+            low = quotation_to_nano(candle.low)
+
+            # Logic is:
+            # if stop or take price level is between high and low, then stop or take will be executed
+            # candle.close is the nearest price level to emulate price of closed position
+            if low <= test_result.current_position.signal.stop_loss_level <= high:
+                logger.info("Test STOP LOSS executed")
+                logger.info("CANDLE: %s", candle)
+                logger.info("Signal: %s", test_result.current_position.signal)
+
+                test_result.close_position(
+                    quotation_to_nano(candle.close),
+                    datetime_to_ns(candle.time),
+                    ExitReason.STOP_LOSS
+                )
+
+            elif low <= test_result.current_position.signal.take_profit_level <= high:
+                logger.info("Test TAKE PROFIT executed")
+                logger.info("CANDLE: %s", candle)
+                logger.info("Signal: %s", test_result.current_position.signal)
+
+                test_result.close_position(
+                    quotation_to_nano(candle.close),
+                    datetime_to_ns(candle.time),
+                    ExitReason.TAKE_PROFIT
+                )
+
+        if signal:
+            logger.info("New Signal: %s", signal)
 
+            if test_result.current_position:
+                # skip signal if skip setting is on or signals have the same type
+                if self.__skip_reverse_signal \
+                        or test_result.current_position.signal.signal_type == signal.signal_type:
+                    logger.info("Signal skipped. Old still alive")
+                    return
+                else:
+                    # close current position and open a new
+                    test_result.close_position(
+                        quotation_to_nano(candle.close),
+                        datetime_to_ns(candle.time),
+                        ExitReason.REVERSE_SIGNAL
+                    )
+
+            # candle.close is the nearest price level to emulate price of open position
+            test_result.open_position(signal, quotation_to_nano(candle.close), datetime_to_ns(candle.time))
+
+    def snapshot(self) -> Optional[dict]:
+        return {
+            "strategy": self.__strategy,
+            "test_result": self.__test_result
+        }
+
+    def restore(self, state: dict) -> None:
+        self.__strategy = active_instrumentation().wrap_strategy(state["strategy"])
+        self.__test_result = state["test_result"]
+
+    def stop_emulation(self) -> TestResults:
         logger.info(f"Tests were completed")
 
-        return test_result
+        return self.__test_result
 
     def __str__(self):
         """Override method for better representation in test results"""
@@ -0,0 +1,176 @@
+import logging
+from typing import Optional
+
+from configuration.settings import StrategySettings
+from data_provider.base_tick_data_provider import ITickDataProvider
+from data_provider.candle_columns import CandleColumns, datetime_to_ns
+from data_provider.internal_candle import InternalCandle
+from data_provider.tick import Tick
+from data_provider.tick_candle_builder import TickCandleBuilder
+from history_tests.test_results import TestResults
+from history_tests.trade_ledger import ExitReason
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from invest_api.utils import quotation_to_nano
+from trade_system.signal import Signal, SignalType
+from trade_system.strategies.base_strategy import IStrategy
+from trade_system.strategies.strategy_factory import StrategyFactory
+
+__all__ = ("TickEmulator")
+
+logger = logging.getLogger(__name__)
+
+
+class TickEmulator(ITradingEmulator):
+    """
+    Class encapsulate trading based on stop and take price levels from strategy signals on ticks.
+    Strategy analyzes candles, which are built from ticks on the fly.
+    Signal of completed candle opens position by the price of the next tick.
+    Stop loss is executed by the price of the first tick which crosses stop level (market order),
+    take profit is executed by take level (limit order) on the first tick which reaches it.
+    Without ticks (candles only) every candle is replayed as ticks open, low, high, close
+    (high before low for falling candle).
+    """
+
+    def __init__(
+            self,
+            strategy_name: str,
+            strategy_settings: StrategySettings,
+            data_provider: ITickDataProvider,
+            skip_reverse_signal: bool
+    ) -> None:
+        self.__strategy_name = strategy_name
+        self.__strategy_settings = strategy_settings
+        self.__strategy: IStrategy = StrategyFactory.new_factory(
+            strategy_name,
+            strategy_settings
+        )
+        self.__data_provider = data_provider
+        self.__skip_reverse_signal = skip_reverse_signal
+
+        self.__test_result = TestResults()
+        # signal of the last completed candle, it's executed by the next tick
+        self.__pending_signal: Optional[Signal] = None
+
+    @property
+    def figi(self) -> str:
+        return self.__strategy.settings.figi
+
+    @property
+    def strategy_settings(self) -> StrategySettings:
+        return self.__strategy_settings
+
+    @property
+    def batch_supported(self) -> bool:
+        # every tick is required for execution, so signals are calculated candle by candle
+        return False
+
+    def emulate_trading(
+            self,
+            from_days: int
+    ) -> TestResults:
+        logger.info(
+            f"Start TickEmulator test: {self.__strategy}, figi: {self.__strategy.settings.figi}, "
+            f"from_days: {from_days}")
+
+        self.start_emulation()
+
+        candle_builder = TickCandleBuilder()
+        ticks_count = 0
+
+        for tick in self.__data_provider.provide_ticks(self.__strategy.settings.figi, from_days):
+            candle = candle_builder.add(tick)
+            if candle:
+                self.__pending_signal = self.__strategy.analyze_candle(candle)
+
+            self.emulate_tick(tick)
+            ticks_count += 1
+
+        # signal of the last candle can't be executed, there are no more ticks
+        candle = candle_builder.flush()
+        if candle:
+            self.__strategy.analyze_candle(candle)
+
+        logger.info(f"Ticks have been emulated: {ticks_count}")
+
+        return self.stop_emulation()
+
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        self.start_emulation()
+
+        for candle in candles:
+            self.emulate_candle(candle)
+
+        return self.stop_emulation()
+
+    def start_emulation(self) -> None:
+        # every emulation starts with a clean strategy state
+        self.__strategy = StrategyFactory.new_factory(
+            self.__strategy_name,
+            self.__strategy_settings
+        )
+        self.__test_result = TestResults()
+        self.__pending_signal = None
+
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        time_ns = datetime_to_ns(candle.time)
+        open_, high, low, close = \
+            quotation_to_nano(candle.open), quotation_to_nano(candle.high), \
+            quotation_to_nano(candle.low), quotation_to_nano(candle.close)
+
+        for price in (open_, low, high, close) if close >= open_ else (open_, high, low, close):
+            self.emulate_tick(Tick(time_ns, price, 0))
+
+        # candle close is the nearest price level to emulate price of open position
+        self.__pending_signal = self.__strategy.analyze_candle(candle)
+        self.emulate_tick(Tick(time_ns, close, 0))
+
+    def emulate_tick(self, tick: Tick) -> None:
+        test_result = self.__test_result
+        position = test_result.current_position
+
+        if position:
+            signal = position.signal
+            is_long = signal.signal_type == SignalType.LONG
+
+            if tick.price <= signal.stop_loss_level if is_long else tick.price >= signal.stop_loss_level:
+                logger.info("Test STOP LOSS executed")
+                logger.info("Tick: %s", tick)
+                logger.info("Signal: %s", signal)
+
+                test_result.close_position(tick.price, tick.time_ns, ExitReason.STOP_LOSS)
+
+            elif tick.price >= signal.take_profit_level if is_long else tick.price <= signal.take_profit_level:
+                logger.info("Test TAKE PROFIT executed")
+                logger.info("Tick: %s", tick)
+                logger.info("Signal: %s", signal)
+
+                test_result.close_position(signal.take_profit_level, tick.time_ns, ExitReason.TAKE_PROFIT)
+
+        if self.__pending_signal:
+            signal, self.__pending_signal = self.__pending_signal, None
+            self.__emulate_signal(signal, tick)
+
+    def __emulate_signal(self, signal: Signal, tick: Tick) -> None:
+        test_result = self.__test_result
+        logger.info("New Signal: %s", signal)
+
+        if test_result.current_position:
+            # skip signal if skip setting is on or signals have the same type
+            if self.__skip_reverse_signal \
+                    or test_result.current_position.signal.signal_type == signal.signal_type:
+                logger.info("Signal skipped. Old still alive")
+                return
+            else:
+                # close current position and open a new
+                test_result.close_position(tick.price, tick.time_ns, ExitReason.REVERSE_SIGNAL)
+
+        test_result.open_position(signal, tick.price, tick.time_ns)
+
+    def stop_emulation(self) -> TestResults:
+        logger.info(f"Tests were completed")
+
+        return self.__test_result
+
+    def __str__(self):
+        """Override method for better representation in test results"""
+        return f"{self.__class__.__name__}(skip_reverse_signal={self.__skip_reverse_signal})"
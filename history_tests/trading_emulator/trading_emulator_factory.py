@@ -0,0 +1,45 @@
+from typing import Optional
+
+from configuration.settings import StrategySettings
+from data_provider.base_data_provider import IDataProvider
+from data_provider.base_tick_data_provider import ITickDataProvider
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from history_tests.trading_emulator.moving_stop_emulator import MovingStopEmulator
+from history_tests.trading_emulator.stop_take_emulator import StopTakeEmulator
+from history_tests.trading_emulator.tick_emulator import TickEmulator
+
+__all__ = ("TradingEmulatorFactory")
+
+
+class TradingEmulatorFactory:
+    """
+    Fabric for trading emulators. Put here a new emulator to use it in every test.
+    """
+    @staticmethod
+    def new_emulators(
+            strategy_settings: StrategySettings,
+            data_provider: Optional[IDataProvider] = None
+    ) -> list[ITradingEmulator]:
+        """
+        Create all available trading emulators for the strategy.
+        Data provider isn't required if candles are given to emulators directly (see emulate_columns)
+        """
+        return [
+            MovingStopEmulator(strategy_settings.name, strategy_settings, data_provider, True, True),
+            MovingStopEmulator(strategy_settings.name, strategy_settings, data_provider, True, False),
+            MovingStopEmulator(strategy_settings.name, strategy_settings, data_provider, False, True),
+            MovingStopEmulator(strategy_settings.name, strategy_settings, data_provider, False, False),
+            StopTakeEmulator(strategy_settings.name, strategy_settings, data_provider, True),
+            StopTakeEmulator(strategy_settings.name, strategy_settings, data_provider, False)
+        ]
+
+    @staticmethod
+    def new_tick_emulators(
+            strategy_settings: StrategySettings,
+            data_provider: ITickDataProvider
+    ) -> list[ITradingEmulator]:
+        """Create trading emulators which replay ticks of the data provider"""
+        return [
+            TickEmulator(strategy_settings.name, strategy_settings, data_provider, True),
+            TickEmulator(strategy_settings.name, strategy_settings, data_provider, False)
+        ]
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+__all__ = ("BacktestWindow", "explicit_windows", "rolling_windows")
+
+
+@dataclass(frozen=True, repr=True)
+class BacktestWindow:
+    """
+    Test period [start, end) with optional train period [train_start, start) before it.
+    Settings of strategy are chosen on train period (if ranges of settings are specified) and tested on test period.
+    """
+    start: datetime
+    end: datetime
+    train_start: Optional[datetime] = None
+
+    @property
+    def name(self) -> str:
+        train = f"train {self.train_start.date()}, " if self.train_start else ""
+        return f"{train}test {self.start.date()} - {self.end.date()}"
+
+
+def explicit_windows(ranges: list[tuple[datetime, datetime]], train_days: int = 0) -> list[BacktestWindow]:
+    """Windows of test periods [start, end) with train period of `train_days` before every of them"""
+    return [
+        BacktestWindow(
+            start=start,
+            end=end,
+            train_start=start - timedelta(days=train_days) if train_days > 0 else None
+        )
+        for start, end in ranges
+    ]
+
+
+def rolling_windows(
+        start: datetime,
+        end: datetime,
+        test_days: int,
+        train_days: int = 0,
+        step_days: int = 0,
+        anchored: bool = False
+) -> list[BacktestWindow]:
+    """
+    Windows of walk-forward analysis in [start, end).
+    The first test period starts after `train_days` from start, every next one is shifted by `step_days`
+    (test_days by default, windows overlap if step is shorter). The last test period is cut by end.
+    Train period is `train_days` before test period or all time from start (anchored).
+    """
+    if test_days <= 0:
+        raise Exception(f"Test days of window must be positive: {test_days}")
+
+    step = timedelta(days=step_days if step_days > 0 else test_days)
+    windows: list[BacktestWindow] = []
+
+    test_start = start + timedelta(days=train_days)
+    while test_start < end:
+        train_start = (start if anchored else test_start - timedelta(days=train_days)) if train_days > 0 else None
+
+        windows.append(
+            BacktestWindow(
+                start=test_start,
+                end=min(test_start + timedelta(days=test_days), end),
+                train_start=train_start
+            )
+        )
+        test_start += step
+
+    return windows
@@ -0,0 +1,185 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from configuration.settings import CommissionSettings, StrategySettings
+from data_provider.candle_columns import CandleColumns
+from data_provider.columnar.shared_candle_columns import SharedCandleColumns
+from history_tests.sweep.parameter_sweep import SweepResult, make_sweep_result
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.trading_emulator_factory import TradingEmulatorFactory
+from history_tests.walk_forward.backtest_window import BacktestWindow
+from trade_system.commissions.base_commission import ICommissionCalculator
+from trade_system.commissions.commissions import CommissionEveryOrderCalculator
+
+__all__ = ("WalkForwardRunner", "WindowResult")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False, repr=True)
+class WindowResult:
+    window: BacktestWindow
+    candles_count: int = 0
+    # results on test period for every emulator (with settings chosen on train period)
+    results: list[SweepResult] = field(default_factory=list)
+    test_results: dict[str, TestResults] = field(default_factory=dict)
+
+
+class WalkForwardRunner:
+    """
+    Backtests of strategy on many windows (explicit or rolling, see rolling_windows) in parallel processes.
+    Candles of all windows are loaded once and shared with worker processes via shared memory,
+    every window is a slice of them.
+    If ranges of settings (combinations) are specified, every emulator gets the best settings by net profit
+    on train period of the window and is tested with them on test period (walk-forward analysis).
+    Every window is tested by a new strategy instance (without state from previous candles).
+    """
+
+    def __init__(
+            self,
+            strategy_settings: StrategySettings,
+            commission_settings: CommissionSettings,
+            max_workers: int = 0
+    ) -> None:
+        self.__strategy_settings = strategy_settings
+        self.__commission_settings = commission_settings
+        self.__max_workers = max_workers if max_workers > 0 else os.cpu_count()
+
+    def run(
+            self,
+            candles: CandleColumns,
+            windows: list[BacktestWindow],
+            combinations: Optional[list[dict]] = None
+    ) -> list[WindowResult]:
+        logger.info(f"Start walk-forward tests: windows: {len(windows)}, candles: {len(candles)}, "
+                    f"combinations: {len(combinations) if combinations else 0}, workers: {self.__max_workers}")
+
+        shared_candles = SharedCandleColumns.publish(candles)
+
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=self.__max_workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        shared_candles.name,
+                        shared_candles.length,
+                        self.__strategy_settings,
+                        self.__commission_settings,
+                        combinations or []
+                    )
+            ) as executor:
+                # results are in order of windows
+                window_results = list(executor.map(_test_window, windows))
+        finally:
+            shared_candles.close(unlink=True)
+
+        logger.info(f"Walk-forward tests have been completed: windows: {len(window_results)}")
+
+        return window_results
+
+    @staticmethod
+    def merge_results(window_results: list[WindowResult]) -> dict[str, TestResults]:
+        """
+        Executed orders of all windows for every emulator (aggregated result).
+        Orders of overlapped windows are counted in every window.
+        """
+        merged_results: dict[str, TestResults] = dict()
+
+        for window_result in window_results:
+            for emulator_name, test_result in window_result.test_results.items():
+                merged_results.setdefault(emulator_name, TestResults()).merge_executed_orders(test_result)
+
+        return merged_results
+
+
+# state of worker process
+_worker_candles: Optional[SharedCandleColumns] = None
+_worker_strategy_settings: Optional[StrategySettings] = None
+_worker_commission_calculator: Optional[ICommissionCalculator] = None
+_worker_combinations: list[dict] = []
+
+
+def _init_worker(
+        candles_name: str,
+        candles_length: int,
+        strategy_settings: StrategySettings,
+        commission_settings: CommissionSettings,
+        combinations: list[dict]
+) -> None:
+    global _worker_candles, _worker_strategy_settings, _worker_commission_calculator, _worker_combinations
+
+    # detailed logs of every emulation are useless for many windows
+    logging.getLogger().setLevel(logging.WARNING)
+
+    _worker_candles = SharedCandleColumns.attach(candles_name, candles_length)
+    _worker_strategy_settings = strategy_settings
+    _worker_commission_calculator = CommissionEveryOrderCalculator(commission_settings)
+    _worker_combinations = combinations
+
+
+def _test_window(window: BacktestWindow) -> WindowResult:
+    candles = _worker_candles.columns
+    test_candles = candles.time_slice(window.start, window.end)
+    window_result = WindowResult(window=window, candles_count=len(test_candles))
+
+    try:
+        # emulator name -> settings for test period
+        emulators_settings = _train_window(candles.time_slice(window.train_start, window.start)) \
+            if _worker_combinations and window.train_start else {}
+
+        # emulators with the same settings are created together
+        for settings in _unique_settings(emulators_settings):
+            for trading_emulator in TradingEmulatorFactory.new_emulators(
+                    replace(_worker_strategy_settings, settings=settings)
+            ):
+                emulator_name = str(trading_emulator)
+                if emulators_settings.get(emulator_name, _worker_strategy_settings.settings) is not settings:
+                    continue
+
+                test_result = trading_emulator.emulate_columns(test_candles)
+
+                window_result.test_results[emulator_name] = test_result
+                window_result.results.append(
+                    make_sweep_result(settings, emulator_name, test_result, _worker_commission_calculator)
+                )
+
+    except Exception as ex:
+        logger.error(f"Walk-forward testing error: window: {window.name}, {repr(ex)}")
+
+    return window_result
+
+
+def _train_window(train_candles: CandleColumns) -> dict[str, dict]:
+    """The best settings by net profit on train period for every emulator"""
+    best_results: dict[str, SweepResult] = dict()
+
+    for settings in _worker_combinations:
+        for trading_emulator in TradingEmulatorFactory.new_emulators(
+                replace(_worker_strategy_settings, settings=settings)
+        ):
+            result = make_sweep_result(
+                settings,
+                str(trading_emulator),
+                trading_emulator.emulate_columns(train_candles),
+                _worker_commission_calculator
+            )
+
+            best_result = best_results.get(result.emulator)
+            if best_result is None or result.net_profit > best_result.net_profit:
+                best_results[result.emulator] = result
+
+    return {emulator_name: result.settings for emulator_name, result in best_results.items()}
+
+
+def _unique_settings(emulators_settings: dict[str, dict]) -> list[dict]:
+    """Settings to test: chosen settings of emulators or strategy settings for emulators without training"""
+    unique_settings = [_worker_strategy_settings.settings]
+
+    for settings in emulators_settings.values():
+        if all(settings is not x for x in unique_settings):
+            unique_settings.append(settings)
+
+    return unique_settings
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Generator
+
+from instrumentation.base_instrumentation import IInstrumentation
+from instrumentation.null_instrumentation import NullInstrumentation
+
+__all__ = ("active_instrumentation", "activate_instrumentation")
+
+# strategies are created by emulators (StrategyFactory), so instrumentation of current test is kept in context
+_active_instrumentation: ContextVar[IInstrumentation] = ContextVar(
+    "active_instrumentation",
+    default=NullInstrumentation()
+)
+
+
+def active_instrumentation() -> IInstrumentation:
+    return _active_instrumentation.get()
+
+
+@contextmanager
+def activate_instrumentation(instrumentation: IInstrumentation) -> Generator[IInstrumentation, None, None]:
+    token = _active_instrumentation.set(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        _active_instrumentation.reset(token)
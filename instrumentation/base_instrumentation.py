@@ -0,0 +1,65 @@
+import abc
+from dataclasses import dataclass
+
+from data_provider.base_data_provider import IDataProvider
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from trade_system.strategies.base_strategy import IStrategy
+
+__all__ = ("IInstrumentation", "EmulatorStats")
+
+
+@dataclass(eq=False, repr=True)
+class EmulatorStats:
+    # time spent in emulator calls including strategy and data provider calls inside them
+    seconds: float = 0.0
+    runs: int = 0
+    positions_opened: int = 0
+    positions_closed: int = 0
+
+
+class IInstrumentation(abc.ABC):
+    """
+    Counters and timers of history tests.
+    Components (data provider, strategies, emulators) are wrapped by instrumented proxies,
+    so nothing is measured and nothing is called per candle if instrumentation is disabled.
+    """
+    @property
+    @abc.abstractmethod
+    def enabled(self) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    @abc.abstractmethod
+    def start(self, stage: str) -> None:
+        """Start timer of stage. Timers are exclusive: nested stage pauses the outer one"""
+        pass
+
+    @abc.abstractmethod
+    def stop(self) -> None:
+        """Stop timer of the last started stage"""
+        pass
+
+    @abc.abstractmethod
+    def add_emulator_run(self, name: str, seconds: float, test_results: TestResults) -> None:
+        pass
+
+    @abc.abstractmethod
+    def wrap_data_provider(self, data_provider: IDataProvider) -> IDataProvider:
+        pass
+
+    @abc.abstractmethod
+    def wrap_strategy(self, strategy: IStrategy) -> IStrategy:
+        pass
+
+    @abc.abstractmethod
+    def wrap_emulator(self, trading_emulator: ITradingEmulator) -> ITradingEmulator:
+        pass
+
+    @abc.abstractmethod
+    def export(self) -> None:
+        """Write collected counters, timers and profiles"""
+        pass
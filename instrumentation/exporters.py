@@ -0,0 +1,69 @@
+import json
+import os
+from pathlib import Path
+
+from instrumentation.base_instrumentation import EmulatorStats
+
+__all__ = ("to_json", "to_prometheus", "write_file")
+
+_METRIC_PREFIX = "backtest"
+
+
+def to_json(counters: dict[str, int], timers: dict[str, float], emulators: dict[str, EmulatorStats]) -> str:
+    return json.dumps(
+        {
+            "counters": counters,
+            "timers_seconds": timers,
+            "emulators": {
+                name: {
+                    "seconds": stats.seconds,
+                    "runs": stats.runs,
+                    "positions_opened": stats.positions_opened,
+                    "positions_closed": stats.positions_closed
+                }
+                for name, stats in emulators.items()
+            }
+        },
+        indent=2
+    )
+
+
+def to_prometheus(
+        counters: dict[str, int],
+        timers: dict[str, float],
+        emulators: dict[str, EmulatorStats]
+) -> str:
+    """Prometheus text format (for textfile collector of node exporter)"""
+    lines: list[str] = []
+
+    for name, value in counters.items():
+        lines.append(f"# TYPE {_METRIC_PREFIX}_{name}_total counter")
+        lines.append(f"{_METRIC_PREFIX}_{name}_total {value}")
+
+    lines.append(f"# TYPE {_METRIC_PREFIX}_stage_seconds_total counter")
+    for stage, seconds in timers.items():
+        lines.append(f'{_METRIC_PREFIX}_stage_seconds_total{{stage="{_label(stage)}"}} {seconds}')
+
+    lines.append(f"# TYPE {_METRIC_PREFIX}_emulator_seconds_total counter")
+    for name, stats in emulators.items():
+        lines.append(f'{_METRIC_PREFIX}_emulator_seconds_total{{emulator="{_label(name)}"}} {stats.seconds}')
+
+    lines.append(f"# TYPE {_METRIC_PREFIX}_emulator_positions_closed_total counter")
+    for name, stats in emulators.items():
+        lines.append(
+            f'{_METRIC_PREFIX}_emulator_positions_closed_total{{emulator="{_label(name)}"}} {stats.positions_closed}'
+        )
+
+    return "\n".join(lines) + "\n"
+
+
+def write_file(file_name: Path, text: str) -> None:
+    # textfile collector can read the file at any time, so it's replaced at once
+    tmp_file_name = str(file_name) + ".tmp"
+    with open(tmp_file_name, "w", encoding="UTF8") as file:
+        file.write(text)
+    os.replace(tmp_file_name, file_name)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
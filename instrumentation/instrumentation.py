@@ -0,0 +1,143 @@
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+from data_provider.base_data_provider import IDataProvider
+from data_provider.base_tick_data_provider import ITickDataProvider
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from instrumentation.base_instrumentation import EmulatorStats, IInstrumentation
+from instrumentation.exporters import to_json, to_prometheus, write_file
+from instrumentation.instrumented_components import InstrumentedDataProvider, InstrumentedEmulator, \
+    InstrumentedStrategy
+from trade_system.strategies.base_strategy import IStrategy
+
+__all__ = ("Instrumentation")
+
+logger = logging.getLogger(__name__)
+
+
+class Instrumentation(IInstrumentation):
+    """
+    Collects counters (candles read and analyzed, signals, positions) and exclusive time of stages:
+    provider, strategy and emulator (emulator bookkeeping without strategy and provider calls inside it).
+    Optional profiling captures every emulator by own cProfile profiler.
+    Results are exported to output path as JSON (instrumentation.json) and/or
+    Prometheus textfile (instrumentation.prom), profiles as {emulator}.prof files (see pstats).
+    """
+    JSON_FORMAT = "json"
+    PROMETHEUS_FORMAT = "prometheus"
+
+    def __init__(
+            self,
+            output_path: str,
+            formats: Optional[list[str]] = None,
+            profile: bool = False
+    ) -> None:
+        self.__output_path = output_path
+        self.__formats = formats if formats is not None else [self.JSON_FORMAT]
+        self.__profile = profile
+
+        self.__counters: dict[str, int] = dict()
+        self.__timers: dict[str, float] = dict()
+        self.__emulators: dict[str, EmulatorStats] = dict()
+        self.__instrumented_emulators: list[InstrumentedEmulator] = []
+        # started stages: [stage, start time of the current (not paused) part]
+        self.__stages: list[list] = []
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @property
+    def counters(self) -> dict[str, int]:
+        return self.__counters
+
+    @property
+    def timers(self) -> dict[str, float]:
+        return self.__timers
+
+    @property
+    def emulators(self) -> dict[str, EmulatorStats]:
+        return self.__emulators
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def start(self, stage: str) -> None:
+        now = time.perf_counter()
+        stages = self.__stages
+
+        if stages:
+            # outer stage is paused
+            outer = stages[-1]
+            self.__timers[outer[0]] = self.__timers.get(outer[0], 0.0) + now - outer[1]
+
+        stages.append([stage, now])
+
+    def stop(self) -> None:
+        now = time.perf_counter()
+        stages = self.__stages
+
+        stage, start = stages.pop()
+        self.__timers[stage] = self.__timers.get(stage, 0.0) + now - start
+
+        if stages:
+            # outer stage is resumed
+            stages[-1][1] = now
+
+    def add_emulator_run(self, name: str, seconds: float, test_results: TestResults) -> None:
+        stats = self.__emulators.setdefault(name, EmulatorStats())
+        closed = len(test_results.executed_orders)
+
+        stats.seconds += seconds
+        stats.runs += 1
+        stats.positions_closed += closed
+        stats.positions_opened += closed + (1 if test_results.current_position else 0)
+
+        self.count("positions_closed", closed)
+        self.count("positions_opened", closed + (1 if test_results.current_position else 0))
+
+    def wrap_data_provider(self, data_provider: IDataProvider) -> IDataProvider:
+        if isinstance(data_provider, ITickDataProvider):
+            # tick replay is recognized by provider type
+            logger.info("Tick data provider isn't instrumented")
+            return data_provider
+
+        return InstrumentedDataProvider(data_provider, self)
+
+    def wrap_strategy(self, strategy: IStrategy) -> IStrategy:
+        return InstrumentedStrategy(strategy, self)
+
+    def wrap_emulator(self, trading_emulator: ITradingEmulator) -> ITradingEmulator:
+        instrumented_emulator = InstrumentedEmulator(trading_emulator, self, self.__profile)
+        self.__instrumented_emulators.append(instrumented_emulator)
+
+        return instrumented_emulator
+
+    def export(self) -> None:
+        logger.info(f"Instrumentation counters: {self.__counters}")
+        logger.info(f"Instrumentation timers: {self.__timers}")
+
+        try:
+            os.makedirs(self.__output_path, exist_ok=True)
+
+            metrics = self.__counters, self.__timers, self.__emulators
+
+            if self.JSON_FORMAT in self.__formats:
+                write_file(Path(self.__output_path, "instrumentation.json"), to_json(*metrics))
+            if self.PROMETHEUS_FORMAT in self.__formats:
+                write_file(Path(self.__output_path, "instrumentation.prom"), to_prometheus(*metrics))
+
+            for instrumented_emulator in self.__instrumented_emulators:
+                if instrumented_emulator.profiler:
+                    file_name = re.sub(r"[^\w.=-]+", "_", str(instrumented_emulator)) + ".prof"
+                    instrumented_emulator.profiler.dump_stats(str(Path(self.__output_path, file_name)))
+
+            logger.info(f"Instrumentation has been exported: {self.__output_path}")
+
+        except Exception as ex:
+            logger.error(f"Instrumentation export error: {repr(ex)}")
@@ -0,0 +1,240 @@
+import cProfile
+import time
+from datetime import date, datetime
+from typing import Generator, Optional
+
+from configuration.settings import StrategySettings
+from data_provider.base_data_provider import IDataProvider
+from data_provider.candle_columns import CandleColumns
+from data_provider.internal_candle import InternalCandle
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from instrumentation.base_instrumentation import IInstrumentation
+from trade_system.signal import Signal
+from trade_system.signal_columns import SignalColumns
+from trade_system.strategies.base_strategy import IStrategy
+
+__all__ = ("InstrumentedDataProvider", "InstrumentedStrategy", "InstrumentedEmulator")
+
+# stages of timers
+PROVIDER_STAGE = "provider"
+STRATEGY_STAGE = "strategy"
+EMULATOR_STAGE = "emulator"
+
+
+class InstrumentedDataProvider(IDataProvider):
+    """Data provider proxy counts read candles and measures time of reading (generator steps only)"""
+
+    def __init__(self, data_provider: IDataProvider, instrumentation: IInstrumentation) -> None:
+        self.__data_provider = data_provider
+        self.__instrumentation = instrumentation
+
+    @property
+    def source_id(self) -> str:
+        return self.__data_provider.source_id
+
+    def period_start(self, from_days: int) -> Optional[datetime]:
+        return self.__data_provider.period_start(from_days)
+
+    def day_stamps(self, figi: str, from_: Optional[datetime], to: datetime) -> Optional[dict[date, str]]:
+        return self.__data_provider.day_stamps(figi, from_, to)
+
+    def provide(self, figi: str, from_days: int) -> Generator[InternalCandle, None, None]:
+        yield from self.__measure_candles(self.__data_provider.provide(figi, from_days))
+
+    def provide_columns(self, figi: str, from_days: int) -> CandleColumns:
+        return self.__measure_columns(lambda: self.__data_provider.provide_columns(figi, from_days))
+
+    def provide_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> Generator[InternalCandle, None, None]:
+        yield from self.__measure_candles(self.__data_provider.provide_range(figi, from_, to))
+
+    def provide_columns_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime] = None
+    ) -> CandleColumns:
+        return self.__measure_columns(lambda: self.__data_provider.provide_columns_range(figi, from_, to))
+
+    def __measure_candles(
+            self,
+            candles: Generator[InternalCandle, None, None]
+    ) -> Generator[InternalCandle, None, None]:
+        instrumentation = self.__instrumentation
+        candles_iterator = iter(candles)
+        candles_count = 0
+
+        try:
+            while True:
+                # consumer's work between candles isn't provider time
+                instrumentation.start(PROVIDER_STAGE)
+                try:
+                    candle = next(candles_iterator)
+                except StopIteration:
+                    return
+                finally:
+                    instrumentation.stop()
+
+                candles_count += 1
+                yield candle
+        finally:
+            instrumentation.count("candles_read", candles_count)
+
+    def __measure_columns(self, provide) -> CandleColumns:
+        self.__instrumentation.start(PROVIDER_STAGE)
+        try:
+            candles = provide()
+        finally:
+            self.__instrumentation.stop()
+
+        self.__instrumentation.count("candles_read", len(candles))
+
+        return candles
+
+
+class InstrumentedStrategy(IStrategy):
+    """Strategy proxy counts analyzed candles and signals and measures time of analysis"""
+
+    def __init__(self, strategy: IStrategy, instrumentation: IInstrumentation) -> None:
+        self.__strategy = strategy
+        self.__instrumentation = instrumentation
+
+    @property
+    def settings(self) -> StrategySettings:
+        return self.__strategy.settings
+
+    @property
+    def batch_supported(self) -> bool:
+        return self.__strategy.batch_supported
+
+    def analyze_candle(self, candle: InternalCandle) -> Optional[Signal]:
+        instrumentation = self.__instrumentation
+
+        instrumentation.start(STRATEGY_STAGE)
+        try:
+            signal = self.__strategy.analyze_candle(candle)
+        finally:
+            instrumentation.stop()
+
+        instrumentation.count("candles_analyzed")
+        if signal:
+            instrumentation.count("signals")
+
+        return signal
+
+    def analyze_candles(self, candles: CandleColumns) -> Optional[SignalColumns]:
+        self.__instrumentation.start(STRATEGY_STAGE)
+        try:
+            signals = self.__strategy.analyze_candles(candles)
+        finally:
+            self.__instrumentation.stop()
+
+        if signals is not None:
+            self.__instrumentation.count("candles_analyzed", len(candles))
+            self.__instrumentation.count("signals", len(signals))
+
+        return signals
+
+    def __reduce__(self):
+        # strategy is pickled without instrumentation (checkpoints), emulator wraps it again on restore
+        return _unwrapped_strategy, (self.__strategy,)
+
+    def __str__(self) -> str:
+        return str(self.__strategy)
+
+
+def _unwrapped_strategy(strategy: IStrategy) -> IStrategy:
+    return strategy
+
+
+class InstrumentedEmulator(ITradingEmulator):
+    """
+    Trading emulator proxy measures time of every emulator call and counts positions of test results.
+    Time of strategy and data provider calls inside emulator is excluded from emulator stage.
+    Every call can be captured by own profiler of the emulator.
+    """
+
+    def __init__(
+            self,
+            trading_emulator: ITradingEmulator,
+            instrumentation: IInstrumentation,
+            profile: bool = False
+    ) -> None:
+        self.__trading_emulator = trading_emulator
+        self.__instrumentation = instrumentation
+        self.__name = str(trading_emulator)
+
+        self.__profiler: Optional[cProfile.Profile] = cProfile.Profile() if profile else None
+        # inclusive time of current emulation
+        self.__seconds = 0.0
+
+    @property
+    def profiler(self) -> Optional[cProfile.Profile]:
+        return self.__profiler
+
+    @property
+    def figi(self) -> str:
+        return self.__trading_emulator.figi
+
+    @property
+    def strategy_settings(self) -> StrategySettings:
+        return self.__trading_emulator.strategy_settings
+
+    @property
+    def batch_supported(self) -> bool:
+        return self.__trading_emulator.batch_supported
+
+    def emulate_trading(self, from_days: int) -> TestResults:
+        self.__seconds = 0.0
+        return self.__complete(self.__measure(self.__trading_emulator.emulate_trading, from_days))
+
+    def emulate_columns(self, candles: CandleColumns) -> TestResults:
+        self.__seconds = 0.0
+        return self.__complete(self.__measure(self.__trading_emulator.emulate_columns, candles))
+
+    def start_emulation(self) -> None:
+        self.__seconds = 0.0
+        self.__measure(self.__trading_emulator.start_emulation)
+
+    def emulate_candle(self, candle: InternalCandle) -> None:
+        self.__measure(self.__trading_emulator.emulate_candle, candle)
+
+    def stop_emulation(self) -> TestResults:
+        return self.__complete(self.__measure(self.__trading_emulator.stop_emulation))
+
+    def snapshot(self) -> Optional[dict]:
+        return self.__trading_emulator.snapshot()
+
+    def restore(self, state: dict) -> None:
+        self.__seconds = 0.0
+        self.__measure(self.__trading_emulator.restore, state)
+
+    def __measure(self, method, *args):
+        instrumentation = self.__instrumentation
+        profiler = self.__profiler
+
+        instrumentation.start(EMULATOR_STAGE)
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+
+        try:
+            return method(*args)
+        finally:
+            if profiler:
+                profiler.disable()
+            self.__seconds += time.perf_counter() - start
+            instrumentation.stop()
+
+    def __complete(self, test_results: TestResults) -> TestResults:
+        self.__instrumentation.add_emulator_run(self.__name, self.__seconds, test_results)
+        return test_results
+
+    def __str__(self) -> str:
+        """The same name as emulator has, test results are keyed by it"""
+        return self.__name
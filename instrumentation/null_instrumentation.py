@@ -0,0 +1,38 @@
+from data_provider.base_data_provider import IDataProvider
+from history_tests.test_results import TestResults
+from history_tests.trading_emulator.base_trading_emulator import ITradingEmulator
+from instrumentation.base_instrumentation import IInstrumentation
+from trade_system.strategies.base_strategy import IStrategy
+
+__all__ = ("NullInstrumentation")
+
+
+class NullInstrumentation(IInstrumentation):
+    """Disabled instrumentation. Components aren't wrapped, so there is no overhead in tests"""
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def start(self, stage: str) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def add_emulator_run(self, name: str, seconds: float, test_results: TestResults) -> None:
+        pass
+
+    def wrap_data_provider(self, data_provider: IDataProvider) -> IDataProvider:
+        return data_provider
+
+    def wrap_strategy(self, strategy: IStrategy) -> IStrategy:
+        return strategy
+
+    def wrap_emulator(self, trading_emulator: ITradingEmulator) -> ITradingEmulator:
+        return trading_emulator
+
+    def export(self) -> None:
+        pass
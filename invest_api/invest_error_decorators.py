@@ -49,3 +49,41 @@ def invest_api_retry(retry_count: int = 3, exceptions: tuple = ( RequestError ))
         return errors_wrapper
 
     return errors_retry
+
+
+# The same as invest_error_logging for coroutines (AsyncClient api)
+def invest_error_logging_async(func):
+    async def log_wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except AioRequestError as ex:
+            logger.error("AioRequestError code=%s repr=%s details=%s",
+                         str(ex.code), repr(ex), ex.details)
+            raise
+        except InvestError as ex:
+            logger.error("InvestError repr=%s", repr(ex))
+            raise
+
+    return log_wrapper
+
+
+# The same as invest_api_retry for coroutines (AsyncClient api)
+def invest_api_retry_async(retry_count: int = 3, exceptions: tuple = (AioRequestError, )):
+    def errors_retry(func):
+
+        async def errors_wrapper(*args, **kwargs):
+            attempts = 0
+
+            while attempts < retry_count - 1:
+                attempts += 1
+
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions:
+                    logger.error(f"Retry exception attempt: {attempts}")
+
+            return await func(*args, **kwargs)
+
+        return errors_wrapper
+
+    return errors_retry
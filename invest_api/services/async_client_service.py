@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import date, datetime, time, timedelta, timezone
+from typing import AsyncContextManager, Callable, Generator, Optional
+
+from tinkoff.invest import AsyncClient, CandleInterval, HistoricCandle
+from tinkoff.invest.utils import now
+
+from invest_api.invest_error_decorators import invest_error_logging_async, invest_api_retry_async
+from invest_api.services.background_chunks import background_chunks, PutChunk
+from invest_api.token_bucket import TokenBucket
+
+__all__ = ("AsyncClientService")
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClientService:
+    """
+    The class downloads historical candles by tinkoff async client api.
+    Requested period is split into day ranges, which are downloaded concurrently (up to `concurrency` requests).
+    Requests are limited by token bucket (`requests_per_minute`).
+    Downloaded days are yielded in time order, so the service can be used instead of ClientService.
+    """
+    # tinkoff api limit for MarketDataService requests is several hundreds per minute
+    __DEFAULT_REQUESTS_PER_MINUTE = 300
+
+    def __init__(
+            self,
+            token: str,
+            app_name: str,
+            concurrency: int = 4,
+            requests_per_minute: int = __DEFAULT_REQUESTS_PER_MINUTE,
+            client_factory: Optional[Callable[[], AsyncContextManager]] = None
+    ) -> None:
+        self.__concurrency = max(1, concurrency)
+        # the bucket is shared by all downloads of the service, because api limits are per token
+        self.__rate_limiter = TokenBucket(requests_per_minute / 60, self.__concurrency)
+        # client can be replaced by local fake for tests
+        self.__client_factory = client_factory or (lambda: AsyncClient(token, app_name=app_name))
+
+    def download_historic_candle(
+            self,
+            figi: str,
+            from_days: int,
+            interval: CandleInterval
+    ) -> Generator[HistoricCandle, None, None]:
+        """Download and yield all requested historical candles in time order"""
+        to = now()
+        from_ = to - timedelta(days=from_days)
+        logger.info(f"Start download recent candles. Figi: {figi}, from days: {from_}, interval: {interval.name}, "
+                    f"concurrency: {self.__concurrency}")
+
+        yield from self.__download_candles(figi, from_, to, interval)
+
+    def download_historic_candle_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: datetime,
+            interval: CandleInterval
+    ) -> Generator[HistoricCandle, None, None]:
+        """Download and yield historical candles for [from_, to) period in time order"""
+        logger.info(f"Start download candles. Figi: {figi}, from: {from_}, to: {to}, interval: {interval.name}, "
+                    f"concurrency: {self.__concurrency}")
+
+        yield from self.__download_candles(figi, from_, to, interval)
+
+    def __download_candles(
+            self,
+            figi: str,
+            from_: datetime,
+            to: datetime,
+            interval: CandleInterval
+    ) -> Generator[HistoricCandle, None, None]:
+        day_ranges = list(AsyncClientService.__day_ranges(from_, to))
+
+        candles_count = 0
+        for chunk in background_chunks(
+                lambda put: asyncio.run(self.__download_days(figi, day_ranges, interval, put)),
+                self.__concurrency,
+                f"async-download-{figi}"
+        ):
+            candles_count += len(chunk)
+            yield from chunk
+
+        logger.info(f"Download complete: days {len(day_ranges)}, candles count {candles_count}")
+
+    async def __download_days(
+            self,
+            figi: str,
+            day_ranges: list[tuple[datetime, datetime]],
+            interval: CandleInterval,
+            put: PutChunk
+    ) -> None:
+        """
+        Days are downloaded by sliding window of `concurrency` tasks and passed to consumer in time order.
+        A slow consumer stops new requests, so only a few days are kept in memory.
+        """
+        async with self.__client_factory() as client:
+            pending: deque[asyncio.Task] = deque()
+
+            try:
+                for from_, to in day_ranges:
+                    pending.append(asyncio.create_task(self.__download_day(client, figi, from_, to, interval)))
+
+                    if len(pending) >= self.__concurrency:
+                        if not await AsyncClientService.__put_day(put, await pending.popleft()):
+                            return
+
+                while pending:
+                    if not await AsyncClientService.__put_day(put, await pending.popleft()):
+                        return
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    @invest_api_retry_async()
+    @invest_error_logging_async
+    async def __download_day(
+            self,
+            client,
+            figi: str,
+            from_: datetime,
+            to: datetime,
+            interval: CandleInterval
+    ) -> list[HistoricCandle]:
+        # every day range is one api request for minute candles
+        await self.__rate_limiter.acquire_async()
+
+        return [
+            candle
+            async for candle in client.get_all_candles(
+                figi=figi,
+                from_=from_,
+                to=to,
+                interval=interval
+            )
+        ]
+
+    @staticmethod
+    async def __put_day(put: PutChunk, candles: list[HistoricCandle]) -> bool:
+        if not candles:
+            return True
+
+        # put waits for consumer, so it's called outside of event loop to keep requests running
+        return await asyncio.to_thread(put, candles)
+
+    @staticmethod
+    def __day_ranges(from_: datetime, to: datetime) -> Generator[tuple[datetime, datetime], None, None]:
+        """[from_, to) period split by midnights (UTC)"""
+        while from_ < to:
+            next_day = AsyncClientService.__day_start(from_.astimezone(timezone.utc).date() + timedelta(days=1))
+            yield from_, min(next_day, to)
+            from_ = next_day
+
+    @staticmethod
+    def __day_start(day: date) -> datetime:
+        return datetime.combine(day, time.min, tzinfo=timezone.utc)
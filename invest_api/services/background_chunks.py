@@ -0,0 +1,63 @@
+import logging
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import Callable, Generator
+
+__all__ = ("background_chunks", "PutChunk")
+
+logger = logging.getLogger(__name__)
+
+# callback to pass a chunk to consumer. It returns False if consumer doesn't need chunks anymore
+PutChunk = Callable[[list], bool]
+
+_PUT_TIMEOUT_SEC = 1
+
+
+def background_chunks(
+        produce: Callable[[PutChunk], None],
+        prefetch: int,
+        name: str
+) -> Generator[list, None, None]:
+    """
+    Run producer in a separate thread and yield chunks it has produced.
+    Chunks are passed via bounded queue, so the producer works ahead of consumer on `prefetch` chunks only
+    and memory is bounded. The producer is stopped if consumer closes generator.
+    An exception of producer is raised in consumer.
+    """
+    chunks: Queue = Queue(maxsize=prefetch)
+    stopped = Event()
+
+    def put(chunk) -> bool:
+        # wait for free place in queue until consumer is stopped
+        while not stopped.is_set():
+            try:
+                chunks.put(chunk, timeout=_PUT_TIMEOUT_SEC)
+                return True
+            except Full:
+                continue
+
+        return False
+
+    def run() -> None:
+        try:
+            produce(put)
+        except Exception as ex:
+            put(ex)
+        else:
+            put(None)
+
+    Thread(target=run, name=name, daemon=True).start()
+
+    try:
+        while True:
+            chunk = chunks.get()
+
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+
+            yield chunk
+    finally:
+        # stop producer if chunks aren't required anymore
+        stopped.set()
@@ -1,10 +1,13 @@
 import logging
-from datetime import timedelta
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Generator, Optional
 
 from tinkoff.invest import CandleInterval, Client, HistoricCandle
 from tinkoff.invest.utils import now
 
 from invest_api.invest_error_decorators import invest_error_logging, invest_api_retry
+from invest_api.services.background_chunks import background_chunks, PutChunk
 
 __all__ = ("ClientService")
 
@@ -15,37 +18,106 @@ class ClientService:
     """
     The class encapsulate tinkoff client api
     """
+    # count of day chunks which can be downloaded ahead of processing
+    __PREFETCH_CHUNKS = 2
+
     def __init__(self, token: str, app_name: str) -> None:
         self.__token = token
         self.__app_name = app_name
 
-    @invest_api_retry()
-    @invest_error_logging
     def download_historic_candle(
             self,
             figi: str,
             from_days: int,
             interval: CandleInterval
-    ) -> list[HistoricCandle]:
-        """Download and return all requested historical candles"""
-        result: list[HistoricCandle] = []
-
+    ) -> Generator[HistoricCandle, None, None]:
+        """Download and yield all requested historical candles as they arrive"""
         from_ = now() - timedelta(days=from_days)
         logger.info(f"Start download recent candles. Figi: {figi}, from days: {from_}, interval: {interval.name}")
 
+        yield from self.__download_candles(figi, from_, None, interval)
+
+    def download_historic_candle_range(
+            self,
+            figi: str,
+            from_: datetime,
+            to: datetime,
+            interval: CandleInterval
+    ) -> Generator[HistoricCandle, None, None]:
+        """Download and yield historical candles for [from_, to) period as they arrive"""
+        logger.info(f"Start download candles. Figi: {figi}, from: {from_}, to: {to}, interval: {interval.name}")
+
+        yield from self.__download_candles(figi, from_, to, interval)
+
+    def __download_candles(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime],
+            interval: CandleInterval
+    ) -> Generator[HistoricCandle, None, None]:
+        """
+        Candles are downloaded by a separate thread and passed here by day chunks via bounded queue.
+        So, the next chunks are downloading while the current chunk is being processed,
+        and only a few chunks are kept in memory.
+        """
+        # progress is shared between retry attempts to resume download from the last received candle
+        progress = _DownloadProgress()
+
+        candles_count = 0
+        for chunk in background_chunks(
+                lambda put: self.__download_chunks(figi, from_, to, interval, put, progress),
+                self.__PREFETCH_CHUNKS,
+                f"download-{figi}"
+        ):
+            candles_count += len(chunk)
+            yield from chunk
+
+        logger.info(f"Download complete: candles count {candles_count}")
+
+    @invest_api_retry()
+    @invest_error_logging
+    def __download_chunks(
+            self,
+            figi: str,
+            from_: datetime,
+            to: Optional[datetime],
+            interval: CandleInterval,
+            put: PutChunk,
+            progress: "_DownloadProgress"
+    ) -> None:
+        last_time = progress.last_time
+        if last_time:
+            logger.info(f"Resume download from the last received candle: {last_time}")
+
+        is_debug = logger.isEnabledFor(logging.DEBUG)
+
         with Client(self.__token, app_name=self.__app_name) as client:
             for candle in client.get_all_candles(
                     figi=figi,
-                    from_=from_,
+                    from_=last_time or from_,
+                    to=to,
                     interval=interval
             ):
-                logger.debug(candle)
+                if last_time and candle.time <= last_time:
+                    # the last received candle is requested again after resume
+                    continue
 
-                result.append(candle)
+                if is_debug:
+                    logger.debug("%s", candle)
 
-        logger.info(f"Download complete: candles count {len(result)}")
+                # chunk is a day of candles (UTC)
+                if progress.chunk and progress.chunk[-1].time.date() != candle.time.date():
+                    if not put(progress.chunk):
+                        return
+                    progress.chunk = []
 
-        return result
+                progress.chunk.append(candle)
+                progress.last_time = candle.time
+
+        if progress.chunk:
+            put(progress.chunk)
+            progress.chunk = []
 
     @invest_api_retry()
     @invest_error_logging
@@ -57,3 +129,10 @@ class ClientService:
             client.cancel_all_orders(account_id=account_id)
 
         logger.info(f"Cancellation all orders complete.")
+
+
+@dataclass(eq=False, repr=True)
+class _DownloadProgress:
+    # candles of current day, which aren't passed to consumer yet
+    chunk: list[HistoricCandle] = field(default_factory=list)
+    last_time: Optional[datetime] = None
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+__all__ = ("TokenBucket")
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for api requests.
+    Tokens are refilled with constant rate up to capacity, every request takes one token.
+    The bucket is thread safe and isn't bound to an event loop, so one bucket limits requests of
+    all downloads (threads and event loops) which use the same api token.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: int) -> None:
+        if rate_per_sec <= 0 or capacity <= 0:
+            raise ValueError(f"Wrong token bucket settings: rate {rate_per_sec}, capacity {capacity}")
+
+        self.__rate = rate_per_sec
+        self.__capacity = capacity
+        self.__tokens = float(capacity)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return delay in seconds before the token can be used"""
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+
+            # a token is taken in advance, so negative balance is a queue of waiting requests
+            self.__tokens -= 1
+
+            return 0.0 if self.__tokens >= 0 else -self.__tokens / self.__rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
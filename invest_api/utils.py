@@ -6,6 +6,9 @@ from tinkoff.invest.utils import quotation_to_decimal, decimal_to_quotation
 
 from data_provider.internal_candle import InternalCandle
 
+# Quotation keeps fractional part of price in nano (10^-9) units
+NANO_IN_UNIT = 1_000_000_000
+
 
 def rub_currency_name() -> str:
     return "rub"
@@ -33,6 +36,31 @@ def decimal_to_moneyvalue(decimal: Decimal, currency: str = rub_currency_name())
     )
 
 
+def quotation_to_nano(quotation: Quotation) -> int:
+    return quotation.units * NANO_IN_UNIT + quotation.nano
+
+
+def nano_to_quotation(nano: int) -> Quotation:
+    # units and nano have the same sign in Quotation
+    units, nano_part = divmod(abs(nano), NANO_IN_UNIT)
+    sign = -1 if nano < 0 else 1
+
+    return Quotation(
+        units=sign * units,
+        nano=sign * nano_part
+    )
+
+
+def nano_to_decimal(nano: int) -> Decimal:
+    return Decimal(nano).scaleb(-9)
+
+
+def multiply_nano(nano: int, multiplier: Decimal) -> int:
+    """Multiply price in nano units by decimal multiplier. Result is rounded down to nano units"""
+    numerator, denominator = multiplier.as_integer_ratio()
+    return nano * numerator // denominator
+
+
 def generate_order_id() -> str:
     return str(uuid.uuid4())
 
@@ -46,4 +74,3 @@ def historic_candle_to_internal(candle: HistoricCandle) -> InternalCandle:
         volume=candle.volume,
         time=candle.time
     )
-
@@ -1,36 +1,34 @@
 import logging
-import os
-from logging.handlers import RotatingFileHandler
 
 from configuration.configuration import ProgramConfiguration
+from configuration.logs_configuration import LogsConfiguration, prepare_logs
+from data_provider.aggregation.aggregated_data_provider import AggregatedDataProvider
+from data_provider.base_tick_data_provider import ITickDataProvider
+from data_provider.columnar.columnar_data_provider import ColumnarDataProvider
 from data_provider.data_provider_factory import DataProviderFactory
+from history_tests.checkpoints.checkpoint_store import CheckpointStore
 from history_tests.history_manager import HistoryTestsManager
-from history_tests.trading_emulator.moving_stop_emulator import MovingStopEmulator
-from history_tests.trading_emulator.stop_take_emulator import StopTakeEmulator
+from history_tests.metrics.trade_metrics import TradeMetricsEngine
+from history_tests.portfolio_manager import PortfolioTestsManager
+from history_tests.result_cache.result_cache import ResultCache
+from history_tests.trading_emulator.trading_emulator_factory import TradingEmulatorFactory
+from instrumentation.base_instrumentation import IInstrumentation
+from instrumentation.instrumentation import Instrumentation
+from instrumentation.null_instrumentation import NullInstrumentation
 from result_viewer.result_to_logs import ResultViewerToLogs
 from result_viewer.result_to_plot import ResultViewerToPlot
 from trade_system.commissions.commissions import CommissionEveryOrderCalculator
 
 # the configuration file name
 CONFIG_FILE = "settings.ini"
+# the log file name (in logs folder)
+LOG_FILE = "test.log"
 
 logger = logging.getLogger(__name__)
 
 
-def prepare_logs() -> None:
-    if not os.path.exists("logs/"):
-        os.makedirs("logs/")
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s - %(module)s - %(levelname)s - %(funcName)s: %(lineno)d - %(message)s",
-        handlers=[RotatingFileHandler('logs/test.log', maxBytes=100000000, backupCount=10, encoding='utf-8')],
-        encoding="utf-8"
-    )
-
-
 if __name__ == "__main__":
-    prepare_logs()
+    prepare_logs(LOG_FILE, LogsConfiguration(CONFIG_FILE))
 
     logger.info("Historical candles backtesting has been started.")
 
@@ -45,55 +43,81 @@ if __name__ == "__main__":
             config.data_provider_name,
             *config.data_provider_settings
         )
+        if config.data_provider_interval_min > 1 and not isinstance(data_provider, ITickDataProvider):
+            # strategies get bars of bigger interval, closed days are kept in rollup cache
+            data_provider = AggregatedDataProvider(
+                data_provider,
+                config.data_provider_interval_min,
+                config.data_provider_rollup_cache_path
+            )
+        if config.data_provider_columnar_store:
+            # keep all candles in memory in compact columnar view, source provider is read once per figi
+            data_provider = ColumnarDataProvider(data_provider)
+        # counters and timers of tests (single instrument only)
+        instrumentation_settings = config.instrumentation_settings
+        instrumentation: IInstrumentation = Instrumentation(
+            instrumentation_settings.output_path,
+            instrumentation_settings.formats,
+            instrumentation_settings.profile
+        ) if instrumentation_settings.enabled and len(config.test_strategies_settings) == 1 \
+            else NullInstrumentation()
+        data_provider = instrumentation.wrap_data_provider(data_provider)
         # create calculator of commissions
         commission_calculator = CommissionEveryOrderCalculator(config.commission_settings)
-        # create result viewers
-        result_viewers = [ResultViewerToLogs(commission_calculator), ResultViewerToPlot(commission_calculator)]
-        # create trading emulators - using all available
-        trading_emulators = [
-            MovingStopEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
-                data_provider,
-                True,
-                True
-            ),
-            MovingStopEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
-                data_provider,
-                True,
-                False
-            ),
-            MovingStopEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
-                data_provider,
-                False,
-                True
-            ),
-            MovingStopEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
-                data_provider,
-                False,
-                False
-            ),
-            StopTakeEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
-                data_provider,
-                True
-            ),
-            StopTakeEmulator(
-                config.test_strategy_settings.name,
-                config.test_strategy_settings,
+        # create result viewers, metrics of results are calculated once for all of them
+        metrics_engine = TradeMetricsEngine(commission_calculator)
+        result_viewers = [ResultViewerToLogs(metrics_engine), ResultViewerToPlot(metrics_engine)]
+
+        if len(config.test_strategies_settings) > 1:
+            # settings of single instrument tests aren't used by portfolio tests
+            if isinstance(data_provider, ITickDataProvider):
+                logger.warning("Tick replay isn't supported by portfolio tests, candles built from ticks are tested")
+            if config.data_provider_checkpoint_path:
+                logger.warning("CHECKPOINT_PATH is ignored by portfolio tests, all history is tested")
+            if config.result_cache_settings.enabled:
+                logger.warning("RESULT_CACHE is ignored by portfolio tests, all instruments are tested")
+            if instrumentation_settings.enabled:
+                logger.warning("INSTRUMENTATION is ignored by portfolio tests")
+
+            # several instruments are tested concurrently
+            PortfolioTestsManager(
+                config.test_strategies_settings,
+                result_viewers,
                 data_provider,
-                False
+                config.test_max_workers
+            ).test(from_days=config.data_provider_from_days)
+        elif isinstance(data_provider, ITickDataProvider):
+            # ticks are replayed by every tick emulator, stop and take are executed by ticks
+            trading_emulators = TradingEmulatorFactory.new_tick_emulators(config.test_strategy_settings, data_provider)
+
+            HistoryTestsManager(trading_emulators, result_viewers, data_provider, instrumentation).test(
+                from_days=config.data_provider_from_days
             )
-        ]
+        else:
+            # create trading emulators - using all available
+            trading_emulators = TradingEmulatorFactory.new_emulators(config.test_strategy_settings, data_provider)
+            # emulations are continued by new candles only
+            checkpoint_store = CheckpointStore(config.data_provider_checkpoint_path) \
+                if config.data_provider_checkpoint_path else None
+            # unchanged settings and candles aren't tested again
+            result_cache_settings = config.result_cache_settings
+            result_cache = ResultCache(
+                result_cache_settings.path,
+                result_cache_settings.max_entries,
+                result_cache_settings.max_size_mb
+            ) if result_cache_settings.enabled else None
 
-        # start testing
-        HistoryTestsManager(trading_emulators, result_viewers).test(from_days=config.data_provider_from_days)
+            # start testing
+            HistoryTestsManager(
+                trading_emulators,
+                result_viewers,
+                data_provider,
+                instrumentation,
+                checkpoint_store,
+                result_cache
+            ).test(
+                from_days=config.data_provider_from_days,
+                single_pass=config.data_provider_single_pass
+            )
 
     logger.info("Backtesting has been ended")
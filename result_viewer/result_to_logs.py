@@ -1,10 +1,9 @@
 import logging
-from decimal import Decimal
 
+from history_tests.metrics.trade_metrics import TradeMetricsEngine
 from result_viewer.base_viewer import IResultViewer
 from history_tests.test_results import TestResults
-from trade_system.commissions.base_commission import ICommissionCalculator
-from trade_system.signal import SignalType
+from invest_api.utils import nano_to_decimal
 
 __all__ = ("ResultViewerToLogs")
 
@@ -16,8 +15,8 @@ class ResultViewerToLogs(IResultViewer):
     Class view test results into log file
     """
 
-    def __init__(self, commission_calculator: ICommissionCalculator):
-        self.__commission_calculator = commission_calculator
+    def __init__(self, metrics_engine: TradeMetricsEngine):
+        self.__metrics_engine = metrics_engine
 
     def view(self, test_results: dict[str, TestResults]) -> None:
         """
@@ -33,39 +32,31 @@ class ResultViewerToLogs(IResultViewer):
             else:
                 logger.info(f"Current Signal is empty")
 
-            profit = Decimal(0)
-            total_commission = Decimal(0)
-            take_profit_count = 0
-
-            for test_order in test_result.executed_orders:
-                profit_result = (
-                                        test_order.open_level < test_order.close_level and test_order.signal.signal_type == SignalType.LONG
-                                ) or (
-                                        test_order.open_level > test_order.close_level and test_order.signal.signal_type == SignalType.SHORT
-                                )
-                if profit_result:
-                    take_profit_count += 1
-
-                logger.info(f"Executed order. {test_order.signal}.")
-                logger.info(f"Order profit result: {profit_result}.")
-                logger.info(f"Open: {test_order.open_level}; Close: {test_order.close_level}")
-
-                commission = self.__commission_calculator.calculate(test_order.open_level) + \
-                             self.__commission_calculator.calculate(test_order.close_level)
-                total_commission += commission
-                logger.info(f"Commission: {commission}")
-
-                if test_order.signal.signal_type == SignalType.LONG:
-                    # long profit if close > open
-                    profit = profit + test_order.close_level - test_order.open_level
-                else:
-                    # short profit if open > close
-                    profit = profit + test_order.open_level - test_order.close_level
-
-            logger.info(f"Signals executed: {len(test_result.executed_orders)}")
-            logger.info(f"Take Profit: {take_profit_count}")
-            logger.info(f"Stop Loss: {len(test_result.executed_orders) - take_profit_count}")
-
-            logger.info(f"Total trade profit: {profit}")
-            logger.info(f"Total commission: {total_commission}")
-            logger.info(f"Total trade summary: {profit - total_commission}")
+            metrics = self.__metrics_engine.metrics(test_result)
+
+            # lazy arguments: records of orders aren't formatted if info level is disabled
+            if logger.isEnabledFor(logging.INFO):
+                for test_order, profit, commission in zip(
+                        test_result.executed_orders,
+                        metrics.trade_profit.tolist(),
+                        metrics.trade_commission.tolist()
+                ):
+                    logger.info("Executed order. %s.", test_order.signal)
+                    logger.info("Order profit result: %s. Exit reason: %s.", profit > 0, test_order.exit_reason.name)
+                    logger.info("Open: %s; Close: %s",
+                                nano_to_decimal(test_order.open_level), nano_to_decimal(test_order.close_level))
+                    logger.info("Commission: %s", nano_to_decimal(commission))
+
+            logger.info(f"Signals executed: {metrics.orders_count}")
+            logger.info(f"Take Profit: {metrics.win_count}")
+            logger.info(f"Stop Loss: {metrics.loss_count}")
+
+            logger.info(f"Total trade profit: {metrics.profit}")
+            logger.info(f"Total commission: {metrics.commission}")
+            logger.info(f"Total trade summary: {metrics.net_profit}")
+
+            logger.info(f"Win rate: {metrics.win_rate:.2%}; Average trade: {metrics.average_trade:.9f}; "
+                        f"Profit factor: {metrics.profit_factor:.3f}")
+            logger.info(f"Max drawdown: {metrics.max_drawdown}; Sharpe ratio: {metrics.sharpe_ratio:.3f}; "
+                        f"Sortino ratio: {metrics.sortino_ratio:.3f}")
+            logger.info(f"Exposure time: {metrics.exposure_time} ({metrics.exposure_ratio:.2%})")
@@ -0,0 +1,70 @@
+import logging
+
+from configuration.configuration import ProgramConfiguration
+from configuration.logs_configuration import LogsConfiguration, prepare_logs
+from data_provider.aggregation.aggregated_data_provider import AggregatedDataProvider
+from data_provider.data_provider_factory import DataProviderFactory
+from history_tests.sweep.parameter_grid import ParameterGrid
+from history_tests.sweep.parameter_sweep import ParameterSweep
+
+# the configuration file name
+CONFIG_FILE = "settings.ini"
+# the log file name (in logs folder)
+LOG_FILE = "sweep.log"
+
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    prepare_logs(LOG_FILE, LogsConfiguration(CONFIG_FILE))
+
+    logger.info("Parameter sweep has been started.")
+
+    try:
+        config = ProgramConfiguration(CONFIG_FILE)
+        logger.info("Configuration has been loaded")
+    except Exception as ex:
+        logger.critical("Load configuration error: %s", repr(ex))
+    else:
+        sweep_settings = config.sweep_settings
+        strategy_settings = config.test_strategy_settings
+
+        grid = ParameterGrid(
+            {key.upper(): value for key, value in strategy_settings.settings.items()},
+            sweep_settings.strategy_settings
+        )
+        match sweep_settings.method:
+            case "random":
+                combinations = list(grid.random_combinations(sweep_settings.random_count, sweep_settings.random_seed))
+            case _:
+                combinations = list(grid.combinations())
+
+        # candles are loaded once for all combinations
+        data_provider = DataProviderFactory.new_factory(
+            config.data_provider_name,
+            *config.data_provider_settings
+        )
+        if config.data_provider_interval_min > 1:
+            data_provider = AggregatedDataProvider(
+                data_provider,
+                config.data_provider_interval_min,
+                config.data_provider_rollup_cache_path
+            )
+        candles = data_provider.provide_columns(strategy_settings.figi, config.data_provider_from_days)
+        logger.info(f"Candles have been loaded: {len(candles)}")
+
+        results = ParameterSweep(
+            strategy_settings,
+            config.commission_settings,
+            sweep_settings.max_workers
+        ).run(candles, combinations)
+
+        logger.info(f"Top {sweep_settings.top_count} results by net profit:")
+        for place, result in enumerate(results[:sweep_settings.top_count], start=1):
+            logger.info(f"{place}. Net profit: {result.net_profit}; Profit: {result.profit}; "
+                        f"Commission: {result.commission}; Orders: {result.orders_count}; "
+                        f"Win rate: {result.win_rate:.2%}; Max drawdown: {result.max_drawdown}; "
+                        f"Sharpe ratio: {result.sharpe_ratio:.3f}; "
+                        f"Emulator: {result.emulator}; Settings: {result.settings}")
+
+    logger.info("Parameter sweep has been ended")
@@ -1,6 +1,10 @@
 import abc
 from decimal import Decimal
 
+import numpy as np
+
+from invest_api.utils import nano_to_decimal
+
 __all__ = ("ICommissionCalculator")
 
 
@@ -9,3 +13,13 @@ class ICommissionCalculator(abc.ABC):
     @abc.abstractmethod
     def calculate(self, price: Decimal) -> Decimal:
         pass
+
+    def calculate_nano(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Commissions for prices in nano units at once (rounded down to nano units).
+        Calculators can override it by vectorized calculation, default implementation calls calculate for every price.
+        """
+        return np.array(
+            [int(self.calculate(nano_to_decimal(int(x))).scaleb(9)) for x in prices],
+            dtype=np.int64
+        )
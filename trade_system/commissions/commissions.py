@@ -1,7 +1,10 @@
 from decimal import Decimal
 
+import numpy as np
+
 from configuration.settings import CommissionSettings
 from trade_system.commissions.base_commission import ICommissionCalculator
+from trade_system.signal_columns import multiply_nano_array
 
 __all__ = ("CommissionEveryOrderCalculator")
 
@@ -13,3 +16,6 @@ class CommissionEveryOrderCalculator(ICommissionCalculator):
 
     def calculate(self, price: Decimal) -> Decimal:
         return price * self.__settings.every_order
+
+    def calculate_nano(self, prices: np.ndarray) -> np.ndarray:
+        return multiply_nano_array(prices, self.__settings.every_order)
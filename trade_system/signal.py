@@ -1,6 +1,7 @@
 import enum
-from dataclasses import dataclass, field
-from decimal import Decimal
+from dataclasses import dataclass
+
+from invest_api.utils import nano_to_decimal
 
 __all__ = ("Signal", "SignalType")
 
@@ -16,5 +17,12 @@ class SignalType(enum.IntEnum):
 class Signal:
     figi: str = ""
     signal_type: SignalType = SignalType.LONG
-    take_profit_level: Decimal = field(default_factory=Decimal)
-    stop_loss_level: Decimal = field(default_factory=Decimal)
+    # Price levels are fixed-point integers in nano units (like Quotation units and nano).
+    # Decimal is used for views only.
+    take_profit_level: int = 0
+    stop_loss_level: int = 0
+
+    def __str__(self) -> str:
+        return f"Signal(figi={self.figi}, signal_type={self.signal_type.name}, " \
+               f"take_profit_level={nano_to_decimal(self.take_profit_level)}, " \
+               f"stop_loss_level={nano_to_decimal(self.stop_loss_level)})"
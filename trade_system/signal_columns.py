@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import numpy as np
+
+from trade_system.signal import Signal, SignalType
+
+__all__ = ("SignalColumns", "multiply_nano_array")
+
+
+def multiply_nano_array(values: np.ndarray, multiplier: Decimal) -> np.ndarray:
+    """
+    Multiply prices in nano units by decimal multiplier (rounded down to nano units).
+    The same result as invest_api.utils.multiply_nano for every value.
+    """
+    numerator, denominator = multiplier.as_integer_ratio()
+
+    if len(values) and numerator and int(np.abs(values).max()) > np.iinfo(np.int64).max // abs(numerator):
+        # int64 overflow is possible, python integers are used
+        return np.array([int(x) * numerator // denominator for x in values], dtype=np.int64)
+
+    return values.astype(np.int64) * numerator // denominator
+
+
+class SignalColumns:
+    """
+    Signals of batch (vectorized) strategy analysis in columnar view:
+    index - index of candle when signal has been made (analyze_candle for the candle returns the signal),
+    signal_type - SignalType values,
+    take_profit_level and stop_loss_level - price levels in nano units.
+    """
+
+    def __init__(
+            self,
+            index: np.ndarray,
+            signal_type: np.ndarray,
+            take_profit_level: np.ndarray,
+            stop_loss_level: np.ndarray
+    ) -> None:
+        self.__index = index
+        self.__signal_type = signal_type
+        self.__take_profit_level = take_profit_level
+        self.__stop_loss_level = stop_loss_level
+
+    @property
+    def index(self) -> np.ndarray:
+        return self.__index
+
+    @property
+    def signal_type(self) -> np.ndarray:
+        return self.__signal_type
+
+    @property
+    def take_profit_level(self) -> np.ndarray:
+        return self.__take_profit_level
+
+    @property
+    def stop_loss_level(self) -> np.ndarray:
+        return self.__stop_loss_level
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def signal(self, position: int, figi: str) -> Signal:
+        """Make Signal object for signal at position (not candle index)"""
+        return Signal(
+            figi=figi,
+            signal_type=SignalType(int(self.__signal_type[position])),
+            take_profit_level=int(self.__take_profit_level[position]),
+            stop_loss_level=int(self.__stop_loss_level[position])
+        )
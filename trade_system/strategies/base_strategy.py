@@ -2,8 +2,10 @@ import abc
 from typing import Optional
 
 from configuration.settings import StrategySettings
+from data_provider.candle_columns import CandleColumns
 from data_provider.internal_candle import InternalCandle
 from trade_system.signal import Signal
+from trade_system.signal_columns import SignalColumns
 
 __all__ = ("IStrategy")
 
@@ -18,3 +20,16 @@ class IStrategy(abc.ABC):
     @abc.abstractmethod
     def analyze_candle(self, candle: InternalCandle) -> Optional[Signal]:
         pass
+
+    @property
+    def batch_supported(self) -> bool:
+        """True if strategy is able to analyze all candles at once (see analyze_candles)"""
+        return False
+
+    def analyze_candles(self, candles: CandleColumns) -> Optional[SignalColumns]:
+        """
+        Optional batch analysis of all candles at once.
+        Result must be the same as analyze_candle is called for every candle by a new strategy instance.
+        Returns None if batch analysis isn't supported or isn't possible for the candles.
+        """
+        return None
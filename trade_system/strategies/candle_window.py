@@ -0,0 +1,130 @@
+from array import array
+
+import numpy as np
+
+from data_provider.candle_columns import CandleColumns, datetime_to_ns
+from data_provider.internal_candle import InternalCandle
+from invest_api.utils import quotation_to_nano
+
+__all__ = ("CandleWindow", "MatchStreak")
+
+
+class CandleWindow:
+    """
+    Fixed-capacity window of the recent candles (ring buffer).
+    Columns are compact arrays with prices in nano units, time in nanoseconds.
+    Adding a candle overwrites the oldest one, nothing is allocated or shifted per candle.
+    Prices are converted from Quotation once, when the candle is added.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.__capacity = max(capacity, 1)
+
+        self.__open = array("q", bytes(8 * self.__capacity))
+        self.__high = array("q", bytes(8 * self.__capacity))
+        self.__low = array("q", bytes(8 * self.__capacity))
+        self.__close = array("q", bytes(8 * self.__capacity))
+        self.__volume = array("q", bytes(8 * self.__capacity))
+        self.__time = array("q", bytes(8 * self.__capacity))
+
+        # index of the last added candle
+        self.__last = -1
+        self.__count = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def is_full(self) -> bool:
+        return self.__count == self.__capacity
+
+    @property
+    def last_open(self) -> int:
+        return self.__open[self.__last]
+
+    @property
+    def last_high(self) -> int:
+        return self.__high[self.__last]
+
+    @property
+    def last_low(self) -> int:
+        return self.__low[self.__last]
+
+    @property
+    def last_close(self) -> int:
+        return self.__close[self.__last]
+
+    @property
+    def last_volume(self) -> int:
+        return self.__volume[self.__last]
+
+    @property
+    def last_time_ns(self) -> int:
+        return self.__time[self.__last]
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def append(self, candle: InternalCandle) -> None:
+        last = self.__last + 1
+        if last == self.__capacity:
+            last = 0
+
+        self.__open[last] = quotation_to_nano(candle.open)
+        self.__high[last] = quotation_to_nano(candle.high)
+        self.__low[last] = quotation_to_nano(candle.low)
+        self.__close[last] = quotation_to_nano(candle.close)
+        self.__volume[last] = candle.volume
+        self.__time[last] = datetime_to_ns(candle.time)
+
+        self.__last = last
+        if self.__count < self.__capacity:
+            self.__count += 1
+
+    def clear(self) -> None:
+        self.__last = -1
+        self.__count = 0
+
+    def to_columns(self) -> CandleColumns:
+        """Copy of candles in the window from the oldest to the last (for vectorized calculations)"""
+        order = (np.arange(self.__count) + self.__last + 1 - self.__count) % self.__capacity
+
+        return CandleColumns(
+            np.frombuffer(self.__open, dtype=np.int64)[order],
+            np.frombuffer(self.__high, dtype=np.int64)[order],
+            np.frombuffer(self.__low, dtype=np.int64)[order],
+            np.frombuffer(self.__close, dtype=np.int64)[order],
+            np.frombuffer(self.__volume, dtype=np.int64)[order],
+            np.frombuffer(self.__time, dtype=np.int64)[order].view("datetime64[ns]")
+        )
+
+
+class MatchStreak:
+    """
+    Incremental check "all recent candles match a condition".
+    Streak is count of consecutive matched candles up to the last one,
+    so all `window` recent candles match if streak is window or more. O(1) per candle.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.__window = window
+        self.__streak = 0
+
+    @property
+    def streak(self) -> int:
+        return self.__streak
+
+    @property
+    def is_matched(self) -> bool:
+        """True if all `window` recent candles match"""
+        return self.__streak >= self.__window
+
+    def update(self, matched: bool) -> bool:
+        """Add result of the next candle, returns is_matched"""
+        self.__streak = self.__streak + 1 if matched else 0
+
+        return self.__streak >= self.__window
+
+    def reset(self) -> None:
+        self.__streak = 0
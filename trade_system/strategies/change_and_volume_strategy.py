@@ -2,12 +2,16 @@ import logging
 from decimal import Decimal
 from typing import Optional
 
-from tinkoff.invest.utils import quotation_to_decimal
+import numpy as np
 
 from configuration.settings import StrategySettings
+from data_provider.candle_columns import CandleColumns
 from data_provider.internal_candle import InternalCandle
+from invest_api.utils import multiply_nano
 from trade_system.signal import Signal, SignalType
+from trade_system.signal_columns import SignalColumns, multiply_nano_array
 from trade_system.strategies.base_strategy import IStrategy
+from trade_system.strategies.candle_window import CandleWindow, MatchStreak
 
 __all__ = ("ChangeAndVolumeStrategy")
 
@@ -34,7 +38,9 @@ class ChangeAndVolumeStrategy(IStrategy):
 
         self.__signal_volume = int(settings.settings[self.__SIGNAL_VOLUME_NAME])
         self.__signal_min_candles = int(settings.settings[self.__SIGNAL_MIN_CANDLES_NAME])
-        self.__signal_min_tail = Decimal(settings.settings[self.__SIGNAL_MIN_TAIL_NAME])
+        # tail ratio is compared as fraction of integers to check nano prices exactly
+        self.__tail_numerator, self.__tail_denominator = \
+            Decimal(settings.settings[self.__SIGNAL_MIN_TAIL_NAME]).as_integer_ratio()
 
         self.__long_take = Decimal(settings.settings[self.__LONG_TAKE_NAME])
         self.__long_stop = Decimal(settings.settings[self.__LONG_STOP_NAME])
@@ -42,18 +48,97 @@ class ChangeAndVolumeStrategy(IStrategy):
         self.__short_take = Decimal(settings.settings[self.__SHORT_TAKE_NAME])
         self.__short_stop = Decimal(settings.settings[self.__SHORT_STOP_NAME])
 
-        self.__recent_candles: list[InternalCandle] = []
+        # recent completed candles and count of consecutive candles which match LONG and SHORT
+        self.__recent_candles = CandleWindow(self.__signal_min_candles)
+        self.__long_streak = MatchStreak(self.__signal_min_candles)
+        self.__short_streak = MatchStreak(self.__signal_min_candles)
         self.__current_candle: Optional[InternalCandle] = None
 
     @property
     def settings(self) -> StrategySettings:
         return self.__settings
 
+    @property
+    def batch_supported(self) -> bool:
+        return True
+
+    def analyze_candles(self, candles: CandleColumns) -> Optional[SignalColumns]:
+        """
+        The method analyzes all candles at once (vectorized) and returns all decisions.
+        """
+        if self.__signal_min_candles < 1:
+            return None
+
+        if len(candles) > 1 and not np.all(candles.time[1:] > candles.time[:-1]):
+            # candles from past or duplicates are processed by analyze_candle only
+            logger.info("Batch analyze isn't possible: candles aren't sorted by time")
+            return None
+
+        open_, high, low, close, volume = candles.open, candles.high, candles.low, candles.close, candles.volume
+        tail_numerator, tail_denominator = self.__tail_numerator, self.__tail_denominator
+
+        # Candle matches LONG: green candle, tail lower than __signal_min_tail, volume more that __signal_volume
+        # (high - close) / (high - low) <= tail is checked in integers. high > low for green candle.
+        long_match = (open_ < close) \
+            & ((high - close) * tail_denominator <= (high - low) * tail_numerator) \
+            & (volume >= self.__signal_volume)
+        # Candle matches SHORT: red candle, tail lower than __signal_min_tail, volume more that __signal_volume
+        short_match = (open_ > close) \
+            & ((close - low) * tail_denominator <= (high - low) * tail_numerator) \
+            & (volume >= self.__signal_volume)
+
+        # Candle i is analyzed with recent candles [i - __signal_min_candles, i - 1]
+        long_signal = self.__all_recent_match(long_match)
+        short_signal = self.__all_recent_match(short_match) & ~long_signal \
+            if self.settings.short_enabled_flag else np.zeros(len(candles), dtype=bool)
+
+        index = np.flatnonzero(long_signal | short_signal)
+        signal_type = np.where(long_signal[index], SignalType.LONG, SignalType.SHORT).astype(np.int8)
+
+        # take and stop based on configuration by close price level of the last recent candle
+        last_close = close[index - 1]
+        is_long = signal_type == SignalType.LONG
+
+        signals = SignalColumns(
+            index=index,
+            signal_type=signal_type,
+            take_profit_level=np.where(
+                is_long,
+                multiply_nano_array(last_close, self.__long_take),
+                multiply_nano_array(last_close, self.__short_take)
+            ),
+            stop_loss_level=np.where(
+                is_long,
+                multiply_nano_array(last_close, self.__long_stop),
+                multiply_nano_array(last_close, self.__short_stop)
+            )
+        )
+
+        logger.info(f"Batch analyze is completed: candles: {len(candles)}, signals: {len(signals)}")
+
+        return signals
+
+    def __all_recent_match(self, candles_match: np.ndarray) -> np.ndarray:
+        """
+        Result[i] is True if all __signal_min_candles candles before candle i match
+        """
+        result = np.zeros(len(candles_match), dtype=bool)
+        window = self.__signal_min_candles
+
+        if len(candles_match) <= window:
+            return result
+
+        matches_sum = np.concatenate(([0], np.cumsum(candles_match, dtype=np.int64)))
+        # window sum for candles [i - window, i - 1] is matches_sum[i] - matches_sum[i - window]
+        result[window:] = (matches_sum[window:-1] - matches_sum[:-window - 1]) == window
+
+        return result
+
     def analyze_candle(self, candle: InternalCandle) -> Optional[Signal]:
         """
         The method analyzes candle and returns a decision.
         """
-        logger.debug(f"Start analyze candle for {self.settings.figi} strategy {__name__}. {candle} ")
+        logger.debug("Start analyze candle for %s strategy %s. %s ", self.settings.figi, __name__, candle)
 
         result: Optional[Signal] = None
 
@@ -79,64 +164,52 @@ class ChangeAndVolumeStrategy(IStrategy):
         return result
 
     def __update_recent_candles(self, candle: InternalCandle) -> bool:
-        self.__recent_candles.append(candle)
+        """Add completed candle to the window and update match streaks. Returns True if the window is full"""
+        window = self.__recent_candles
+        window.append(candle)
+
+        open_, high, low, close = window.last_open, window.last_high, window.last_low, window.last_close
+        volume_matched = window.last_volume >= self.__signal_volume
+
+        # Green candle, tail lower than __signal_min_tail, volume more that __signal_volume.
+        # (high - close) / (high - low) <= tail. high > low for green candle
+        self.__long_streak.update(
+            open_ < close
+            and (high - close) * self.__tail_denominator <= (high - low) * self.__tail_numerator
+            and volume_matched
+        )
+        # Red candle, tail lower than __signal_min_tail, volume more that __signal_volume.
+        # (close - low) / (high - low) <= tail. high > low for red candle
+        self.__short_streak.update(
+            open_ > close
+            and (close - low) * self.__tail_denominator <= (high - low) * self.__tail_numerator
+            and volume_matched
+        )
 
-        if len(self.__recent_candles) < self.__signal_min_candles:
-            logger.debug(f"Candles in cache are low than required")
+        if len(window) < self.__signal_min_candles:
+            logger.debug("Candles in cache are low than required")
             return False
 
-        sorted(self.__recent_candles, key=lambda x: x.time)
-
-        # keep only __signal_min_candles candles in cache
-        if len(self.__recent_candles) > self.__signal_min_candles:
-            self.__recent_candles = self.__recent_candles[len(self.__recent_candles) - self.__signal_min_candles:]
-
         return True
 
     def __is_match_long(self) -> bool:
         """
-        Check for LONG signal. All candles in cache:
+        Check for LONG signal. All recent candles:
         Green candle, tail lower than __signal_min_tail, volume more that __signal_volume
         """
-        for candle in self.__recent_candles:
-            logger.debug(f"Recent Candle to analyze {self.settings.figi} LONG: {candle}")
-            open_, high, close, low = quotation_to_decimal(candle.open), quotation_to_decimal(candle.high), \
-                                      quotation_to_decimal(candle.close), quotation_to_decimal(candle.low)
-
-            if open_ < close \
-                    and ((high - close) / (high - low)) <= self.__signal_min_tail \
-                    and candle.volume >= self.__signal_volume:
-                logger.debug(f"Continue analyze {self.settings.figi}")
-                continue
-
-            logger.debug(f"Break analyze {self.settings.figi}")
-            break
-        else:
-            logger.debug(f"Signal detected {self.settings.figi}")
+        if self.__long_streak.is_matched:
+            logger.debug("Signal detected %s", self.settings.figi)
             return True
 
         return False
 
     def __is_match_short(self) -> bool:
         """
-        Check for SHORT signal. All candles in cache:
+        Check for SHORT signal. All recent candles:
         Red candle, tail lower than __signal_min_tail, volume more that __signal_volume
         """
-        for candle in self.__recent_candles:
-            logger.debug(f"Recent Candle to analyze {self.settings.figi} SHORT: {candle}")
-            open_, high, close, low = quotation_to_decimal(candle.open), quotation_to_decimal(candle.high), \
-                                      quotation_to_decimal(candle.close), quotation_to_decimal(candle.low)
-
-            if open_ > close \
-                    and ((close - low) / (high - low)) <= self.__signal_min_tail \
-                    and candle.volume >= self.__signal_volume:
-                logger.debug(f"Continue analyze {self.settings.figi}")
-                continue
-
-            logger.debug(f"Break analyze {self.settings.figi}")
-            break
-        else:
-            logger.debug(f"Signal detected {self.settings.figi}")
+        if self.__short_streak.is_matched:
+            logger.debug("Signal detected %s", self.settings.figi)
             return True
 
         return False
@@ -148,13 +221,13 @@ class ChangeAndVolumeStrategy(IStrategy):
             stop_multy: Decimal
     ) -> Signal:
         # take and stop based on configuration by close price level (close for last price)
-        last_candle = self.__recent_candles[len(self.__recent_candles) - 1]
+        last_close = self.__recent_candles.last_close
 
         signal = Signal(
             figi=self.settings.figi,
             signal_type=signal_type,
-            take_profit_level=quotation_to_decimal(last_candle.close) * profit_multy,
-            stop_loss_level=quotation_to_decimal(last_candle.close) * stop_multy
+            take_profit_level=multiply_nano(last_close, profit_multy),
+            stop_loss_level=multiply_nano(last_close, stop_multy)
         )
 
         logger.info(f"Make Signal: {signal}")
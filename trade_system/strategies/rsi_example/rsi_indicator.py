@@ -0,0 +1,95 @@
+import math
+from collections import deque
+
+__all__ = ("RsiIndicator")
+
+
+class RsiIndicator:
+    """
+    Streaming RSI calculation with O(1) work per update.
+    Prices are integers (nano units), so sums of gains and losses are exact.
+
+    The indicator works on the last `length` + 1 bars and the last bar is still in progress:
+    its price can be updated many times before a new bar is started.
+    Averages of gains and losses are calculated over `length` price differences of these bars,
+    the same way as the initial averages of Wells Wilder's RSI are calculated.
+    """
+
+    def __init__(self, length: int) -> None:
+        self.__length = length
+
+        # gains and losses of completed bars. The last difference (with bar in progress) isn't here.
+        self.__gains: deque[int] = deque()
+        self.__losses: deque[int] = deque()
+        self.__gains_sum = 0
+        self.__losses_sum = 0
+
+        self.__bars_count = 0
+        self.__previous_price = 0
+        self.__current_price = 0
+
+    @property
+    def is_ready(self) -> bool:
+        return self.__bars_count >= self.__length + 1
+
+    def add_bar(self, price: int) -> None:
+        """Complete current bar and start a new one"""
+        if self.__bars_count > 0:
+            if self.__bars_count > 1:
+                self.__append_difference(self.__current_price - self.__previous_price)
+
+            self.__previous_price = self.__current_price
+
+        self.__current_price = price
+        self.__bars_count += 1
+
+    def update_bar(self, price: int) -> None:
+        """Update price of bar in progress"""
+        self.__current_price = price
+
+    def value(self) -> float:
+        """Current RSI value. NaN if there are not enough bars or price hasn't been changed"""
+        if not self.is_ready:
+            return math.nan
+
+        gains, losses = self.__gains_and_losses()
+
+        if gains + losses == 0:
+            return math.nan
+
+        # the same as 100 - 100 / (1 + rs), but exact division is rounded once only
+        return 100 * gains / (gains + losses)
+
+    def is_below(self, level: int) -> bool:
+        """Exact check of RSI < level. False if RSI value is NaN"""
+        if not self.is_ready:
+            return False
+
+        gains, losses = self.__gains_and_losses()
+        return 100 * gains < level * (gains + losses)
+
+    def is_above(self, level: int) -> bool:
+        """Exact check of RSI > level. False if RSI value is NaN"""
+        if not self.is_ready:
+            return False
+
+        gains, losses = self.__gains_and_losses()
+        return 100 * gains > level * (gains + losses)
+
+    def __gains_and_losses(self) -> tuple[int, int]:
+        last_difference = self.__current_price - self.__previous_price
+
+        return self.__gains_sum + max(last_difference, 0), self.__losses_sum + max(-last_difference, 0)
+
+    def __append_difference(self, difference: int) -> None:
+        gain, loss = max(difference, 0), max(-difference, 0)
+
+        self.__gains.append(gain)
+        self.__losses.append(loss)
+        self.__gains_sum += gain
+        self.__losses_sum += loss
+
+        # keep `length` - 1 differences of completed bars, the last one is calculated with bar in progress
+        if len(self.__gains) > self.__length - 1:
+            self.__gains_sum -= self.__gains.popleft()
+            self.__losses_sum -= self.__losses.popleft()
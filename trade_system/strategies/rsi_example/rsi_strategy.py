@@ -1,36 +1,25 @@
 import logging
-from dataclasses import dataclass
-from datetime import datetime
+from datetime import timedelta
 from decimal import Decimal
 from typing import Optional
 
-import pandas as pd
-from tinkoff.invest.utils import quotation_to_decimal
+import numpy as np
 
 from configuration.settings import StrategySettings
+from data_provider.aggregation.candle_aggregator import CandleAggregator, bar_heads
+from data_provider.candle_columns import CandleColumns
 from data_provider.internal_candle import InternalCandle
+from invest_api.utils import multiply_nano
 from trade_system.signal import Signal, SignalType
+from trade_system.signal_columns import SignalColumns, multiply_nano_array
 from trade_system.strategies.base_strategy import IStrategy
+from trade_system.strategies.rsi_example.rsi_indicator import RsiIndicator
 
 __all__ = ("RsiStrategy")
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(eq=False, repr=True)
-class FloatCandle:
-    """Data class for Pandas calculations.
-    float type is a mistake and shame. Using it just for example.
-    Do not use it in production code.
-    """
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: int
-    time: datetime
-
-
 class RsiStrategy(IStrategy):
     """
     Example of trade strategy based on RSI indicator (self-made).
@@ -45,6 +34,9 @@ class RsiStrategy(IStrategy):
     __LONG_RSI_LEVEL = "LONG_RSI_LEVEL"
     __SHORT_RSI_LEVEL = "SHORT_RSI_LEVEL"
 
+    # price fields of candle which are supported by batch analyze
+    __BATCH_SOURCES = ("open", "high", "low", "close")
+
     __LONG_TAKE_NAME = "LONG_TAKE"
     __LONG_STOP_NAME = "LONG_STOP"
     __SHORT_TAKE_NAME = "SHORT_TAKE"
@@ -65,18 +57,100 @@ class RsiStrategy(IStrategy):
         self.__short_take = Decimal(settings.settings[self.__SHORT_TAKE_NAME])
         self.__short_stop = Decimal(settings.settings[self.__SHORT_STOP_NAME])
 
-        self.__recent_candles: list[InternalCandle] = []
+        # bars with self.__interval minutes interval are started by the first candle of the bar
+        self.__bars = CandleAggregator(timedelta(minutes=self.__interval), aligned=False)
         self.__current_candle: Optional[InternalCandle] = None
 
+        self.__rsi = RsiIndicator(self.__length)
+
     @property
     def settings(self) -> StrategySettings:
         return self.__settings
 
+    @property
+    def batch_supported(self) -> bool:
+        return True
+
+    def analyze_candles(self, candles: CandleColumns) -> Optional[SignalColumns]:
+        """
+        The method analyzes all candles at once (vectorized) and returns all decisions.
+        """
+        if self.__source not in self.__BATCH_SOURCES or self.__length < 1:
+            return None
+
+        if len(candles) > 1 and not np.all(candles.time[1:] > candles.time[:-1]):
+            # candles from past or duplicates are processed by analyze_candle only
+            logger.info("Batch analyze isn't possible: candles aren't sorted by time")
+            return None
+
+        candles_count = len(candles)
+        if candles_count < 2:
+            return SignalColumns(
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int8),
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64)
+            )
+
+        # bars with self.__interval minutes interval and bar index for every 1 minute candle
+        heads = bar_heads(candles.time.view(np.int64), timedelta(minutes=self.__interval), aligned=False)
+        bar_of = np.searchsorted(heads, np.arange(candles_count), side="right") - 1
+
+        # source price of bar in progress after every candle and final source price of every bar
+        running_price = RsiStrategy.__running_source_price(candles, self.__source, heads, bar_of)
+        bar_price = running_price[np.append(heads[1:], candles_count) - 1]
+
+        bar_difference = np.diff(bar_price)
+        gains_sum = np.concatenate(([0], np.cumsum(np.maximum(bar_difference, 0))))
+        losses_sum = np.concatenate(([0], np.cumsum(np.maximum(-bar_difference, 0))))
+
+        # candle k is added to bars when candle k + 1 is analyzed.
+        # RSI is ready if there are self.__length + 1 bars at least.
+        candle_index = np.arange(candles_count - 1)
+        bar_index = bar_of[candle_index]
+        is_ready = bar_index >= self.__length
+        candle_index, bar_index = candle_index[is_ready], bar_index[is_ready]
+
+        # the same calculation as RsiIndicator does: completed bars differences and bar in progress difference
+        last_difference = running_price[candle_index] - bar_price[bar_index - 1]
+        gains = gains_sum[bar_index - 1] - gains_sum[bar_index - self.__length] + np.maximum(last_difference, 0)
+        losses = losses_sum[bar_index - 1] - losses_sum[bar_index - self.__length] + np.maximum(-last_difference, 0)
+
+        long_signal = 100 * gains < self.__long_rsi * (gains + losses)
+        short_signal = (100 * gains > self.__short_rsi * (gains + losses)) & ~long_signal \
+            if self.settings.short_enabled_flag else np.zeros(len(candle_index), dtype=bool)
+
+        is_signal = long_signal | short_signal
+        index = candle_index[is_signal] + 1
+        is_long = long_signal[is_signal]
+
+        # take and stop based on configuration by close price level of the bar in progress
+        last_close = candles.close[index - 1]
+
+        signals = SignalColumns(
+            index=index,
+            signal_type=np.where(is_long, SignalType.LONG, SignalType.SHORT).astype(np.int8),
+            take_profit_level=np.where(
+                is_long,
+                multiply_nano_array(last_close, self.__long_take),
+                multiply_nano_array(last_close, self.__short_take)
+            ),
+            stop_loss_level=np.where(
+                is_long,
+                multiply_nano_array(last_close, self.__long_stop),
+                multiply_nano_array(last_close, self.__short_stop)
+            )
+        )
+
+        logger.info(f"Batch analyze is completed: candles: {len(candles)}, signals: {len(signals)}")
+
+        return signals
+
     def analyze_candle(self, candle: InternalCandle) -> Optional[Signal]:
         """
         The method analyzes candle and returns a decision.
         """
-        logger.debug(f"Start analyze candle for {self.settings.figi} strategy {__name__}. {candle} ")
+        logger.debug("Start analyze candle for %s strategy %s. %s ", self.settings.figi, __name__, candle)
 
         result: Optional[Signal] = None
 
@@ -87,7 +161,7 @@ class RsiStrategy(IStrategy):
                 return None
 
             if candle.time > self.__current_candle.time:
-                if self.__update_recent_candles(self.__current_candle):
+                if self.__update_bars(self.__current_candle):
 
                     if self.__is_match_long():
                         logger.info(f"Signal (LONG) {self.settings.figi} has been found.")
@@ -101,39 +175,21 @@ class RsiStrategy(IStrategy):
 
         return result
 
-    def __update_recent_candles(self, candle: InternalCandle) -> bool:
-        # update 1 minute candle to candle with self.__interval minutes interval
-        if len(self.__recent_candles) > 0:
-            current_candle = self.__recent_candles[len(self.__recent_candles) - 1]
-            # calculate difference between first candle in interval and new candle
-            diff_sec = (candle.time - current_candle.time).seconds
-            if diff_sec >= (self.__interval * 60):
-                # just add a new candle.
-                self.__recent_candles.append(candle)
-            else:
-                # interval still going, so update current candle with the latest information
-                current_candle.close = candle.close
-                current_candle.volume += candle.volume
-                current_candle.high = candle.high \
-                    if (quotation_to_decimal(current_candle.high) < quotation_to_decimal(candle.high)) \
-                    else current_candle.high
-                current_candle.low = candle.low \
-                    if (quotation_to_decimal(current_candle.low) > quotation_to_decimal(candle.low)) \
-                    else current_candle.low
+    def __update_bars(self, candle: InternalCandle) -> bool:
+        # update 1 minute candle to bar with self.__interval minutes interval
+        bars_count = self.__bars.bars_count
+        self.__bars.update(candle)
+
+        if self.__bars.bars_count > bars_count:
+            self.__rsi.add_bar(self.__source_price())
         else:
-            # just add a new candle to empty cache
-            self.__recent_candles.append(candle)
+            # interval still going, so bar in progress has been updated with the latest information
+            self.__rsi.update_bar(self.__source_price())
 
-        if len(self.__recent_candles) < (self.__length + 1):
-            logger.debug(f"Candles in cache are low than required")
+        if not self.__rsi.is_ready:
+            logger.debug("Bars are low than required")
             return False
 
-        sorted(self.__recent_candles, key=lambda x: x.time)
-
-        # keep only self.__length candles in cache
-        if len(self.__recent_candles) > (self.__length + 1):
-            self.__recent_candles = self.__recent_candles[len(self.__recent_candles) - self.__length - 1:]
-
         return True
 
     def __is_match_long(self) -> bool:
@@ -142,7 +198,9 @@ class RsiStrategy(IStrategy):
         Make a Signal if rsi < 25
         """
 
-        return self.__current_rsi() < self.__long_rsi
+        self.__log_current_rsi()
+
+        return self.__rsi.is_below(self.__long_rsi)
 
     def __is_match_short(self) -> bool:
         """
@@ -150,7 +208,9 @@ class RsiStrategy(IStrategy):
         Make a Signal if rsi > 75
         """
 
-        return self.__current_rsi() > self.__short_rsi
+        self.__log_current_rsi()
+
+        return self.__rsi.is_above(self.__short_rsi)
 
     def __make_signal(
             self,
@@ -159,88 +219,63 @@ class RsiStrategy(IStrategy):
             stop_multy: Decimal
     ) -> Signal:
         # take and stop based on configuration by close price level (close for last price)
-        last_candle = self.__recent_candles[len(self.__recent_candles) - 1]
+        last_close = self.__bars.bar.close
 
         signal = Signal(
             figi=self.settings.figi,
             signal_type=signal_type,
-            take_profit_level=quotation_to_decimal(last_candle.close) * profit_multy,
-            stop_loss_level=quotation_to_decimal(last_candle.close) * stop_multy
+            take_profit_level=multiply_nano(last_close, profit_multy),
+            stop_loss_level=multiply_nano(last_close, stop_multy)
         )
 
         logger.info(f"Make Signal: {signal}")
 
         return signal
 
-    def __convert_candles(self) -> list[FloatCandle]:
-        logger.info(f"Fill candles")
-        candles: list[FloatCandle] = []
-
-        for candle in self.__recent_candles:
-            candles.append(
-                FloatCandle(
-                    open=float(quotation_to_decimal(candle.open)),
-                    high=float(quotation_to_decimal(candle.high)),
-                    low=float(quotation_to_decimal(candle.low)),
-                    close=float(quotation_to_decimal(candle.close)),
-                    volume=candle.volume,
-                    time=candle.time
-                )
-            )
-
-        return candles
-
-    def __calculate_rsi(
-            self,
-            candles: pd.DataFrame
-    ) -> pd.DataFrame:
-        """
-        Wells Wilder's RSI calculation developed via the Pandas library.
-        Based on: https://github.com/alphazwest
-        """
-
-        # Calculate Price Differences using the column specified as price (self.__source).
-        candles['diff'] = candles[self.__source].diff(1)
-
-        # Calculate Avg. Gains/Losses
-        candles['gain'] = candles['diff'].clip(lower=0)
-        candles['loss'] = candles['diff'].clip(upper=0).abs()
-
-        # Get initial Averages
-        candles['avg_gain'] = candles['gain'].rolling(window=self.__length, min_periods=self.__length).mean()[:self.__length + 1]
-        candles['avg_loss'] = candles['loss'].rolling(window=self.__length, min_periods=self.__length).mean()[:self.__length + 1]
-        candles['avg_loss_no_slice'] = candles['loss'].rolling(window=self.__length, min_periods=self.__length).mean()
-
-        # Calculate Average Gains
-        for i, row in enumerate(candles['avg_gain'].iloc[self.__length + 1:]):
-            candles['avg_gain'].iloc[i + self.__length + 1] = \
-                (candles['avg_gain'].iloc[i + self.__length] *
-                 (self.__length - 1) +
-                 candles['gain'].iloc[i + self.__length + 1]) \
-                / self.__length
-
-        # Calculate Average Losses
-        for i, row in enumerate(candles['avg_loss'].iloc[self.__length + 1:]):
-            candles['avg_loss'].iloc[i + self.__length + 1] = \
-                (candles['avg_loss'].iloc[i + self.__length] *
-                 (self.__length - 1) +
-                 candles['loss'].iloc[i + self.__length + 1]) \
-                / self.__length
-
-        # Calculate RS Values
-        candles['rs'] = candles['avg_gain'] / candles['avg_loss']
-
-        # Calculate RSI
-        candles['rsi'] = 100 - (100 / (1.0 + candles['rs']))
-
-        return candles
-
-    def __current_rsi(self) -> float:
-        logger.info(f"Start RSI calculation")
-
-        candles_rsi = self.__calculate_rsi(pd.DataFrame(self.__convert_candles()))
-        current_rsi = candles_rsi.iat[len(candles_rsi) - 1, len(candles_rsi.columns) - 1]
-
-        logger.info(f"RSI calculation. Current is {current_rsi}")
-
-        return current_rsi
+    def __source_price(self) -> int:
+        return getattr(self.__bars.bar, self.__source)
+
+    def __log_current_rsi(self) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("RSI calculation. Current is %s", self.__rsi.value())
+
+    @staticmethod
+    def __running_source_price(
+            candles: CandleColumns,
+            source: str,
+            heads: np.ndarray,
+            bar_of: np.ndarray
+    ) -> np.ndarray:
+        """Source price of bar in progress after every candle"""
+        match source:
+            case "open":
+                return candles.open[heads][bar_of]
+            case "close":
+                return candles.close
+            case "high":
+                return RsiStrategy.__running_extreme(candles.high, bar_of, True)
+            case _:
+                return RsiStrategy.__running_extreme(candles.low, bar_of, False)
+
+    @staticmethod
+    def __running_extreme(values: np.ndarray, bar_of: np.ndarray, is_max: bool) -> np.ndarray:
+        """Running max (min) of values inside every bar"""
+        minimum = int(values.min())
+        span = int(values.max()) - minimum + 1
+
+        if span * (int(bar_of[-1]) + 1) >= np.iinfo(np.int64).max // 2:
+            # offsets are too big for int64, python loop is used
+            result = values.copy()
+            for i in range(1, len(values)):
+                if bar_of[i] == bar_of[i - 1]:
+                    result[i] = max(result[i - 1], values[i]) if is_max else min(result[i - 1], values[i])
+            return result
+
+        # every next bar gets bigger (smaller) offset, so accumulation is restarted on every bar
+        offset = bar_of.astype(np.int64) * span
+        shifted = values.astype(np.int64) - minimum
+
+        if is_max:
+            return np.maximum.accumulate(shifted + offset) - offset + minimum
+
+        return np.minimum.accumulate(shifted - offset) + offset + minimum
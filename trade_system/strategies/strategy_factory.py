@@ -1,5 +1,6 @@
 from typing import Optional
 
+from instrumentation.active_instrumentation import active_instrumentation
 from trade_system.strategies.change_and_volume_strategy import ChangeAndVolumeStrategy
 from trade_system.strategies.rsi_example.rsi_strategy import RsiStrategy
 from trade_system.strategies.base_strategy import IStrategy
@@ -10,13 +11,16 @@ __all__ = ("StrategyFactory")
 class StrategyFactory:
     """
     Fabric for strategies. Put here new strategy.
+    Strategies are wrapped by active instrumentation of history tests (if it's enabled).
     """
     @staticmethod
     def new_factory(strategy_name: str, *args, **kwargs) -> Optional[IStrategy]:
         match strategy_name:
             case "ChangeAndVolumeStrategy":
-                return ChangeAndVolumeStrategy(*args, **kwargs)
+                strategy = ChangeAndVolumeStrategy(*args, **kwargs)
             case "RsiStrategy":
-                return RsiStrategy(*args, **kwargs)
+                strategy = RsiStrategy(*args, **kwargs)
             case _:
                 return None
+
+        return active_instrumentation().wrap_strategy(strategy)
@@ -0,0 +1,101 @@
+import logging
+from datetime import datetime, timezone
+
+from configuration.configuration import ProgramConfiguration
+from configuration.logs_configuration import LogsConfiguration, prepare_logs
+from data_provider.aggregation.aggregated_data_provider import AggregatedDataProvider
+from data_provider.data_provider_factory import DataProviderFactory
+from history_tests.sweep.parameter_grid import ParameterGrid
+from history_tests.sweep.parameter_sweep import make_sweep_result
+from history_tests.walk_forward.backtest_window import explicit_windows, rolling_windows
+from history_tests.walk_forward.walk_forward_runner import WalkForwardRunner
+from trade_system.commissions.commissions import CommissionEveryOrderCalculator
+
+# the configuration file name
+CONFIG_FILE = "settings.ini"
+# the log file name (in logs folder)
+LOG_FILE = "walk_forward.log"
+
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    prepare_logs(LOG_FILE, LogsConfiguration(CONFIG_FILE))
+
+    logger.info("Walk-forward tests have been started.")
+
+    try:
+        config = ProgramConfiguration(CONFIG_FILE)
+        logger.info("Configuration has been loaded")
+    except Exception as ex:
+        logger.critical("Load configuration error: %s", repr(ex))
+    else:
+        settings = config.walk_forward_settings
+        strategy_settings = config.test_strategy_settings
+
+        if settings.windows:
+            windows = explicit_windows(settings.windows, settings.train_days)
+        elif settings.start:
+            windows = rolling_windows(
+                settings.start,
+                settings.end or datetime.now(timezone.utc),
+                settings.test_days,
+                settings.train_days,
+                settings.step_days,
+                settings.anchored
+            )
+        else:
+            windows = []
+
+        if not windows:
+            logger.critical("Walk-forward windows are empty. Specify WINDOWS or START in WALK_FORWARD section")
+            raise SystemExit(1)
+
+        combinations = None
+        if settings.optimize:
+            combinations = list(ParameterGrid(
+                {key.upper(): value for key, value in strategy_settings.settings.items()},
+                config.sweep_settings.strategy_settings
+            ).combinations())
+
+        # candles of all windows are loaded once
+        data_provider = DataProviderFactory.new_factory(
+            config.data_provider_name,
+            *config.data_provider_settings
+        )
+        if config.data_provider_interval_min > 1:
+            data_provider = AggregatedDataProvider(
+                data_provider,
+                config.data_provider_interval_min,
+                config.data_provider_rollup_cache_path
+            )
+        candles = data_provider.provide_columns_range(
+            strategy_settings.figi,
+            min(x.train_start or x.start for x in windows),
+            max(x.end for x in windows)
+        )
+        logger.info(f"Candles have been loaded: {len(candles)}")
+
+        window_results = WalkForwardRunner(
+            strategy_settings,
+            config.commission_settings,
+            settings.max_workers
+        ).run(candles, windows, combinations)
+
+        for window_result in window_results:
+            logger.info(f"Window: {window_result.window.name}; Candles: {window_result.candles_count}")
+            for result in window_result.results:
+                logger.info(f"Net profit: {result.net_profit}; Profit: {result.profit}; "
+                            f"Commission: {result.commission}; Orders: {result.orders_count}; "
+                            f"Emulator: {result.emulator}; Settings: {result.settings}")
+
+        logger.info(f"Aggregated results of {len(window_results)} windows:")
+        commission_calculator = CommissionEveryOrderCalculator(config.commission_settings)
+        for emulator_name, test_result in WalkForwardRunner.merge_results(window_results).items():
+            result = make_sweep_result({}, emulator_name, test_result, commission_calculator)
+            logger.info(f"Net profit: {result.net_profit}; Profit: {result.profit}; "
+                        f"Commission: {result.commission}; Orders: {result.orders_count}; "
+                        f"Win rate: {result.win_rate:.2%}; Max drawdown: {result.max_drawdown}; "
+                        f"Sharpe ratio: {result.sharpe_ratio:.3f}; Emulator: {emulator_name}")
+
+    logger.info("Walk-forward tests have been completed.")